@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Fan-out of /alerts/stream events to many idle clients plus a few slow ones.
+
+Attaches --clients socket pairs to an AlertBroker, as the route does after sending the
+SSE headers. A handful of them are read continuously to time how long an event takes
+from publish() to arrival; --slow clients never read and should be dropped once their
+buffer is full instead of holding anyone else back. The process thread count is
+reported to show connections don't get a thread each.
+
+Usage:
+    python -m benchmarks.bench_alert_stream --clients 5000 --slow 50 --events 200
+"""
+import argparse
+import json
+import logging
+import resource
+import selectors
+import socket
+import statistics
+import threading
+import time
+
+from notifications.alert_broker import AlertBroker
+
+def wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise SystemExit("Timed out waiting for the broker")
+        time.sleep(0.01)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000, help="idle clients that read nothing until the end")
+    parser.add_argument("--readers", type=int, default=10, help="clients timing the arrival of each event")
+    parser.add_argument("--slow", type=int, default=50, help="clients that never read")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--event-bytes", type=int, default=2000, help="approximate size of one encoded event")
+    parser.add_argument("--buffer-bytes", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    total = args.clients + args.readers + args.slow
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < total * 2 + 100:
+        raise SystemExit(f"Needs {total * 2 + 100} file descriptors, ulimit -n is {soft}")
+
+    broker = AlertBroker(max_clients=total, max_buffer_bytes=args.buffer_bytes, heartbeat_seconds=3600)
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    peers = []
+    for _ in range(total):
+        server_side, client_side = socket.socketpair()
+        broker.attach(server_side)
+        peers.append(client_side)
+    wait_for(lambda: broker.client_count() == total)
+    print(f"attached {total} clients in {time.perf_counter() - start:.2f} s, "
+          f"threads {threads_before} -> {threading.active_count()}", flush=True)
+
+    readers = peers[:args.readers]
+    slow = peers[args.readers:args.readers + args.slow]
+    idle = peers[args.readers + args.slow:]
+    # Small receive buffers make slow clients fill their server-side buffer sooner
+    for peer in slow:
+        peer.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+
+    selector = selectors.DefaultSelector()
+    for peer in readers:
+        peer.setblocking(False)
+        selector.register(peer, selectors.EVENT_READ, bytearray())
+
+    latencies = []
+    padding = "x" * max(0, args.event_bytes - 120)
+    for event_id in range(args.events):
+        published = time.perf_counter()
+        broker.publish([{"coin_id": str(event_id), "volume_time": "24h", "volume_change": 25.0,
+                         "sent": published, "pad": padding}])
+        arrived = 0
+        while arrived < len(readers):
+            for key, _ in selector.select(timeout=10):
+                chunk = key.fileobj.recv(65536)
+                key.data.extend(chunk)
+                while b"\n\n" in key.data:
+                    message, _, rest = bytes(key.data).partition(b"\n\n")
+                    key.data[:] = rest
+                    data = next(line for line in message.split(b"\n") if line.startswith(b"data: "))
+                    latencies.append(time.perf_counter() - json.loads(data[6:])["sent"])
+                    arrived += 1
+        # Idle clients drain now and then, like a browser that is just slow to render
+        if event_id % 50 == 49:
+            for peer in idle:
+                peer.setblocking(False)
+                try:
+                    while peer.recv(65536):
+                        pass
+                except BlockingIOError:
+                    pass
+
+    wait_for(lambda: broker.published == args.events)
+    latencies.sort()
+    stats = broker.stats()
+    print(f"events {args.events} x clients {total}: fan-out latency "
+          f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print(f"dropped {stats['dropped']} of {args.slow} slow clients, {stats['clients']} still connected, "
+          f"threads {threading.active_count()}")
+
+    for peer in peers:
+        peer.close()
+    wait_for(lambda: broker.client_count() == 0)
+    if stats['dropped'] > args.slow:
+        raise SystemExit("Clients that kept up were dropped")
+
+if __name__ == "__main__":
+    main()
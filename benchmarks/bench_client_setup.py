@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Measures per-run setup latency: a fresh ProcessData/Firestore client per run versus the
+shared, warmed client container built in create_app.
+
+"Setup" is everything before the first Firestore read of a run returns: constructing
+ProcessData (and its client) plus that first read. Runs against a local gRPC Firestore stub.
+
+Usage:
+    python -m benchmarks.bench_client_setup --runs 20
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+
+from benchmarks.stub_firestore_grpc import StubFirestoreServer
+
+class NullNotification:
+    def send_sms(self, message, phone):
+        return "SM0"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+
+    with StubFirestoreServer() as stub:
+        os.environ["FIRESTORE_EMULATOR_HOST"] = stub.host
+        from google.cloud import firestore
+        from processors.process_data import ProcessData
+        from utils.firestore_client import GCP_PROJECT_ID, FIRESTORE_DATABASE, get_firestore_client, warmup_firestore
+
+        def per_request_run():
+            # What track_volume used to do: a new client for every run
+            client = firestore.Client(project=GCP_PROJECT_ID, database=FIRESTORE_DATABASE)
+            process = ProcessData(NullNotification(), firestore_client=client)
+            process.custom_filter.reset_tracker_ref.get()
+            client.close()
+
+        shared_client = get_firestore_client()
+        warmup_seconds = warmup_firestore(shared_client)
+        shared_process = ProcessData(NullNotification(), firestore_client=shared_client)
+
+        def shared_run():
+            shared_process.custom_filter.reset_tracker_ref.get()
+
+        print(f"warmup (paid once at startup): {warmup_seconds * 1000:.1f} ms")
+        print(f"{'mode':>12} {'median ms':>10} {'p95 ms':>8}")
+        for label, run in (("per-request", per_request_run), ("shared", shared_run)):
+            samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            print(f"{label:>12} {statistics.median(samples):>10.2f} {samples[int(0.95 * (len(samples) - 1))]:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Times the per-coin Python change computation against the vectorized CoinFrame kernel.
+
+Usage:
+    python -m benchmarks.bench_coin_frame --coins 1000 2500 5000 10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_baseline, generate_listing
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+
+MARKET_CAP_MIN_USD = 10000000
+TWENTYFOURHR_VOLUME_MIN_USD = 300000
+
+def python_candidates(listing, baseline):
+    """
+    Per-coin dict walk, as process_volume_change used to do it.
+    """
+    candidates = []
+    for coin in listing:
+        usd = coin['quote']['USD']
+        if float(usd['market_cap']) < MARKET_CAP_MIN_USD or float(usd['volume_24h']) < TWENTYFOURHR_VOLUME_MIN_USD:
+            continue
+        prev_data = baseline.get(str(coin['id']))
+        if prev_data and 'initial_24hr_volume' in prev_data and 'price' in prev_data:
+            prev_volume, prev_price = float(prev_data['initial_24hr_volume']), float(prev_data['price'])
+            volume_change = (usd['volume_24h'] - prev_volume) / prev_volume if prev_volume > 0 else 0
+            if usd['price'] > prev_price:
+                candidates.append((coin['id'], volume_change))
+    return candidates
+
+def frame_candidates(frame, eligible, baseline):
+    prev_volume, prev_price = baseline.align(frame)
+    volume_change, candidates = frame.volume_changes(prev_volume, prev_price, eligible)
+    rows = np.flatnonzero(candidates)
+    return list(zip(frame.ids[rows].tolist(), volume_change[rows].tolist()))
+
+def best_of(func, repeat, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, nargs="+", default=[1000, 2500, 5000, 10000])
+    parser.add_argument("--buckets", type=int, default=4, help="volume_time buckets evaluated per run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'coins':>8} {'python ms':>10} {'frame ms':>10} {'speedup':>8}")
+    for count in args.coins:
+        listing = generate_listing(count)
+        baseline = generate_baseline(listing)
+        # Baselines are deserialized once per run when the store loads them
+        snapshot = BaselineSnapshot.from_document(baseline)
+
+        def python_run():
+            return [python_candidates(listing, baseline) for _ in range(args.buckets)]
+
+        def frame_run():
+            # The frame and the filter are built once per run and shared by all buckets
+            frame = CoinFrame.from_listing(listing)
+            eligible = frame.eligible_mask(MARKET_CAP_MIN_USD, TWENTYFOURHR_VOLUME_MIN_USD)
+            return [frame_candidates(frame, eligible, snapshot) for _ in range(args.buckets)]
+
+        expected, python_time = best_of(python_run, args.repeat)
+        actual, frame_time = best_of(frame_run, args.repeat)
+        if expected != actual:
+            raise SystemExit(f"Mismatch between python and frame candidates at {count} coins")
+        print(f"{count:>8} {python_time * 1000:>10.2f} {frame_time * 1000:>10.2f} {python_time / frame_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
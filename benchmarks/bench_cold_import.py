@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cold-start regression check: imports the Flask entry point and runs create_app in
+FAST_START mode in fresh interpreters, and fails if the median exceeds a budget.
+
+Each sample is a new process, so nothing is served from an already-warm sys.modules.
+On failure the slowest imports from `python -X importtime` are printed.
+
+Usage:
+    python -m benchmarks.bench_cold_import --runs 5 --budget-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+import crypto_volume_tracker
+imported = time.perf_counter()
+crypto_volume_tracker.create_app()
+ready = time.perf_counter()
+print((imported - start) * 1000, (ready - start) * 1000)
+"""
+
+def probe_env() -> dict:
+    env = dict(os.environ)
+    env.update({
+        "FAST_START": "true",
+        "FAST_START_PRELOAD": "false", # measure only what blocks serving
+        "ENVIRONMENT": "CLOUD",
+        "COINMARKET_API_KEY": "stub",
+        "TWILIO_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "stub",
+        "TWILIO_PHONE": "+10000000000",
+        "PYTHONPATH": ROOT,
+    })
+    return env
+
+def slowest_imports(top: int) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import crypto_volume_tracker"],
+        cwd=ROOT, env=probe_env(), capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", 400)))
+    args = parser.parse_args()
+
+    import_ms, ready_ms = [], []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=probe_env(),
+                                capture_output=True, text=True, check=True)
+        imported, ready = map(float, result.stdout.split()[-2:])
+        import_ms.append(imported)
+        ready_ms.append(ready)
+
+    median_ready = statistics.median(ready_ms)
+    print(f"import crypto_volume_tracker: median {statistics.median(import_ms):.1f} ms")
+    print(f"import + create_app:          median {median_ready:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if median_ready > args.budget_ms:
+        print("FAIL: cold start is over budget. Slowest imports (cumulative / self us):")
+        for cumulative, self_us, name in slowest_imports(15):
+            print(f"  {cumulative:>9} {self_us:>9}  {name}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
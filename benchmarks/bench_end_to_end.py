@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Deterministic, offline end-to-end benchmark of the tracking pipeline.
+
+Every case fetches a synthetic listing from the local CoinMarketCap stub through FetchData,
+then runs ProcessData.process_volume_change against the in-memory Firestore fake with a
+fake Twilio behind the real SmsDispatcher. Cases cover coins x subscribers x timeframes;
+each is run cold (empty preference cache and notification tracker) and then warm.
+
+Results are written as JSON. With --compare, cases slower than the previous results by
+more than --tolerance (and --min-delta-ms) are reported and the script exits non-zero.
+
+Usage:
+    python -m benchmarks.bench_end_to_end --output results.json
+    python -m benchmarks.bench_end_to_end --coins 1000 --subscribers 10 1000 --compare results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.fake_twilio import FakeNotification
+from benchmarks.stub_cmc import StubCoinMarketCap
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+
+CaseKey = Tuple[int, int, int, str]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+def run_case(cmc: StubCoinMarketCap, num_coins: int, num_subscribers: int, num_timeframes: int,
+             args: argparse.Namespace) -> List[Dict]:
+    """
+    Runs one matrix cell cold then warm, args.repeat times each, and returns a result per run kind.
+    """
+    from notifications.preference_cache import PreferenceCache
+    from notifications.sms_dispatcher import SmsDispatcher
+    from processors.fetch_data import FetchData
+    from processors.process_data import ProcessData
+    from processors.tracking_jobs import TrackingJob
+    from utils.metrics import metrics
+
+    volume_times = VOLUME_TIMES[:num_timeframes]
+    listing = generate_listing(num_coins)
+    baselines = {vt: generate_baseline(listing, seed=i, spike_ratio=args.spike_ratio) for i, vt in enumerate(volume_times)}
+    preferences = {phone: {"preferences": prefs}
+                   for phone, prefs in generate_subscribers(num_subscribers, volume_times=volume_times)}
+
+    # Sweeps are 15 minutes apart, past the listing cache TTL, so every run fetches
+    fetch_data = FetchData(parallelism=args.parallelism, listing_cache_ttl=0)
+    fetch_data.base_url = cmc.base_url
+
+    samples: Dict[str, List[Dict]] = {"cold": [], "warm": []}
+    for _ in range(args.repeat):
+        client = FakeFirestore(latency_ms=args.firestore_latency_ms)
+        client.seed("volume_by_timeline", baselines)
+        client.seed("notification_preferences", preferences)
+        notification = FakeNotification(latency_ms=args.twilio_latency_ms, failure_rate=args.twilio_failure_rate)
+        dispatcher = SmsDispatcher(notification, max_workers=args.sms_workers, rate_per_second=0, backoff_seconds=0.01)
+        process = ProcessData(notification, PreferenceCache(client), dispatcher, client)
+
+        for kind in ("cold", "warm"):
+            client.ops.clear()
+            sent_before = len(notification.sent)
+            matches_before = metrics.value("matches_total")
+            job = TrackingJob("benchmark", num_coins)
+            start = time.perf_counter()
+            job.enter_stage("fetch")
+            frame = fetch_data.fetch_snapshot(num_coins)
+            process.process_volume_change(frame, progress=job.enter_stage)
+            job.enter_stage("done")
+            samples[kind].append({
+                "total_ms": (time.perf_counter() - start) * 1000,
+                "stages_ms": {stage: seconds * 1000 for stage, seconds in job.stages.items()},
+                "firestore_ops": dict(client.ops),
+                "matches": metrics.value("matches_total") - matches_before,
+                "sms_sent": len(notification.sent) - sent_before,
+                "skip_ratio": metrics.value("coin_skip_ratio_last_run"),
+            })
+
+    results = []
+    for kind, runs in samples.items():
+        stages = runs[0]["stages_ms"].keys()
+        results.append({
+            "coins": num_coins,
+            "subscribers": num_subscribers,
+            "timeframes": num_timeframes,
+            "run": kind,
+            "total_ms": round(statistics.median(run["total_ms"] for run in runs), 1),
+            "stages_ms": {stage: round(statistics.median(run["stages_ms"][stage] for run in runs), 1) for stage in stages},
+            # Counts are identical across repeats since every input is seeded
+            "firestore_ops": runs[0]["firestore_ops"],
+            "matches": runs[0]["matches"],
+            "sms_sent": runs[0]["sms_sent"],
+            "skip_ratio": round(runs[0]["skip_ratio"], 4),
+        })
+    return results
+
+def compare(results: List[Dict], previous_path: str, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Returns a description of every case that regressed against a previous results file.
+    """
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+
+    def key(case: Dict) -> CaseKey:
+        return case["coins"], case["subscribers"], case["timeframes"], case["run"]
+
+    previous_cases = {key(case): case for case in previous["cases"]}
+    regressions = []
+    for case in results:
+        before = previous_cases.get(key(case))
+        if before is None:
+            continue
+        delta = case["total_ms"] - before["total_ms"]
+        if delta > min_delta_ms and case["total_ms"] > before["total_ms"] * (1 + tolerance):
+            regressions.append(f"{key(case)}: {before['total_ms']:.1f} ms -> {case['total_ms']:.1f} ms (+{delta:.1f} ms)")
+        if case["firestore_ops"] != before["firestore_ops"]:
+            regressions.append(f"{key(case)}: Firestore ops changed {before['firestore_ops']} -> {case['firestore_ops']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--timeframes", type=int, nargs="+", default=[1, len(VOLUME_TIMES)],
+                        help=f"number of volume_time buckets in use, up to {len(VOLUME_TIMES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--spike-ratio", type=float, default=0.001, help="share of coins whose volume spiked")
+    parser.add_argument("--parallelism", type=int, default=4, help="FetchData pages in flight")
+    parser.add_argument("--sms-workers", type=int, default=8)
+    parser.add_argument("--firestore-latency-ms", type=float, default=0.0)
+    parser.add_argument("--twilio-latency-ms", type=float, default=0.0)
+    parser.add_argument("--twilio-failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="bench_end_to_end.json")
+    parser.add_argument("--compare", help="previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown per case")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    from processors.process_data import ProcessData
+    from utils.metrics import metrics
+    metrics.enabled = True
+    # Deterministic regardless of the wall clock
+    ProcessData.in_reset_window = staticmethod(lambda utc_now: False)
+
+    results = []
+    print(f"{'coins':>6} {'subs':>6} {'tf':>3} {'run':>5} {'total ms':>9} {'fetch':>8} {'match':>8} {'dedupe':>8} {'sms':>8} {'matches':>8} {'sent':>6} {'skip':>6}")
+    with StubCoinMarketCap(num_coins=max(args.coins)) as cmc:
+        for num_coins in args.coins:
+            for num_subscribers in args.subscribers:
+                for num_timeframes in args.timeframes:
+                    for case in run_case(cmc, num_coins, num_subscribers, num_timeframes, args):
+                        results.append(case)
+                        stages = case["stages_ms"]
+                        print(f"{case['coins']:>6} {case['subscribers']:>6} {case['timeframes']:>3} {case['run']:>5} "
+                              f"{case['total_ms']:>9.1f} {stages.get('fetch', 0):>8.1f} {stages.get('match', 0):>8.1f} "
+                              f"{stages.get('dedupe', 0):>8.1f} {stages.get('send_sms', 0):>8.1f} "
+                              f"{case['matches']:>8} {case['sms_sent']:>6} {case['skip_ratio']:>6.3f}", flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "args": {name: value for name, value in vars(args).items() if name not in ("output", "compare")},
+        },
+        "cases": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Times FetchData.fetch_top_cryptos against a local CoinMarketCap stub.
+
+Compares the old serial fetch with bare requests.get against the pooled session at
+several parallelism caps.
+
+Usage:
+    python -m benchmarks.bench_fetch_data --coins 5000 --latency 0.25 --parallelism 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+import requests
+
+from benchmarks.stub_cmc import StubCoinMarketCap
+
+def serial_bare_fetch(base_url: str, limit: int):
+    """
+    The original fetch loop: one new connection per page, one page at a time.
+    """
+    all_data = []
+    start = 1
+    while start <= limit:
+        params = {"start": start, "limit": min(1000, limit - len(all_data)), "convert": "USD"}
+        response = requests.get(f"{base_url}/cryptocurrency/listings/latest", params=params)
+        response.raise_for_status()
+        data = response.json()
+        all_data.extend(data["data"])
+        start += 1000
+        if len(data["data"]) < 1000:
+            break
+    return all_data
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=5000, help="coins available on the stub")
+    parser.add_argument("--limit", type=int, default=None, help="limit passed to fetch_top_cryptos (default: --coins)")
+    parser.add_argument("--latency", type=float, default=0.25, help="stub latency per page, seconds")
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    limit = args.limit or args.coins
+
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    from processors.fetch_data import FetchData
+
+    with StubCoinMarketCap(num_coins=args.coins, latency=args.latency) as stub:
+        expected, baseline = timed(serial_bare_fetch, stub.base_url, limit)
+        print(f"{'mode':>22} {'coins':>7} {'requests':>9} {'seconds':>8} {'speedup':>8}")
+        print(f"{'serial requests.get':>22} {len(expected):>7} {stub.requests:>9} {baseline:>8.3f} {'1.0x':>8}")
+
+        for parallelism in args.parallelism:
+            fetch_data = FetchData(parallelism=parallelism)
+            fetch_data.base_url = stub.base_url
+            stub.requests = 0
+            coins, elapsed = timed(fetch_data.fetch_top_cryptos, limit)
+            if [coin["id"] for coin in coins] != [coin["id"] for coin in expected]:
+                raise SystemExit(f"Pages out of order or missing at parallelism={parallelism}")
+            label = f"pooled x{parallelism}"
+            print(f"{label:>22} {len(coins):>7} {stub.requests:>9} {elapsed:>8.3f} {baseline / elapsed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
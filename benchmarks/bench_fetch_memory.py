@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Measures peak memory of fetching and framing a listing, buffered vs streamed.
+
+The stub server runs in its own process and every mode runs in a fresh child process,
+so peak RSS and the tracemalloc peak only cover the fetch path.
+
+Usage:
+    python -m benchmarks.bench_fetch_memory --coins 5000 10000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+MODES = ["buffered", "streamed"]
+
+def run_mode(mode: str, base_url: str, limit: int) -> dict:
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    from processors.coin_frame import CoinFrame
+    from processors.fetch_data import FetchData
+
+    fetch_data = FetchData()
+    fetch_data.base_url = base_url
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "buffered":
+        listing = fetch_data.fetch_top_cryptos(limit)
+        frame = CoinFrame.from_listing(listing)
+    else:
+        frame = CoinFrame.from_records(fetch_data.stream_top_cryptos(limit))
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "coins": len(frame),
+        "seconds": elapsed,
+        "traced_peak_mb": traced_peak / 2 ** 20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, nargs="+", default=[5000, 10000])
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.base_url, args.coins[0])))
+        return
+
+    print(f"{'coins':>7} {'mode':>9} {'seconds':>8} {'traced peak MB':>15} {'max RSS MB':>11}")
+    for count in args.coins:
+        stub = subprocess.Popen([sys.executable, "-m", "benchmarks.stub_cmc", "--coins", str(count)],
+                                stdout=subprocess.PIPE, text=True)
+        try:
+            base_url = stub.stdout.readline().strip()
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_fetch_memory", "--child", mode,
+                     "--base-url", base_url, "--coins", str(count)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{result['coins']:>7} {mode:>9} {result['seconds']:>8.3f} "
+                      f"{result['traced_peak_mb']:>15.1f} {result['max_rss_mb']:>11.1f}")
+        finally:
+            stub.terminate()
+            stub.wait()
+
+if __name__ == "__main__":
+    main()
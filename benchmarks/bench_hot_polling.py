@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Time-to-alert and CoinMarketCap credits with and without hot set polling.
+
+Simulates a market minute by minute on the local CoinMarketCap stub: every coin's
+volume drifts by a few percent around its 24hr baseline, and --movers coins start
+ramping up at a random minute. A full sweep (FetchData.fetch_snapshot + ProcessData)
+runs every 15 minutes as the external scheduler would trigger it; with hot polling,
+HotPollScheduler.tick() runs on the other minutes against a simulated clock.
+
+For each mover, time-to-alert is the number of minutes between the first minute its
+change exceeded the lowest threshold and the run that sent its first SMS. Credits are
+counted by FetchData as CoinMarketCap bills them.
+
+Usage:
+    python -m benchmarks.bench_hot_polling --coins 2000 --movers 40 --hours 4 --budget 3600
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import statistics
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.fake_twilio import FakeNotification
+from benchmarks.stub_cmc import StubCoinMarketCap
+from benchmarks.synthetic import generate_subscribers
+
+SWEEP_MINUTES = 15
+VOLUME_TIME = "24hr"
+COIN_NAME = re.compile(r"Coin (\d+) \(")
+
+def simulate_market(listing, args):
+    """
+    Returns each coin's (volume, price) per minute, and the movers' start minutes.
+    """
+    rng = random.Random(args.seed)
+    minutes = args.hours * 60
+    eligible = [coin["id"] for coin in listing
+                if coin["quote"]["USD"]["market_cap"] >= 10000000 and coin["quote"]["USD"]["volume_24h"] >= 300000]
+    movers = {coin_id: rng.randrange(1, minutes - SWEEP_MINUTES) for coin_id in rng.sample(eligible, args.movers)}
+    ramps = {coin_id: rng.uniform(0.01, 0.04) for coin_id in movers}
+
+    paths = {}
+    for coin in listing:
+        usd = coin["quote"]["USD"]
+        coin_id = coin["id"]
+        path = []
+        noise = 0.0
+        for minute in range(minutes + 1):
+            noise = max(-args.noise, min(args.noise, noise + rng.gauss(0, args.noise / 4)))
+            growth = noise
+            price = usd["price"] * (1 + rng.uniform(-0.01, 0.01))
+            start = movers.get(coin_id)
+            if start is not None and minute >= start:
+                growth += ramps[coin_id] * (minute - start + 1)
+                price = usd["price"] * 1.02
+            path.append((usd["volume_24h"] * (1 + growth), price))
+        paths[coin_id] = path
+    return paths, movers
+
+def run(args, hot_polling: bool):
+    from notifications.preference_cache import PreferenceCache
+    from notifications.sms_dispatcher import SmsDispatcher
+    from processors.fetch_data import FetchData
+    from processors.hot_polling import CreditBudget, HotPollScheduler, HotSet
+    from processors.process_data import ProcessData
+
+    with StubCoinMarketCap(num_coins=args.coins) as stub:
+        baseline = {str(coin["id"]): {"initial_24hr_volume": coin["quote"]["USD"]["volume_24h"],
+                                      "price": coin["quote"]["USD"]["price"]} for coin in stub.listing}
+        paths, movers = simulate_market(stub.listing, args)
+        subscribers = generate_subscribers(args.subscribers, volume_times=[VOLUME_TIME])
+        lowest = min(pref["volume_percentage"] for _, prefs in subscribers for pref in prefs) / 100
+
+        client = FakeFirestore()
+        client.seed("volume_by_timeline", {VOLUME_TIME: baseline})
+        client.seed("notification_preferences", {phone: {"preferences": prefs} for phone, prefs in subscribers})
+        notification = FakeNotification()
+        dispatcher = SmsDispatcher(notification, max_workers=4, rate_per_second=0, backoff_seconds=0.01)
+        process = ProcessData(notification, PreferenceCache(client), dispatcher, client, use_volume_history=False,
+                              hot_set=HotSet(args.near_ratio, args.max_hot) if hot_polling else None)
+        # Simulated minutes pass faster than the listing cache TTL
+        fetch_data = FetchData(listing_cache_ttl=0)
+        fetch_data.base_url = stub.base_url
+
+        now = [0.0]
+        scheduler = HotPollScheduler(fetch_data, process, CreditBudget(args.budget, clock=lambda: now[0]))
+        crossed, alerted, polls = {}, {}, 0
+        for minute in range(args.hours * 60 + 1):
+            now[0] = minute * 60.0
+            for coin in stub.listing:
+                volume, price = paths[coin["id"]][minute]
+                coin["quote"]["USD"]["volume_24h"], coin["quote"]["USD"]["price"] = volume, price
+                if coin["id"] in movers and coin["id"] not in crossed and volume / baseline[str(coin["id"])]["initial_24hr_volume"] - 1 > lowest:
+                    crossed[coin["id"]] = minute
+
+            sent = len(notification.sent)
+            if minute % SWEEP_MINUTES == 0:
+                with process.run_lock:
+                    process.process_volume_change(fetch_data.fetch_snapshot(args.coins))
+            elif hot_polling:
+                polls += scheduler.tick() == "polled"
+            for _, message in notification.sent[sent:]:
+                for coin_id in COIN_NAME.findall(message):
+                    alerted.setdefault(int(coin_id), minute)
+
+    delays = sorted(alerted[coin_id] - minute for coin_id, minute in crossed.items() if coin_id in alerted)
+    return {
+        "alerted": f"{len(delays)}/{len(crossed)}",
+        "p50": statistics.median(delays) if delays else float("nan"),
+        "p90": delays[int(len(delays) * 0.9) - 1] if delays else float("nan"),
+        "max": delays[-1] if delays else float("nan"),
+        "credits": fetch_data.credits_used,
+        "polls": polls,
+        "sms": len(notification.sent),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=2000)
+    parser.add_argument("--movers", type=int, default=40)
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=0.08, help="max drift of volumes that aren't ramping")
+    parser.add_argument("--budget", type=float, default=3600, help="CoinMarketCap credits per day")
+    parser.add_argument("--near-ratio", type=float, default=0.5)
+    parser.add_argument("--max-hot", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    from processors.process_data import ProcessData
+    # Deterministic regardless of the wall clock
+    ProcessData.in_reset_window = staticmethod(lambda utc_now: False)
+
+    minutes = args.hours * 60
+    print(f"{'mode':>8} {'alerted':>8} {'p50 min':>8} {'p90 min':>8} {'max min':>8} {'credits':>8} "
+          f"{'credits/day':>12} {'polls':>6} {'sms':>6}")
+    for hot_polling in (False, True):
+        result = run(args, hot_polling)
+        print(f"{'hot' if hot_polling else 'sweeps':>8} {result['alerted']:>8} {result['p50']:>8.1f} {result['p90']:>8.1f} "
+              f"{result['max']:>8.1f} {result['credits']:>8} {result['credits'] * 1440 / minutes:>12.0f} "
+              f"{result['polls']:>6} {result['sms']:>6}", flush=True)
+
+if __name__ == "__main__":
+    main()
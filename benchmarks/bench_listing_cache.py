@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Listing cache hits, coalescing and credits saved for typical /track_volume patterns.
+
+Runs FetchData.fetch_snapshot against the local CoinMarketCap stub for: a cold run,
+an immediate retry, a smaller limit after a larger one, a larger limit, and several
+overlapping triggers at once on a cold cache. Each scenario reports the requests the
+stub served, the credits spent and saved, and checks the listing matches an uncached
+fetch. A last run after the TTL shows pages are fetched again.
+
+Usage:
+    python -m benchmarks.bench_listing_cache --coins 6000 --latency 0.2 --concurrent 4
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.stub_cmc import StubCoinMarketCap
+
+def same_listing(frame, expected) -> bool:
+    return np.array_equal(frame.ids, expected.ids) and np.array_equal(frame.volume, expected.volume)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stub request")
+    parser.add_argument("--concurrent", type=int, default=4, help="overlapping triggers in the coalescing scenario")
+    parser.add_argument("--ttl", type=float, default=2.0, help="cache TTL, short so expiry can be shown")
+    args = parser.parse_args()
+
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    from processors.fetch_data import FetchData
+
+    with StubCoinMarketCap(num_coins=args.coins, latency=args.latency) as stub:
+        uncached = FetchData(listing_cache_ttl=0)
+        uncached.base_url = stub.base_url
+        expected = {limit: uncached.fetch_snapshot(limit) for limit in (2000, 5000, 5500)}
+
+        def scenario(name, fetch_data, limits):
+            requests, spent, saved = stub.requests, fetch_data.credits_used, fetch_data.credits_saved
+            results = [None] * len(limits)
+
+            def fetch(i, limit):
+                results[i] = fetch_data.fetch_snapshot(limit)
+
+            start = time.perf_counter()
+            threads = [threading.Thread(target=fetch, args=(i, limit)) for i, limit in enumerate(limits)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - start
+            ok = all(same_listing(result, expected[limit]) for result, limit in zip(results, limits))
+            print(f"{name:>24} {seconds:>8.2f} {stub.requests - requests:>9} {fetch_data.credits_used - spent:>8} "
+                  f"{fetch_data.credits_saved - saved:>6} {'yes' if ok else 'NO':>6}", flush=True)
+            if not ok:
+                raise SystemExit(f"Cached listing differs from the uncached one: {name}")
+
+        print(f"{'scenario':>24} {'seconds':>8} {'requests':>9} {'credits':>8} {'saved':>6} {'same':>6}")
+        fetch_data = FetchData(listing_cache_ttl=args.ttl)
+        fetch_data.base_url = stub.base_url
+        scenario("cold limit=5000", fetch_data, [5000])
+        scenario("retry limit=5000", fetch_data, [5000])
+        scenario("limit=2000 after 5000", fetch_data, [2000])
+        scenario("limit=5500 after 5000", fetch_data, [5500])
+        time.sleep(args.ttl)
+        scenario("after TTL limit=5000", fetch_data, [5000])
+
+        fetch_data = FetchData(listing_cache_ttl=args.ttl)
+        fetch_data.base_url = stub.base_url
+        scenario(f"{args.concurrent} overlapping cold", fetch_data, [5000] * args.concurrent)
+        print(f"cache stats: {fetch_data.cache_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Measures how much of a process_volume_change run is spent logging.
+
+Compares three configurations on the same synthetic run (in-memory Firestore, no-op SMS):
+  sync-verbose  synchronous console+file handlers and every hot-path line logged, as before
+  async-sampled queue handler + listener thread, hot-path lines sampled into run counters
+  disabled      logging off, the floor both are compared against
+
+Console output goes to a temp file so the terminal doesn't skew the numbers.
+
+Usage:
+    python -m benchmarks.bench_logging --limit 5000 --phones 500
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+from notifications.preference_cache import PreferenceCache
+from notifications.sms_dispatcher import SmsDispatcher
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.process_data import ProcessData
+from utils.custom_logger import LOG_FORMAT
+
+class NullNotification:
+    def send_sms(self, message, phone):
+        return "SM0"
+
+def configure(mode: str, directory: str):
+    """
+    Replaces the root handlers for one mode and returns a function that drains them.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.NOTSET)
+
+    if mode == "disabled":
+        root.setLevel(logging.CRITICAL + 1)
+        return lambda: None
+
+    console = open(os.path.join(directory, f"{mode}.console"), "a", encoding="utf-8")
+    handlers = [logging.StreamHandler(console), logging.FileHandler(os.path.join(directory, f"{mode}.log"), encoding="utf-8")]
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if mode == "sync-verbose":
+        # Before: per-phone and per-coin lines all written inline
+        os.environ["LOG_SAMPLE_SIZE"] = str(10 ** 9)
+        root.setLevel(logging.DEBUG)
+        for handler in handlers:
+            root.addHandler(handler)
+        return lambda: None
+
+    os.environ.pop("LOG_SAMPLE_SIZE", None)
+    root.setLevel(logging.INFO)
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    return listener.stop
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--phones", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    listing = generate_listing(args.limit)
+    frame = CoinFrame.from_listing(listing)
+    baselines = {vt: BaselineSnapshot.from_document(generate_baseline(listing, seed=i)).to_document()
+                 for i, vt in enumerate(VOLUME_TIMES)}
+    subscribers = dict(generate_subscribers(args.phones))
+    # Deterministic regardless of the wall clock
+    ProcessData.in_reset_window = staticmethod(lambda utc_now: False)
+
+    def run_once() -> float:
+        client = FakeFirestore()
+        client.seed("volume_by_timeline", baselines)
+        client.seed("notification_preferences", {phone: {"preferences": prefs} for phone, prefs in subscribers.items()})
+        process = ProcessData(NullNotification(), PreferenceCache(client), SmsDispatcher(NullNotification(), rate_per_second=0), client)
+        process.preference_cache.refresh()
+        start = time.perf_counter()
+        process.process_volume_change(frame)
+        return time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for mode in ("disabled", "sync-verbose", "async-sampled"):
+            drain = configure(mode, directory)
+            run_once() # warm up
+            samples = [run_once() for _ in range(args.runs)]
+            drain_start = time.perf_counter()
+            drain()
+            results[mode] = (statistics.median(samples), time.perf_counter() - drain_start)
+
+        configure("disabled", directory)
+        floor = results["disabled"][0]
+        print(f"limit={args.limit} phones={args.phones} runs={args.runs}")
+        print(f"{'mode':>14} {'run ms':>9} {'logging ms':>11} {'drain ms':>9}")
+        for mode, (median, drain_seconds) in results.items():
+            print(f"{mode:>14} {median * 1000:>9.1f} {(median - floor) * 1000:>11.1f} {drain_seconds * 1000:>9.1f}")
+
+if __name__ == "__main__":
+    main()
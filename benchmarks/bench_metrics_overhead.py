@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Measures the cost of the metrics instrumentation, enabled and disabled.
+
+Reports the per-call overhead of the instrumentation primitives and the median of a
+process_volume_change run (in-memory Firestore, no-op SMS) with metrics on and off.
+
+Usage:
+    python -m benchmarks.bench_metrics_overhead --limit 5000 --phones 500
+"""
+import argparse
+import logging
+import statistics
+import time
+import timeit
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+from notifications.preference_cache import PreferenceCache
+from notifications.sms_dispatcher import SmsDispatcher
+from processors.coin_frame import CoinFrame
+from processors.process_data import ProcessData
+from utils.metrics import metrics
+
+class NullNotification:
+    def send_sms(self, message, phone):
+        return "SM0"
+
+def per_call_ns(statement: str, number: int = 200000) -> float:
+    return timeit.timeit(statement, globals={"metrics": metrics}, number=number) / number * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--phones", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.ERROR)
+    listing = generate_listing(args.limit)
+    frame = CoinFrame.from_listing(listing)
+    baselines = {vt: generate_baseline(listing, seed=i) for i, vt in enumerate(VOLUME_TIMES)}
+    preferences = {phone: {"preferences": prefs} for phone, prefs in generate_subscribers(args.phones)}
+    ProcessData.in_reset_window = staticmethod(lambda utc_now: False)
+
+    def run_once() -> float:
+        client = FakeFirestore()
+        client.seed("volume_by_timeline", baselines)
+        client.seed("notification_preferences", preferences)
+        process = ProcessData(NullNotification(), PreferenceCache(client), SmsDispatcher(NullNotification(), rate_per_second=0), client)
+        process.preference_cache.refresh()
+        start = time.perf_counter()
+        process.process_volume_change(frame)
+        return time.perf_counter() - start
+
+    print(f"{'metrics':>9} {'inc ns':>8} {'call ns':>8} {'run ms':>9}")
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        inc_ns = per_call_ns("metrics.inc('matches_total')")
+        call_ns = per_call_ns("with metrics.external_call('firestore', 'bench'): pass")
+        run_once() # warm up
+        run_ms = statistics.median(run_once() for _ in range(args.runs)) * 1000
+        print(f"{'on' if enabled else 'off':>9} {inc_ns:>8.0f} {call_ns:>8.0f} {run_ms:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Scaling of the match stage across worker processes.
+
+Runs ThresholdMatcher.match serially and ParallelMatcher.match with 1/2/4/8 workers
+(each sharded by subscribers and by coins) on the same synthetic listing, checks that
+every run produces the serial matches, and reports the median time and speedup.
+Speedups beyond os.cpu_count() workers can't be expected.
+
+Usage:
+    python -m benchmarks.bench_parallel_matcher --coins 5000 --subscribers 50000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.parallel_matcher import SHARD_BY, ParallelMatcher
+from processors.threshold_matcher import ThresholdMatcher
+
+MARKET_CAP_MIN_USD = 10000000
+TWENTYFOURHR_VOLUME_MIN_USD = 300000
+
+def median_time(func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=5000)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--spike-ratio", type=float, default=0.01, help="share of coins whose volume spiked")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    listing = generate_listing(args.coins)
+    frame = CoinFrame.from_listing(listing)
+    baselines = {
+        volume_time: BaselineSnapshot.from_document(generate_baseline(listing, seed=i, spike_ratio=args.spike_ratio))
+        for i, volume_time in enumerate(VOLUME_TIMES)
+    }
+
+    print(f"cpu_count={os.cpu_count()}")
+    print(f"{'subscribers':>12} {'matches':>10} {'mode':>12} {'workers':>8} {'seconds':>9} {'speedup':>8}")
+    for count in args.subscribers:
+        matcher = ThresholdMatcher(MARKET_CAP_MIN_USD, TWENTYFOURHR_VOLUME_MIN_USD)
+        for phone, preferences in generate_subscribers(count):
+            matcher.add_phone(phone)
+            for pref_index, pref in enumerate(preferences):
+                matcher.add_subscriber(phone, pref_index, pref['volume_time'], pref['volume_percentage'] / 100)
+        changes_by_time = {
+            volume_time: matcher.compute_changes(frame, baselines[volume_time]) for volume_time in matcher.volume_times()
+        }
+
+        serial, serial_time = median_time(lambda: matcher.match(changes_by_time), args.repeat)
+        match_count = sum(len(phone_matches) for phone_matches in serial.values())
+        print(f"{count:>12} {match_count:>10} {'serial':>12} {'-':>8} {serial_time:>9.3f} {'1.0x':>8}", flush=True)
+
+        for shard_by in SHARD_BY:
+            for workers in args.workers:
+                parallel = ParallelMatcher(workers, shard_by=shard_by, min_subscriptions=0)
+                try:
+                    # The first call starts the pool
+                    parallel.match(matcher, changes_by_time)
+                    result, seconds = median_time(lambda: parallel.match(matcher, changes_by_time), args.repeat)
+                finally:
+                    parallel.close()
+                if dict(result) != dict(serial):
+                    raise SystemExit(f"Mismatch with the serial matcher: {shard_by}, {workers} workers, {count} subscribers")
+                print(f"{count:>12} {match_count:>10} {shard_by:>12} {workers:>8} {seconds:>9.3f} "
+                      f"{serial_time / seconds:>7.1f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
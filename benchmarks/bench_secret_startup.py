@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measures startup secret loading: the old per-secret fetch (new SecretManagerServiceClient and
+bucket download for each of the four secrets) versus the single cached fetch, and prints the
+create_app startup breakdown.
+
+Secret Manager is replaced by a stub client with configurable construction and access latency,
+and Firestore by the local gRPC stub, so everything runs offline.
+
+Usage:
+    python -m benchmarks.bench_secret_startup --client-ms 150 --access-ms 80
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from types import SimpleNamespace
+
+from benchmarks.stub_firestore_grpc import StubFirestoreServer
+
+SECRETS = ['COINMARKET_API_KEY', 'TWILIO_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE']
+
+class StubSecretClient:
+    """
+    Stands in for SecretManagerServiceClient, sleeping to mimic auth/channel setup and RPCs.
+    """
+    constructed = 0
+    accessed = 0
+
+    def __init__(self, client_ms: float, access_ms: float, payload: dict):
+        StubSecretClient.constructed += 1
+        self.access_ms = access_ms
+        self.payload = json.dumps(payload).encode("UTF-8")
+        time.sleep(client_ms / 1000)
+
+    def access_secret_version(self, request):
+        StubSecretClient.accessed += 1
+        time.sleep(self.access_ms / 1000)
+        return SimpleNamespace(payload=SimpleNamespace(data=self.payload))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--client-ms", type=float, default=150)
+    parser.add_argument("--access-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    os.environ["ENVIRONMENT"] = "CLOUD"
+    os.environ["SECRET_REFRESH"] = "false"
+    os.environ["FIRESTORE_WARMUP"] = "false"
+    payload = {name: f"stub-{name.lower()}" for name in SECRETS}
+    payload["TWILIO_SID"] = "AC" + "0" * 32
+
+    def factory():
+        return StubSecretClient(args.client_ms, args.access_ms, payload)
+
+    def clear_env():
+        for name in SECRETS:
+            os.environ.pop(name, None)
+
+    from utils.secret_handler import SecretHandler
+
+    # Old behaviour: every set_secret() built a client and downloaded the bucket
+    clear_env()
+    start = time.perf_counter()
+    for name in SECRETS:
+        SecretHandler(client_factory=factory).set_secret(name)
+    per_secret_ms = (time.perf_counter() - start) * 1000
+    per_secret_calls = (StubSecretClient.constructed, StubSecretClient.accessed)
+
+    StubSecretClient.constructed = StubSecretClient.accessed = 0
+    clear_env()
+    handler = SecretHandler(client_factory=factory)
+    start = time.perf_counter()
+    for name in SECRETS:
+        handler.set_secret(name)
+    cached_ms = (time.perf_counter() - start) * 1000
+    cached_calls = (StubSecretClient.constructed, StubSecretClient.accessed)
+
+    print(f"{'mode':>12} {'ms':>8} {'clients':>8} {'fetches':>8}")
+    print(f"{'per-secret':>12} {per_secret_ms:>8.1f} {per_secret_calls[0]:>8} {per_secret_calls[1]:>8}")
+    print(f"{'cached':>12} {cached_ms:>8.1f} {cached_calls[0]:>8} {cached_calls[1]:>8}")
+
+    with StubFirestoreServer() as stub:
+        os.environ["FIRESTORE_EMULATOR_HOST"] = stub.host
+        from crypto_volume_tracker import create_app
+        import crypto_volume_tracker
+
+        clear_env()
+        create_app(secret_handler=SecretHandler(client_factory=factory))
+        print("create_app breakdown (ms):")
+        for stage, ms in crypto_volume_tracker.services['startup_timings'].items():
+            print(f"  {stage:>16} {ms:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Measures SMS throughput of serial send_bulk_sms calls against the SmsDispatcher.
+
+Runs against a local fake Twilio endpoint with per-request latency and a share of
+429s that the dispatcher retries.
+
+Usage:
+    python -m benchmarks.bench_sms_dispatcher --recipients 1000 --workers 4 16 32
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.stub_twilio import StubTwilio
+from notifications.notification_service import Notification
+from notifications.sms_dispatcher import SmsDispatcher
+
+MESSAGE = "🚀 Positive Volume Changes Detected 🚀:\n\n🚀 Coin 1 (C1): 42.0% increase over 1hr. Curr Price: 1.0"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Twilio latency, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 32])
+    parser.add_argument("--rate", type=float, default=0, help="dispatcher rate limit per second (0 = unlimited)")
+    parser.add_argument("--serial-max", type=int, default=100, help="recipients sent in the serial baseline")
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.ERROR)
+    phones = [f"+1555{i:07d}" for i in range(args.recipients)]
+
+    with StubTwilio(latency=args.latency, failure_rate=args.failure_rate) as stub:
+        print(f"{'mode':>14} {'sent':>6} {'failed':>7} {'retries':>8} {'msg/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+        notification = Notification("ACbenchmark", "token", "+15550000000", pool_size=max(args.workers))
+        stub.attach(notification.twilio_client)
+
+        serial_phones = phones[:args.serial_max]
+        start = time.perf_counter()
+        for phone in serial_phones:
+            notification.send_bulk_sms(MESSAGE, phone)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial':>14} {len(serial_phones):>6} {'-':>7} {'-':>8} {len(serial_phones) / elapsed:>8.1f} {'-':>8} {'-':>8}")
+
+        for workers in args.workers:
+            dispatcher = SmsDispatcher(notification, max_workers=workers, rate_per_second=args.rate, backoff_seconds=0.05)
+            start = time.perf_counter()
+            futures = [dispatcher.submit(MESSAGE, phone) for phone in phones]
+            report = dispatcher.wait(futures)
+            elapsed = time.perf_counter() - start
+            label = f"dispatcher x{workers}"
+            print(f"{label:>14} {report['sent']:>6} {report['failed']:>7} {report['retries']:>8} "
+                  f"{report['sent'] / elapsed:>8.1f} {report['latency_ms_p50']:>8} {report['latency_ms_p95']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Measures memory and live allocations per coin for each listing/baseline representation.
+
+Usage:
+    python -m benchmarks.bench_snapshot_memory --coins 5000 10000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from benchmarks.stub_cmc import full_coin
+from benchmarks.synthetic import generate_baseline, generate_listing
+from processors.coin_frame import BaselineSnapshot, CoinFrame, CoinFrameBuilder
+from processors.fetch_data import CoinRecord
+
+def measure(build):
+    """
+    Returns (object, bytes, live blocks, peak bytes) allocated by build().
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return result, sum(stat.size_diff for stat in diff), sum(stat.count_diff for stat in diff), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, nargs="+", default=[5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'coins':>7} {'representation':>26} {'bytes/coin':>11} {'blocks/coin':>12} {'peak MB':>8}")
+    for count in args.coins:
+        body = json.dumps({"data": [full_coin(coin) for coin in generate_listing(count)]})
+        baseline_document = generate_baseline(generate_listing(count))
+        columnar_document = json.dumps(BaselineSnapshot.from_document(baseline_document).to_document())
+        legacy_document = json.dumps(baseline_document)
+
+        def build_frame():
+            builder = CoinFrameBuilder()
+            for coin in json.loads(body)["data"]:
+                builder.append_entry(coin)
+            return builder.build()
+
+        cases = [
+            ("listing dicts", lambda: json.loads(body)["data"]),
+            ("CoinRecord list", lambda: [CoinRecord.from_listing_entry(coin) for coin in json.loads(body)["data"]]),
+            ("CoinFrame", build_frame),
+            ("baseline nested dict", lambda: json.loads(legacy_document)),
+            ("BaselineSnapshot", lambda: BaselineSnapshot.from_document(json.loads(columnar_document))),
+        ]
+        for label, build in cases:
+            result, size, blocks, peak = measure(build)
+            print(f"{count:>7} {label:>26} {size / count:>11.1f} {blocks / count:>12.2f} {peak / 2 ** 20:>8.1f}")
+            del result
+
+if __name__ == "__main__":
+    main()
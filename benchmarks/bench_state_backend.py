@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Compares the Firestore-only state backend with the Redis one on full tracking runs.
+
+Both run ProcessData.process_volume_change against the in-memory Firestore fake with
+simulated latency; the Redis backend adds the in-memory Redis fake (or a real server
+with --redis-url) with its own latency. Each backend runs cold then warm. Reported are
+the wall time of the stages touching state and the round trips per store.
+
+A second check runs several ProcessData instances concurrently against the same
+stores and verifies no (phone, coin) pair was granted more than the daily cap.
+
+Usage:
+    python -m benchmarks.bench_state_backend --coins 5000 --subscribers 1000
+    python -m benchmarks.bench_state_backend --redis-url redis://localhost:6379/15
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.fake_redis import FakeRedis
+from benchmarks.fake_twilio import FakeNotification
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+
+def make_redis(args):
+    if not args.redis_url:
+        return FakeRedis(latency_ms=args.redis_latency_ms)
+    import redis
+    client = redis.Redis.from_url(args.redis_url)
+    # Only the backend's own keys are removed
+    for pattern in ("baseline:*", "notification_tracker:*"):
+        for key in client.scan_iter(pattern):
+            client.delete(key)
+    return client
+
+def seeded_firestore(args, listing, volume_times, num_subscribers) -> FakeFirestore:
+    client = FakeFirestore(latency_ms=args.firestore_latency_ms)
+    client.seed("volume_by_timeline", {vt: generate_baseline(listing, seed=i, spike_ratio=args.spike_ratio)
+                                       for i, vt in enumerate(volume_times)})
+    client.seed("notification_preferences", {phone: {"preferences": prefs}
+                                             for phone, prefs in generate_subscribers(num_subscribers, volume_times=volume_times)})
+    return client
+
+def make_process(client, redis_client, notification):
+    from notifications.preference_cache import PreferenceCache
+    from notifications.sms_dispatcher import SmsDispatcher
+    from processors.process_data import ProcessData
+    dispatcher = SmsDispatcher(notification, max_workers=8, rate_per_second=0, backoff_seconds=0.01)
+    return ProcessData(notification, PreferenceCache(client), dispatcher, client,
+                       use_volume_history=False, redis_client=redis_client)
+
+def run_backends(args, listing, frame):
+    from processors.tracking_jobs import TrackingJob
+    volume_times = VOLUME_TIMES[:args.timeframes]
+    print(f"{'backend':>9} {'run':>5} {'total ms':>9} {'changes':>8} {'dedupe':>8} {'firestore ops':>14} {'redis ops':>10}")
+    for backend in ("firestore", "redis"):
+        client = seeded_firestore(args, listing, volume_times, args.subscribers)
+        redis_client = make_redis(args) if backend == "redis" else None
+        process = make_process(client, redis_client, FakeNotification())
+        for kind in ("cold", "warm"):
+            client.ops.clear()
+            if isinstance(redis_client, FakeRedis):
+                redis_client.ops.clear()
+            job = TrackingJob("benchmark", len(frame))
+            start = time.perf_counter()
+            process.process_volume_change(frame, progress=job.enter_stage)
+            job.enter_stage("done")
+            total_ms = (time.perf_counter() - start) * 1000
+            stages = {stage: seconds * 1000 for stage, seconds in job.stages.items()}
+            redis_ops = sum(redis_client.ops.values()) if isinstance(redis_client, FakeRedis) else "-"
+            print(f"{backend:>9} {kind:>5} {total_ms:>9.1f} {stages.get('compute_changes', 0):>8.1f} "
+                  f"{stages.get('dedupe', 0):>8.1f} {sum(client.ops.values()):>14} {redis_ops:>10}", flush=True)
+        if process.write_behind is not None:
+            start = time.perf_counter()
+            written = process.write_behind.flush()
+            print(f"{'':>9} write-behind flushed {written} documents in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+def check_cap(args, listing, frame):
+    """
+    Runs instances concurrently several times and checks the cap against what was granted.
+    """
+    volume_times = VOLUME_TIMES[:args.timeframes]
+    client = seeded_firestore(args, listing, volume_times, args.subscribers)
+    redis_client = make_redis(args)
+    processes = [make_process(client, redis_client, FakeNotification()) for _ in range(args.instances)]
+
+    granted = Counter()
+    granted_lock = threading.Lock()
+    for process in processes:
+        create_ledger = process.custom_filter.create_ledger
+
+        def tracking_ledger(create_ledger=create_ledger):
+            ledger = create_ledger()
+            commit = ledger.commit
+
+            def counted_commit():
+                commit()
+                with granted_lock:
+                    granted.update(ledger.granted)
+            ledger.commit = counted_commit
+            return ledger
+        process.custom_filter.create_ledger = tracking_ledger
+
+    for _ in range(args.rounds):
+        threads = [threading.Thread(target=process.process_volume_change, args=(frame,)) for process in processes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    max_notifications = processes[0].custom_filter.max_notifications
+    over = {key: count for key, count in granted.items() if count > max_notifications}
+    print(f"{args.instances} instances x {args.rounds} rounds: {len(granted)} (phone, coin) pairs, "
+          f"{sum(granted.values())} notifications granted, max per pair {max(granted.values(), default=0)}")
+    if over:
+        raise SystemExit(f"Cap of {max_notifications} exceeded for {len(over)} pairs")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=5000)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--timeframes", type=int, default=len(VOLUME_TIMES))
+    parser.add_argument("--spike-ratio", type=float, default=0.001)
+    parser.add_argument("--firestore-latency-ms", type=float, default=20.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.5)
+    parser.add_argument("--redis-url", help="use a real Redis server instead of the in-memory fake")
+    parser.add_argument("--instances", type=int, default=3, help="concurrent instances in the cap check")
+    parser.add_argument("--rounds", type=int, default=4, help="concurrent runs in the cap check")
+    args = parser.parse_args()
+
+    os.environ.setdefault("COINMARKET_API_KEY", "benchmark")
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    from processors.coin_frame import CoinFrame
+    from processors.process_data import ProcessData
+    # Deterministic regardless of the wall clock
+    ProcessData.in_reset_window = staticmethod(lambda utc_now: False)
+
+    listing = generate_listing(args.coins)
+    frame = CoinFrame.from_listing(listing)
+    run_backends(args, listing, frame)
+    check_cap(args, listing, frame)
+
+if __name__ == "__main__":
+    main()
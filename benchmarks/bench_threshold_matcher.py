@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compares the legacy phones x preferences x coins loop against ThresholdMatcher.
+
+Usage:
+    python -m benchmarks.bench_threshold_matcher --coins 5000 --subscribers 10 100 1000 10000 100000
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.synthetic import VOLUME_TIMES, generate_baseline, generate_listing, generate_subscribers
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.threshold_matcher import ThresholdMatcher
+
+MARKET_CAP_MIN_USD = 10000000
+TWENTYFOURHR_VOLUME_MIN_USD = 300000
+
+def legacy_matches(listing, baselines, subscribers) -> Dict[str, List[Tuple[int, str]]]:
+    """
+    The matching part of the original process_volume_change loop.
+    """
+    matches = {}
+    for phone, preferences in subscribers:
+        phone_matches = []
+        for pref_index, pref in enumerate(preferences):
+            volume_percentage = pref['volume_percentage'] / 100
+            volume_data = baselines[pref['volume_time']]
+            for coin in listing:
+                coin_id = str(coin['id'])
+                current_volume = coin['quote']['USD']['volume_24h']
+                market_cap = coin['quote']['USD']['market_cap']
+                current_price = coin['quote']['USD']['price']
+                if float(market_cap) < MARKET_CAP_MIN_USD or float(current_volume) < TWENTYFOURHR_VOLUME_MIN_USD:
+                    continue
+                prev_data = volume_data.get(coin_id)
+                if prev_data and 'initial_24hr_volume' in prev_data and 'price' in prev_data:
+                    prev_volume, prev_price = float(prev_data['initial_24hr_volume']), float(prev_data['price'])
+                    volume_change = (current_volume - prev_volume) / prev_volume if prev_volume > 0 else 0
+                    if volume_change > volume_percentage and current_price > prev_price:
+                        phone_matches.append((pref_index, coin_id))
+        if phone_matches:
+            matches[phone] = phone_matches
+    return matches
+
+def indexed_matches(listing, baselines, subscribers) -> Dict[str, List[Tuple[int, str]]]:
+    matcher = ThresholdMatcher(MARKET_CAP_MIN_USD, TWENTYFOURHR_VOLUME_MIN_USD)
+    for phone, preferences in subscribers:
+        matcher.add_phone(phone)
+        for pref_index, pref in enumerate(preferences):
+            matcher.add_subscriber(phone, pref_index, pref['volume_time'], pref['volume_percentage'] / 100)
+
+    frame = CoinFrame.from_listing(listing)
+    changes_by_time = {
+        volume_time: matcher.compute_changes(frame, BaselineSnapshot.from_document(baselines[volume_time]))
+        for volume_time in matcher.volume_times()
+    }
+    return {
+        phone: [(m.pref_index, m.change.coin_id) for m in phone_matches]
+        for phone, phone_matches in matcher.match(changes_by_time).items()
+    }
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=5000)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=1000,
+                        help="Skip the legacy loop above this many subscribers (it is quadratic).")
+    args = parser.parse_args()
+
+    listing = generate_listing(args.coins)
+    baselines = {volume_time: generate_baseline(listing, seed=i) for i, volume_time in enumerate(VOLUME_TIMES)}
+
+    print(f"{'subscribers':>12} {'matches':>10} {'legacy s':>10} {'indexed s':>10} {'speedup':>8}")
+    for count in args.subscribers:
+        subscribers = generate_subscribers(count)
+        indexed, indexed_time = timed(indexed_matches, listing, baselines, subscribers)
+        match_count = sum(len(m) for m in indexed.values())
+
+        if count <= args.legacy_max:
+            legacy, legacy_time = timed(legacy_matches, listing, baselines, subscribers)
+            if legacy != indexed:
+                raise SystemExit(f"Mismatch between legacy and indexed matches at {count} subscribers")
+            print(f"{count:>12} {match_count:>10} {legacy_time:>10.3f} {indexed_time:>10.3f} {legacy_time / indexed_time:>7.1f}x")
+        else:
+            print(f"{count:>12} {match_count:>10} {'-':>10} {indexed_time:>10.3f} {'-':>8}")
+
+if __name__ == "__main__":
+    main()
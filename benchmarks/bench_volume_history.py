@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Shows that VolumeHistory's memory and Firestore writes stay flat as subscribers pick more
+timeframes, and times the per-timeframe lookup plus change computation.
+
+Simulates a day of 15-minute runs on the in-memory Firestore fake, then answers 1, 4, 16
+and 96 distinct timeframes (15min..24hr) from the ring. For comparison, the per-timeframe
+volume_by_timeline baselines need one snapshot in memory and one document per timeframe.
+
+Usage:
+    python -m benchmarks.bench_volume_history --coins 5000
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.synthetic import generate_listing
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.threshold_matcher import ThresholdMatcher
+from processors.volume_history import SLOT_MINUTES, VolumeHistory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=5000)
+    parser.add_argument("--timeframes", type=int, nargs="+", default=[1, 4, 16, 96])
+    args = parser.parse_args()
+
+    logging.getLogger("CryptoVolumeTracker").setLevel(logging.WARNING)
+    frame = CoinFrame.from_listing(generate_listing(args.coins))
+    client = FakeFirestore()
+    history = VolumeHistory(client)
+    start_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    # A day of runs, each recording and flushing its own slot
+    record_seconds = 0.0
+    for i in range(history.capacity):
+        slot = history.slot_of(start_time + timedelta(minutes=SLOT_MINUTES * i))
+        scaled = CoinFrame(frame.ids, frame.names, frame.symbols, frame.volume * (1 + i / 1000), frame.price, frame.market_cap)
+        began = time.perf_counter()
+        history.record(scaled, slot)
+        history.flush()
+        record_seconds += time.perf_counter() - began
+    writes_per_run = history.writes / history.capacity
+    stats = history.stats()
+
+    matcher = ThresholdMatcher(10000000, 300000)
+    eligible = frame.eligible_mask(10000000, 300000)
+    snapshot_bytes = len(BaselineSnapshot.from_frame(frame)) * 3 * 8
+
+    print(f"coins={args.coins} ring slots={history.capacity} record+flush per run={record_seconds / history.capacity * 1000:.2f} ms")
+    print(f"{'timeframes':>10} {'ring MB':>8} {'writes/run':>10} {'lookup ms':>10} {'daily MB':>9} {'daily docs':>10}")
+    for count in args.timeframes:
+        volume_times = [f"{SLOT_MINUTES * (n + 1)}min" for n in range(min(count, history.capacity - 1))]
+        began = time.perf_counter()
+        for volume_time in volume_times:
+            matcher.compute_changes(frame, history.baseline(volume_time, slot), eligible)
+        lookup_ms = (time.perf_counter() - began) * 1000 / len(volume_times)
+        print(f"{len(volume_times):>10} {stats['history_bytes'] / 1e6:>8.1f} {writes_per_run:>10.0f} {lookup_ms:>10.3f} "
+              f"{snapshot_bytes * len(volume_times) / 1e6:>9.1f} {len(volume_times):>10}")
+
+if __name__ == "__main__":
+    main()
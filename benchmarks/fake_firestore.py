@@ -0,0 +1,166 @@
+import itertools
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from google.cloud import firestore
+
+def _copy(value):
+    # Documents only hold dicts, lists and scalars, so this is a much cheaper deepcopy
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return _copy(self._data)
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestore", collection: str, doc_id: str):
+        self.client = client
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self) -> FakeSnapshot:
+        self.client._round_trip("get")
+        return FakeSnapshot(self, self.client._read(self.collection, self.id))
+
+    def set(self, data: Dict, merge: bool = False):
+        self.client._round_trip("set")
+        self.client._write(self.collection, self.id, data, merge)
+
+    def update(self, data: Dict):
+        self.client._round_trip("update")
+        self.client._write(self.collection, self.id, data, merge=True)
+
+    def delete(self):
+        self.client._round_trip("delete")
+        self.client._delete(self.collection, self.id)
+
+class FakeCollectionReference:
+    def __init__(self, client: "FakeFirestore", name: str):
+        self.client = client
+        self.name = name
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self.client, self.name, doc_id)
+
+    def stream(self) -> Iterable[FakeSnapshot]:
+        self.client._round_trip("stream")
+        with self.client._lock:
+            ids = list(self.client.data.get(self.name, {}))
+        for doc_id in ids:
+            yield FakeSnapshot(self.document(doc_id), self.client._read(self.name, doc_id))
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self.client = client
+        self._writes: List = []
+
+    def set(self, reference: FakeDocumentReference, data: Dict, merge: bool = False):
+        self._writes.append((reference, data, merge, False))
+
+    def update(self, reference: FakeDocumentReference, data: Dict):
+        self._writes.append((reference, data, True, False))
+
+    def delete(self, reference: FakeDocumentReference):
+        self._writes.append((reference, None, False, True))
+
+    def commit(self):
+        self.client._round_trip("commit")
+        for reference, data, merge, delete in self._writes:
+            if delete:
+                self.client._delete(reference.collection, reference.id)
+            else:
+                self.client._write(reference.collection, reference.id, data, merge)
+        self._writes = []
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Write batch that also satisfies the hooks firestore.transactional drives.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, client: "FakeFirestore"):
+        super().__init__(client)
+        self._id = None
+        self._read_only = False
+        self._max_attempts = 5
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = next(self._ids)
+
+    def _commit(self):
+        self.commit()
+        self._clean_up()
+
+    def _rollback(self):
+        self._clean_up()
+
+class FakeFirestore:
+    """
+    In-memory stand-in for firestore.Client covering the calls this app makes.
+
+    Counts round trips per operation in `ops` and can add a fixed latency to each one,
+    so runs can be compared both by call count and by simulated wall time.
+    """
+    def __init__(self, latency_ms: float = 0.0):
+        self.data: Dict[str, Dict[str, Dict]] = {}
+        self.ops: Counter = Counter()
+        self.latency_ms = latency_ms
+        self._lock = threading.Lock()
+
+    def _round_trip(self, op: str):
+        self.ops[op] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _read(self, collection: str, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            data = self.data.get(collection, {}).get(doc_id)
+            return _copy(data)
+
+    def _write(self, collection: str, doc_id: str, data: Dict, merge: bool):
+        with self._lock:
+            documents = self.data.setdefault(collection, {})
+            current = documents.get(doc_id, {}) if merge else {}
+            for key, value in data.items():
+                if isinstance(value, firestore.Increment):
+                    current[key] = current.get(key, 0) + value.value
+                else:
+                    current[key] = _copy(value)
+            documents[doc_id] = current
+
+    def _delete(self, collection: str, doc_id: str):
+        with self._lock:
+            self.data.get(collection, {}).pop(doc_id, None)
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def get_all(self, references: Iterable[FakeDocumentReference], transaction=None) -> Iterable[FakeSnapshot]:
+        self._round_trip("get_all")
+        return [FakeSnapshot(reference, self._read(reference.collection, reference.id)) for reference in references]
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    def seed(self, collection: str, documents: Dict[str, Dict]):
+        with self._lock:
+            self.data.setdefault(collection, {}).update(_copy(documents))
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+def _bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+class FakePipeline:
+    """
+    Queues commands and runs them in one round trip, atomically like MULTI/EXEC.
+    """
+    def __init__(self, client: "FakeRedis", transaction: bool = True):
+        self.client = client
+        self.transaction = transaction
+        self._commands: List = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.client, f"_{name}")
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List:
+        self.client._round_trip("pipeline")
+        with self.client._lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+class FakeRedis:
+    """
+    In-memory stand-in for redis.Redis covering the commands the Redis state backend uses.
+
+    Like FakeFirestore it counts round trips per command in `ops` and can add a fixed
+    latency to each one. Values are returned as bytes, as redis-py does by default.
+    """
+    def __init__(self, latency_ms: float = 0.0):
+        self.data: Dict[str, object] = {}
+        self.expires: Dict[str, float] = {}
+        self.ops: Counter = Counter()
+        self.latency_ms = latency_ms
+        self._lock = threading.RLock()
+
+    def _round_trip(self, op: str):
+        self.ops[op] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _live(self, key: str):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self, transaction)
+
+    def __getattr__(self, name: str):
+        # Single commands are one round trip each
+        command = getattr(type(self), f"_{name}", None)
+        if command is None:
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self._round_trip(name)
+            with self._lock:
+                return command(self, *args, **kwargs)
+        return call
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    def _mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._live(key) for key in keys]
+
+    def _set(self, key: str, value, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key) is not None:
+            return None
+        self.data[key] = _bytes(value)
+        self.expires.pop(key, None)
+        if ex:
+            self.expires[key] = time.monotonic() + ex
+        return True
+
+    def _incrby(self, key: str, amount: int = 1) -> int:
+        value = int(self._live(key) or 0) + amount
+        self.data[key] = _bytes(value)
+        return value
+
+    def _decrby(self, key: str, amount: int = 1) -> int:
+        return self._incrby(key, -amount)
+
+    def _expire(self, key: str, seconds: int) -> bool:
+        if self._live(key) is None:
+            return False
+        self.expires[key] = time.monotonic() + seconds
+        return True
+
+    def _hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return dict(self._live(key) or {})
+
+    def _hset(self, key: str, mapping: Dict) -> int:
+        fields = self._live(key)
+        if fields is None:
+            fields = self.data[key] = {}
+        added = sum(1 for field in mapping if _bytes(field) not in fields)
+        fields.update({_bytes(field): _bytes(value) for field, value in mapping.items()})
+        return added
+
+    def _flushall(self) -> bool:
+        self.data.clear()
+        self.expires.clear()
+        return True
@@ -0,0 +1,37 @@
+import random
+import threading
+import time
+from typing import List, Tuple
+
+import requests
+
+class FakeNotification:
+    """
+    In-process stand-in for Notification that records messages instead of calling Twilio.
+
+    Optional latency and a seeded share of transient failures (connect timeouts, which
+    SmsDispatcher retries) keep runs deterministic while exercising the retry path.
+    """
+    def __init__(self, latency_ms: float = 0.0, failure_rate: float = 0.0, seed: int = 3):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.sent: List[Tuple[str, str]] = []
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send_sms(self, message: str, phone: str) -> str:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failures += 1
+                raise requests.exceptions.ConnectTimeout("fake Twilio connect timeout")
+            self.sent.append((phone, message))
+            return f"SM{len(self.sent):032d}"
+
+    def send_bulk_sms(self, message: str, phone: str):
+        try:
+            self.send_sms(message, phone)
+        except Exception:
+            pass
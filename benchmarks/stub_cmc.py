@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import generate_listing
+
+def full_coin(coin: Dict) -> Dict:
+    """
+    Pads a synthetic coin with the fields a real listings/latest entry carries.
+    """
+    usd = coin["quote"]["USD"]
+    return {
+        **coin,
+        "slug": coin["name"].lower().replace(" ", "-"),
+        "num_market_pairs": 42,
+        "date_added": "2021-01-01T00:00:00.000Z",
+        "tags": ["mineable", "pow", "store-of-value", "layer-1"],
+        "max_supply": 21000000,
+        "circulating_supply": usd["market_cap"] / usd["price"],
+        "total_supply": usd["market_cap"] / usd["price"],
+        "infinite_supply": False,
+        "platform": None,
+        "self_reported_circulating_supply": None,
+        "self_reported_market_cap": None,
+        "tvl_ratio": None,
+        "last_updated": "2024-01-01T00:00:00.000Z",
+        "quote": {"USD": {
+            **usd,
+            "volume_change_24h": 1.5,
+            "percent_change_1h": 0.1,
+            "percent_change_24h": 2.3,
+            "percent_change_7d": -4.2,
+            "percent_change_30d": 10.4,
+            "percent_change_60d": 12.1,
+            "percent_change_90d": 20.7,
+            "market_cap_dominance": 0.01,
+            "fully_diluted_market_cap": usd["market_cap"] * 1.1,
+            "tvl": None,
+            "last_updated": "2024-01-01T00:00:00.000Z",
+        }},
+    }
+
+class StubCoinMarketCap:
+    """
+    Local stand-in for the CoinMarketCap listings and quotes endpoints with injectable latency.
+
+    Usage:
+        with StubCoinMarketCap(num_coins=5000, latency=0.2) as stub:
+            fetch_data.base_url = stub.base_url
+    """
+    def __init__(self, num_coins: int = 5000, latency: float = 0.0, seed: int = 42):
+        self.listing: List[Dict] = [full_coin(coin) for coin in generate_listing(num_coins, seed)]
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def _payload(self, path: str, query: Dict[str, List[str]]) -> Dict:
+        if path.endswith("/cryptocurrency/listings/latest"):
+            start = int(query.get("start", ["1"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            return {"status": {"error_code": 0}, "data": self.listing[start - 1:start - 1 + limit]}
+        if path.endswith("/cryptocurrency/quotes/latest"):
+            ids = set(query.get("id", [""])[0].split(","))
+            return {"status": {"error_code": 0}, "data": {str(coin["id"]): coin for coin in self.listing if str(coin["id"]) in ids}}
+        return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                payload = stub._payload(url.path, parse_qs(url.query))
+                body = json.dumps(payload if payload is not None else {"status": {"error_code": 404}}).encode()
+                self.send_response(200 if payload is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    """
+    Runs the stub standalone, e.g. to keep its allocations out of a memory benchmark.
+    Prints the base URL on the first line of stdout.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Local CoinMarketCap stub")
+    parser.add_argument("--coins", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StubCoinMarketCap(num_coins=args.coins, latency=args.latency) as stub:
+        print(stub.base_url, flush=True)
+        threading.Event().wait()
+
+if __name__ == "__main__":
+    main()
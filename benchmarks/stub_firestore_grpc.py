@@ -0,0 +1,63 @@
+from concurrent import futures
+
+import grpc
+from google.cloud.firestore_v1.types import firestore as firestore_types
+
+class StubFirestoreServer:
+    """
+    Minimal gRPC stand-in for the Firestore API, reachable through FIRESTORE_EMULATOR_HOST.
+
+    Every document reads as missing and every commit succeeds, which is enough to measure
+    client construction, channel setup and round-trip latency offline.
+
+    Usage:
+        with StubFirestoreServer() as stub:
+            os.environ["FIRESTORE_EMULATOR_HOST"] = stub.host
+    """
+    SERVICE = "google.firestore.v1.Firestore"
+
+    def __init__(self):
+        self.calls = 0
+        self._server = None
+        self.port = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def _batch_get_documents(self, request, context):
+        self.calls += 1
+        for name in request.documents:
+            yield firestore_types.BatchGetDocumentsResponse.pb()(missing=name)
+
+    def _commit(self, request, context):
+        self.calls += 1
+        return firestore_types.CommitResponse.pb()()
+
+    def _run_query(self, request, context):
+        self.calls += 1
+        return iter(())
+
+    def __enter__(self):
+        handlers = {
+            "BatchGetDocuments": grpc.unary_stream_rpc_method_handler(
+                self._batch_get_documents,
+                request_deserializer=firestore_types.BatchGetDocumentsRequest.pb().FromString,
+                response_serializer=firestore_types.BatchGetDocumentsResponse.pb().SerializeToString),
+            "Commit": grpc.unary_unary_rpc_method_handler(
+                self._commit,
+                request_deserializer=firestore_types.CommitRequest.pb().FromString,
+                response_serializer=firestore_types.CommitResponse.pb().SerializeToString),
+            "RunQuery": grpc.unary_stream_rpc_method_handler(
+                self._run_query,
+                request_deserializer=firestore_types.RunQueryRequest.pb().FromString,
+                response_serializer=firestore_types.RunQueryResponse.pb().SerializeToString),
+        }
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+        self._server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(self.SERVICE, handlers),))
+        self.port = self._server.add_insecure_port("127.0.0.1:0")
+        self._server.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.stop(grace=None)
@@ -0,0 +1,76 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubTwilio:
+    """
+    Local stand-in for the Twilio Messages API with injectable latency and transient failures.
+
+    Usage:
+        with StubTwilio(latency=0.05, failure_rate=0.02) as stub:
+            stub.attach(notification.twilio_client)
+    """
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed: int = 3):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.messages = []
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def attach(self, twilio_client):
+        """
+        Points a twilio.rest.Client at the stub.
+        """
+        twilio_client.api.base_url = self.base_url
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub._lock:
+                    failed = stub._random.random() < stub.failure_rate
+                    if failed:
+                        stub.failures += 1
+                    else:
+                        stub.messages.append(body)
+                        sid = f"SM{len(stub.messages):032d}"
+                if failed:
+                    payload, status = {"code": 20429, "message": "Too Many Requests", "status": 429}, 429
+                else:
+                    payload, status = {"sid": sid, "status": "queued"}, 201
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
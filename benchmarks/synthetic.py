@@ -0,0 +1,64 @@
+import random
+from typing import Dict, List, Tuple
+
+VOLUME_TIMES = ["15min", "1hr", "4hr", "24hr"]
+
+def generate_listing(num_coins: int, seed: int = 42) -> List[Dict]:
+    """
+    Generates a CoinMarketCap-shaped listing in rank order.
+
+    Args:
+        num_coins (int): Number of coins to generate.
+        seed (int): Seed for reproducible output.
+
+    Returns:
+        List[Dict]: Coins shaped like the listings/latest "data" entries.
+    """
+    rng = random.Random(seed)
+    listing = []
+    for rank in range(1, num_coins + 1):
+        market_cap = 1e12 / rank * rng.uniform(0.5, 1.5)
+        listing.append({
+            "id": rank,
+            "name": f"Coin {rank}",
+            "symbol": f"C{rank}",
+            "cmc_rank": rank,
+            "quote": {
+                "USD": {
+                    "price": rng.uniform(0.0001, 1000),
+                    "volume_24h": market_cap * rng.uniform(0.01, 0.3),
+                    "market_cap": market_cap,
+                }
+            }
+        })
+    return listing
+
+def generate_baseline(listing: List[Dict], seed: int = 7, spike_ratio: float = 0.02) -> Dict[str, Dict]:
+    """
+    Generates a volume_by_timeline document where most coins moved by -15%..+15% in
+    volume and a few percent spiked by up to +200%.
+    """
+    rng = random.Random(seed)
+    baseline = {}
+    for coin in listing:
+        usd = coin["quote"]["USD"]
+        growth = rng.uniform(1.5, 3.0) if rng.random() < spike_ratio else rng.uniform(0.85, 1.15)
+        baseline[str(coin["id"])] = {
+            "initial_24hr_volume": usd["volume_24h"] / growth,
+            "price": usd["price"] * rng.uniform(0.9, 1.1),
+        }
+    return baseline
+
+def generate_subscribers(num_phones: int, seed: int = 11, volume_times: List[str] = VOLUME_TIMES) -> List[Tuple[str, List[Dict]]]:
+    """
+    Generates (phone, preferences) pairs the way notification_preferences stores them.
+    """
+    rng = random.Random(seed)
+    subscribers = []
+    for i in range(num_phones):
+        preferences = [
+            {"volume_percentage": float(rng.choice([20, 50, 80, 100, 120, 140])), "volume_time": rng.choice(volume_times)}
+            for _ in range(rng.randint(1, 2))
+        ]
+        subscribers.append((f"+1555{i:07d}", preferences))
+    return subscribers
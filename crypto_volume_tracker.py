@@ -2,72 +2,327 @@
 
 import os
 import ast
-from flask import Flask, request, jsonify
-from notifications.crypto_notification_registry import NotificationRegistry
-from processors.fetch_data import FetchData
-from notifications.notification_service import Notification
-from processors.process_data import ProcessData
+import signal
+import socket
+import sys
+import threading
+from typing import TYPE_CHECKING
+
+# The import report has to be installed before the heavy imports it measures
+if os.getenv('STARTUP_IMPORT_REPORT', 'false').lower() == 'true':
+    from utils.import_profiler import start_import_profiler
+    start_import_profiler()
+
+from flask import Flask, Response, request, jsonify
+from processors.tracking_jobs import TrackingJobQueue
 from utils.custom_logger import log
-from utils.secret_handler import SecretHandler
+from utils.import_profiler import get_import_profiler
+from utils.lazy_services import LazyServices
+from utils.metrics import metrics
+from utils.startup_timer import StartupTimer
+
+if TYPE_CHECKING:
+    from utils.secret_handler import SecretHandler
+
+# Heavy SDKs (google-cloud, twilio, requests, numpy) are imported by the service
+# factories below, so importing this module stays cheap
+SECRETS_TO_LOAD = [
+    'COINMARKET_API_KEY',
+    'TWILIO_SID', 
+    'TWILIO_AUTH_TOKEN', 
+    'TWILIO_PHONE'
+]
 
-def create_app():
+def create_app(secret_handler: "SecretHandler" = None):
     """
     Application factory function to create and configure the Flask app
+
+    With FAST_START=true, services are built on first use (or by a background preload)
+    instead of before the app starts serving.
     """
     app = Flask(__name__)
+    timer = StartupTimer()
+    fast_start = os.getenv('FAST_START', 'false').lower() == 'true'
 
-    # Initialize the SecretHandler
-    secret_handler = SecretHandler()
+    global services
+    services = LazyServices()
+    register_services(services, secret_handler)
 
-    # Fetch and Populate Secrets
-    secrets_to_load = [
-        'COINMARKET_API_KEY',
-        'TWILIO_SID', 
-        'TWILIO_AUTH_TOKEN', 
-        'TWILIO_PHONE'
-    ]
+    if not fast_start:
+        # Download the secret bucket while the Firestore client is being set up
+        services['secret_handler'].prefetch(SECRETS_TO_LOAD)
+        with timer.stage('firestore_client'):
+            services.preload(['firestore_client', 'notification_registry'])
+        with timer.stage('secrets'):
+            services.preload(['secrets'])
+        with timer.stage('services'):
+            services.preload(['fetch_data', 'notification', 'sms_dispatcher', 'process_data'])
+        start_background_services()
+    elif os.getenv('FAST_START_PRELOAD', 'true').lower() == 'true':
+        # Build everything off the request path while the app is already serving
+        threading.Thread(target=preload_services, name="service-preload", daemon=True).start()
 
-    # Load secrets with error handling
-    for secret in secrets_to_load:
-        try:
-            secret_handler.set_secret(secret)
-        except Exception as e:
-            log.error(f"Failed to load secret {secret}: {e}")
-            # Depending on criticality, you might want to exit or continue
-            raise
-
-    # Verify API Key is set
-    coinmarket_api_key = os.getenv('COINMARKET_API_KEY')
-    if not coinmarket_api_key:
-        log.error("CoinMarketCap API Key is not set")
-        raise ValueError("CoinMarketCap API Key is missing")
-
-    # Retrieve Twilio credentials from environment
-    twilio_credentials = {
-        'twilio_sid': os.getenv('TWILIO_SID'),
-        'twilio_auth_token': os.getenv('TWILIO_AUTH_TOKEN'),
-        'twilio_phone': os.getenv('TWILIO_PHONE')
-    }
-    
-    # Validate Twilio credentials
-    if not all(twilio_credentials.values()):
-        log.error("Missing Twilio credentials")
-        raise ValueError("Incomplete Twilio configuration")
-
-    # Initialize services
-    global services
-    services = {
-        'notification_registry': NotificationRegistry(),
-        'fetch_data': FetchData(),
-        'notification': Notification(**twilio_credentials)
-    }
+    # Background worker for asynchronous /track_volume runs
+    services['tracking_jobs'] = TrackingJobQueue(run_tracking)
 
     # Register routes
     crypto_volume_tracker_routes(app)
     notification_routes(app)
 
+    if services.is_built('secret_handler'):
+        timer.stages.update(services['secret_handler'].timings)
+    services['startup_timings'] = timer.log_report()
+    profiler = get_import_profiler()
+    if profiler is not None:
+        services['import_timings'] = profiler.log_report()
+
     return app
 
+def register_services(services: LazyServices, secret_handler: "SecretHandler" = None):
+    """
+    Registers the factory of every service; nothing is imported or built here.
+    """
+    def make_secret_handler():
+        from utils.secret_handler import SecretHandler
+        handler = secret_handler or SecretHandler(
+            ttl_seconds=float(os.getenv('SECRET_CACHE_TTL_SECONDS', 3600))
+        )
+        # Pick up rotated credentials without a restart
+        handler.on_rotation(apply_rotated_secrets)
+        return handler
+
+    def load_secrets():
+        # Fetch and Populate Secrets, with error handling
+        for secret in SECRETS_TO_LOAD:
+            try:
+                services['secret_handler'].set_secret(secret)
+            except Exception as e:
+                log.error(f"Failed to load secret {secret}: {e}")
+                # Depending on criticality, you might want to exit or continue
+                raise
+
+        # Verify API Key is set
+        if not os.getenv('COINMARKET_API_KEY'):
+            log.error("CoinMarketCap API Key is not set")
+            raise ValueError("CoinMarketCap API Key is missing")
+
+        # Validate Twilio credentials
+        if not all(os.getenv(secret) for secret in ('TWILIO_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE')):
+            log.error("Missing Twilio credentials")
+            raise ValueError("Incomplete Twilio configuration")
+        return SECRETS_TO_LOAD
+
+    def make_firestore_client():
+        # Single Firestore client shared by every service
+        from utils.firestore_client import get_firestore_client
+        return get_firestore_client()
+
+    def make_notification_registry():
+        from notifications.crypto_notification_registry import NotificationRegistry
+        return NotificationRegistry(
+            firestore_client=services['firestore_client'],
+            preference_cache_ttl=float(os.getenv('PREFERENCE_CACHE_TTL_SECONDS', 3600))
+        )
+
+    def make_fetch_data():
+        from processors.fetch_data import FetchData
+        services['secrets'] # API key must be in the environment
+        return FetchData(
+            parallelism=int(os.getenv('CMC_FETCH_PARALLELISM', 4)),
+            listing_cache_ttl=float(os.getenv('CMC_LISTING_CACHE_TTL_SECONDS', 60))
+        )
+
+    def make_notification():
+        from notifications.notification_service import Notification
+        services['secrets']
+
+        # Retrieve Twilio credentials from environment
+        twilio_credentials = {
+            'twilio_sid': os.getenv('TWILIO_SID'),
+            'twilio_auth_token': os.getenv('TWILIO_AUTH_TOKEN'),
+            'twilio_phone': os.getenv('TWILIO_PHONE')
+        }
+        return Notification(
+            **twilio_credentials,
+            pool_size=int(os.getenv('SMS_WORKERS', 8)),
+            timeout=float(os.getenv('TWILIO_TIMEOUT_SECONDS', 10))
+        )
+
+    def make_sms_dispatcher():
+        # Shared worker pool for outbound SMS
+        from notifications.sms_dispatcher import SmsDispatcher
+        return SmsDispatcher(
+            services['notification'],
+            max_workers=int(os.getenv('SMS_WORKERS', 8)),
+            rate_per_second=float(os.getenv('SMS_RATE_PER_SECOND', 10))
+        )
+
+    def make_process_data():
+        # Long-lived processor reused by every run
+        from notifications.message_packer import DigestBuffer, MessagePacker
+        from processors.hot_polling import HotSet
+        from processors.parallel_matcher import ParallelMatcher
+        from processors.process_data import ProcessData
+        parallel_matcher = None
+        digest_seconds = float(os.getenv('SMS_DIGEST_SECONDS', 0))
+        match_workers = int(os.getenv('MATCH_WORKERS', 0))
+        if match_workers > 1:
+            parallel_matcher = ParallelMatcher(
+                match_workers,
+                shard_by=os.getenv('MATCH_SHARD_BY', 'subscribers'),
+                min_subscriptions=int(os.getenv('MATCH_MIN_SUBSCRIPTIONS', 10000))
+            )
+        return ProcessData(
+            notification=services['notification'],
+            preference_cache=services['preference_cache'],
+            sms_dispatcher=services['sms_dispatcher'],
+            firestore_client=services['firestore_client'],
+            use_volume_history=os.getenv('VOLUME_HISTORY', 'true').lower() == 'true',
+            use_trigger_levels=os.getenv('TRIGGER_LEVELS', 'true').lower() == 'true',
+            parallel_matcher=parallel_matcher,
+            message_packer=MessagePacker(
+                max_segments=int(os.getenv('SMS_MAX_SEGMENTS', 10)),
+                gsm7=os.getenv('SMS_GSM7', 'false').lower() == 'true'
+            ),
+            digest=DigestBuffer(digest_seconds) if digest_seconds > 0 else None,
+            redis_client=services['redis_client'],
+            write_behind_seconds=float(os.getenv('WRITE_BEHIND_SECONDS', 5)),
+            alert_broker=services['alert_broker'],
+            sms_wait_seconds=float(os.getenv('SMS_WAIT_SECONDS', 120)),
+            tracker_cleanup=os.getenv('TRACKER_CLEANUP', 'false').lower() == 'true',
+            hot_set=HotSet(
+                near_ratio=float(os.getenv('HOT_SET_NEAR_RATIO', 0.5)),
+                max_coins=int(os.getenv('HOT_SET_MAX_COINS', 500))
+            ) if hot_polling_enabled() else None
+        )
+
+    def make_hot_poll_scheduler():
+        # Re-checks coins near a trigger level between the 15-minute sweeps, within the credit budget
+        from processors.hot_polling import CreditBudget, HotPollScheduler
+        return HotPollScheduler(
+            services['fetch_data'],
+            services['process_data'],
+            CreditBudget(float(os.getenv('CMC_CREDIT_BUDGET_PER_DAY', 3600))),
+            interval_seconds=float(os.getenv('HOT_POLL_INTERVAL_SECONDS', 60))
+        )
+
+    def make_alert_broker():
+        # One event loop thread serves every /alerts/stream connection
+        from notifications.alert_broker import AlertBroker
+        return AlertBroker(
+            max_clients=int(os.getenv('ALERT_STREAM_MAX_CLIENTS', 10000)),
+            max_buffer_bytes=int(os.getenv('ALERT_STREAM_BUFFER_BYTES', 64 * 1024)),
+            heartbeat_seconds=float(os.getenv('ALERT_STREAM_HEARTBEAT_SECONDS', 15))
+        )
+
+    def make_redis_client():
+        # Shared hot state across instances when STATE_BACKEND=redis, Firestore only otherwise
+        if os.getenv('STATE_BACKEND', 'firestore').lower() != 'redis':
+            return None
+        from utils.redis_client import get_redis_client
+        return get_redis_client()
+
+    services.register('secret_handler', make_secret_handler)
+    services.register('secrets', load_secrets)
+    services.register('firestore_client', make_firestore_client)
+    services.register('redis_client', make_redis_client)
+    services.register('notification_registry', make_notification_registry)
+    services.register('preference_cache', lambda: services['notification_registry'].preference_cache)
+    services.register('fetch_data', make_fetch_data)
+    services.register('notification', make_notification)
+    services.register('sms_dispatcher', make_sms_dispatcher)
+    services.register('process_data', make_process_data)
+    services.register('alert_broker', make_alert_broker)
+    services.register('hot_poll_scheduler', make_hot_poll_scheduler)
+
+def hot_polling_enabled() -> bool:
+    return os.getenv('HOT_POLL', 'false').lower() == 'true'
+
+def start_background_services():
+    """
+    Starts the optional background refreshers once the services exist.
+    """
+    if os.getenv('SECRET_REFRESH', 'true').lower() == 'true':
+        services['secret_handler'].start_background_refresh()
+
+    # Open the Firestore channel before the first request without delaying startup
+    if os.getenv('FIRESTORE_WARMUP', 'true').lower() == 'true':
+        from utils.firestore_client import warmup_firestore
+        threading.Thread(target=warmup_firestore, args=(services['firestore_client'],), name="firestore-warmup", daemon=True).start()
+
+    # Optionally keep the preference cache in sync with writes from other instances
+    if os.getenv('PREFERENCE_CACHE_LISTENER', 'false').lower() == 'true':
+        services['preference_cache'].start_listener()
+
+    # Optionally poll the coins closest to a threshold between sweeps
+    if hot_polling_enabled():
+        services['hot_poll_scheduler'].start()
+
+def preload_services():
+    try:
+        services.preload()
+        start_background_services()
+        log.info(f"Preloaded services (ms): { {name: round(s * 1000, 1) for name, s in services.build_seconds.items()} }")
+        profiler = get_import_profiler()
+        if profiler is not None:
+            services['import_timings'] = profiler.log_report()
+    except Exception as e:
+        # The failing service is retried, and its error surfaced, on first use
+        log.error(f"Service preload failed: {e}")
+
+def apply_rotated_secrets(rotated: dict):
+    """
+    Hands rotated secrets to the long-lived clients that captured them at startup.
+    """
+    if 'COINMARKET_API_KEY' in rotated and services.is_built('fetch_data'):
+        services['fetch_data'].set_api_key(rotated['COINMARKET_API_KEY'])
+    if rotated.keys() & {'TWILIO_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE'} and services.is_built('notification'):
+        services['notification'].set_credentials(
+            os.getenv('TWILIO_SID'), os.getenv('TWILIO_AUTH_TOKEN'), os.getenv('TWILIO_PHONE')
+        )
+
+class NoListingError(Exception):
+    """
+    Raised by run_tracking when CoinMarketCap returned no cryptocurrencies.
+    """
+
+def run_tracking(limit: int, progress=None) -> dict:
+    """
+    Runs one fetch + process pass of the tracking pipeline.
+    """
+    report_stage = progress or (lambda stage: None)
+    log.info(f"Starting cryptocurrency volume tracking. Limit: {limit}")
+
+    # Time every stage for /metrics as well as for the caller
+    stages = metrics.stage_timer()
+
+    def progress(stage):
+        stages.enter(stage)
+        report_stage(stage)
+
+    # Use global services
+    process = services['process_data']
+    fetch_data = services['fetch_data']
+    cache_before = fetch_data.cache_stats()
+
+    with metrics.time("tracking_run_seconds"):
+        try:
+            # Stream top cryptocurrencies straight into a columnar snapshot
+            progress("fetch")
+            cryptocurrencies = fetch_data.fetch_snapshot(limit)
+            # This run's share of the listing cache counters
+            cache_stats = {key: value - cache_before.get(key, 0) for key, value in fetch_data.cache_stats().items() if key != "pages"}
+            log.info(f"Listing cache: {cache_stats}")
+            if not len(cryptocurrencies):
+                raise NoListingError("No cryptocurrencies fetched.")
+
+            # Waits for a hot poll in flight, which is short
+            with process.run_lock:
+                process.process_volume_change(cryptocurrencies, progress=progress)
+        finally:
+            stages.finish()
+    return {"processed_count": len(cryptocurrencies), "listing_cache": cache_stats}
+
 # Crypto Volume Tracker Routes
 def crypto_volume_tracker_routes(app):
     @app.route("/")
@@ -78,33 +333,75 @@ def crypto_volume_tracker_routes(app):
             "status": "healthy"
         }), 200
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        if not metrics.enabled:
+            return jsonify({"error": "Metrics are disabled"}), 404
+        return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
     @app.route("/track_volume", methods=["POST"])
     def track_volume():
         try:
             # Parse limit from request body or default to 5000
             request_data = request.get_json() or {}
             limit = request_data.get("limit", 5000)
+            run_async = request_data.get("async", os.getenv('TRACK_VOLUME_ASYNC', 'false').lower() == 'true')
+            # JSON clients may send "false" as a string, which is truthy
+            run_async = str(run_async).lower() == 'true' if isinstance(run_async, str) else bool(run_async)
 
-            log.info(f"Starting cryptocurrency volume tracking. Limit: {limit}")
-
-            # Use global services
-            process = ProcessData(notification=services['notification'])
-
-            # Fetch top cryptocurrencies
-            cryptocurrencies = services['fetch_data'].fetch_top_cryptos(limit)
-            if cryptocurrencies:
-                process.process_volume_change(cryptocurrencies)
+            if run_async:
+                job, coalesced = services['tracking_jobs'].submit(limit)
                 return jsonify({
-                    "message": f"Processed volume changes for top {limit} cryptocurrencies.",
-                    "processed_count": len(cryptocurrencies)
-                }), 200
-            else:
-                return jsonify({"error": "No cryptocurrencies fetched."}), 404
+                    "message": f"Volume tracking for top {limit} cryptocurrencies queued.",
+                    "job_id": job.job_id,
+                    "status": job.status,
+                    "coalesced": coalesced
+                }), 202
 
+            result = run_tracking(limit)
+            return jsonify({
+                "message": f"Processed volume changes for top {limit} cryptocurrencies.",
+                **result
+            }), 200
+
+        except NoListingError as e:
+            return jsonify({"error": str(e)}), 404
         except Exception as e:
             log.error(f"Volume tracking error: {e}")
             return jsonify({"error": str(e)}), 500
 
+    @app.route("/track_volume/<job_id>", methods=["GET"])
+    def track_volume_status(job_id):
+        job = services['tracking_jobs'].get(job_id)
+        if job is None:
+            return jsonify({"error": f"Unknown job id: {job_id}"}), 404
+        return jsonify(job.to_dict()), 200
+
+    @app.route("/alerts/stream", methods=["GET"])
+    def alerts_stream():
+        # The connection is handed to the broker's event loop, so it needs the raw socket
+        sock = request.environ.get("werkzeug.socket")
+        if sock is None:
+            return jsonify({"error": "Alert streaming needs the built-in server"}), 501
+        broker = services['alert_broker']
+        if broker.is_full():
+            return jsonify({"error": "Too many alert stream clients"}), 503
+        # Optional filters: one volume_time bucket, and a minimum change in percent
+        volume_time = request.args.get("volume_time")
+        min_change = request.args.get("min_change")
+        try:
+            min_change = float(min_change) if min_change is not None else None
+        except ValueError:
+            return jsonify({"error": f"Invalid min_change: {min_change}"}), 400
+
+        def handoff():
+            # Yielding sends the status line and headers; the broker writes the events
+            yield b"retry: 5000\n\n"
+            broker.attach(socket.socket(fileno=sock.detach()), volume_time, min_change)
+
+        return Response(handoff(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 def notification_routes(app):
     @app.route("/notifications", methods=["GET"])
     def notification_home():
@@ -184,6 +481,9 @@ def main():
     # Create Flask app
     app = create_app()
 
+    # Cloud Run stops instances with SIGTERM; exit normally so atexit hooks flush held digests and writes
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     # Run the application
     app.run(
         host="0.0.0.0", 
@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+import json
+import socket
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class AlertClient:
+    """
+    One /alerts/stream connection and its optional filters.
+    """
+    __slots__ = ("transport", "volume_time", "min_change")
+
+    def __init__(self, volume_time: Optional[str] = None, min_change: Optional[float] = None):
+        self.transport: Optional[asyncio.Transport] = None
+        self.volume_time = volume_time
+        self.min_change = min_change
+
+    def accepts(self, event: Dict) -> bool:
+        if self.volume_time is not None and event["volume_time"] != self.volume_time:
+            return False
+        return self.min_change is None or event["volume_change"] >= self.min_change
+
+class _ClientProtocol(asyncio.Protocol):
+    def __init__(self, broker: "AlertBroker", client: AlertClient):
+        self.broker = broker
+        self.client = client
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.client.transport = transport
+        self.broker._clients.add(self.client)
+        metrics.set("alert_stream_clients", len(self.broker._clients))
+
+    def data_received(self, data: bytes):
+        # Clients don't send anything after the request
+        pass
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.broker._clients.discard(self.client)
+        metrics.set("alert_stream_clients", len(self.broker._clients))
+
+class AlertBroker:
+    """
+    In-process fan-out of alerts to Server-Sent Events clients.
+
+    Every connection is served by one asyncio event loop on a single background
+    thread, so thousands of idle clients cost a socket each rather than a thread.
+    The HTTP handler writes the SSE response headers and hands its socket over with
+    attach(); publish() can be called from any thread and encodes each event once.
+
+    Each client's unsent bytes are bounded by `max_buffer_bytes`: a consumer that
+    falls that far behind is disconnected instead of slowing down everyone else or
+    growing memory. A comment line is sent every `heartbeat_seconds` to keep idle
+    connections open through proxies and to notice dead ones.
+    """
+    def __init__(self, max_clients: int = 10000, max_buffer_bytes: int = 64 * 1024, heartbeat_seconds: float = 15.0):
+        self.max_clients = max_clients
+        self.max_buffer_bytes = max_buffer_bytes
+        self.heartbeat_seconds = heartbeat_seconds
+
+        self._clients = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self.published = 0
+        self.dropped = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name="alert-stream", daemon=True)
+            self._thread.start()
+            log.info("Started alert stream broker")
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_later(self.heartbeat_seconds, self._heartbeat)
+        self._loop.run_forever()
+
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def is_full(self) -> bool:
+        return len(self._clients) >= self.max_clients
+
+    def attach(self, sock: socket.socket, volume_time: Optional[str] = None, min_change: Optional[float] = None):
+        """
+        Takes over a connected socket whose SSE response headers were already sent.
+        """
+        self.start()
+        sock.setblocking(False)
+        client = AlertClient(volume_time, min_change)
+        asyncio.run_coroutine_threadsafe(self._attach(sock, client), self._loop)
+
+    async def _attach(self, sock: socket.socket, client: AlertClient):
+        try:
+            await self._loop.connect_accepted_socket(lambda: _ClientProtocol(self, client), sock)
+        except OSError as e:
+            log.debug("Alert stream client went away before attaching: %s", e)
+            sock.close()
+
+    @staticmethod
+    def encode(event_id: int, event: Dict) -> bytes:
+        return f"id: {event_id}\nevent: alert\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+
+    def publish(self, events: Iterable[Dict]):
+        """
+        Queues events for every connected client; returns immediately.
+        """
+        if not self._clients:
+            return
+        payloads = [(event, self.encode(next(self._ids), event)) for event in events]
+        if payloads:
+            self._loop.call_soon_threadsafe(self._fanout, payloads)
+
+    def _fanout(self, payloads: List[Tuple[Dict, bytes]]):
+        self.published += len(payloads)
+        metrics.inc("alert_stream_events_total", len(payloads))
+        for client in list(self._clients):
+            data = b"".join(encoded for event, encoded in payloads if client.accepts(event))
+            if data:
+                self._write(client, data)
+
+    def _write(self, client: AlertClient, data: bytes):
+        transport = client.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() + len(data) > self.max_buffer_bytes:
+            # Slow consumer: drop it rather than buffer without bound
+            self.dropped += 1
+            metrics.inc("alert_stream_dropped_total")
+            transport.abort()
+            return
+        transport.write(data)
+
+    def _heartbeat(self):
+        for client in list(self._clients):
+            self._write(client, b": ping\n\n")
+        self._loop.call_later(self.heartbeat_seconds, self._heartbeat)
+
+    def stats(self) -> Dict[str, int]:
+        return {"clients": len(self._clients), "published": self.published, "dropped": self.dropped}
@@ -1,11 +1,16 @@
 from utils.custom_logger import log
 from google.cloud import firestore
+from typing import Optional
+from notifications.preference_cache import PreferenceCache
+from utils.firestore_client import get_firestore_client
 
 class NotificationRegistry:
-    def __init__(self):
-        # Initialize Firestore client
-        self.firestore_client = firestore.Client(project='crypto-volume-change-tracker', database='crypto-backend-db')
+    def __init__(self, firestore_client: Optional[firestore.Client] = None, preference_cache_ttl: float = 3600):
+        # Use the shared Firestore client unless one is injected
+        self.firestore_client = firestore_client or get_firestore_client()
         self.collection_name = "notification_preferences"
+        # Shared with ProcessData, kept current by write-through from this registry
+        self.preference_cache = PreferenceCache(self.firestore_client, self.collection_name, preference_cache_ttl)
 
     def add_notification(self, phone: str, volume_percentage: float, volume_time: str):
         doc_ref = self.firestore_client.collection(self.collection_name).document(phone)
@@ -17,6 +22,7 @@ class NotificationRegistry:
         if new_entry not in preferences:
             preferences.append(new_entry)
             doc_ref.set({"preferences": preferences})
+            self.preference_cache.put(phone, {"preferences": preferences})
             log.info(f"Added notification preference for phone: {phone}: {new_entry}")
             return {"message": "Notification preference added.", "data": new_entry}, 201
         else:
@@ -30,6 +36,7 @@ class NotificationRegistry:
         if doc.exists:
             new_preferences = [{"volume_percentage": volume_percentage, "volume_time": volume_time}]
             doc_ref.set({"preferences": new_preferences})
+            self.preference_cache.put(phone, {"preferences": new_preferences})
             log.info(f"Updated notification preferences for phone {phone}: {new_preferences}")
             return {"message": "Notification preferences updated.", "data": new_preferences}, 200
         else:
@@ -42,6 +49,7 @@ class NotificationRegistry:
 
         if doc.exists:
             doc_ref.delete()
+            self.preference_cache.delete(phone)
             log.info(f"Deleted notification preferences for phone {phone}.")
             return {"message": "Notification preferences deleted.", "phone": phone}, 200
         else:
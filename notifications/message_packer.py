@@ -0,0 +1,169 @@
+import math
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+# GSM 03.38 default alphabet (one septet each) and its extension table (escape + septet)
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")
+
+GSM7 = "GSM-7"
+UCS2 = "UCS-2"
+# Units per segment for a single-segment message and per part of a concatenated one
+SEGMENT_UNITS = {GSM7: (160, 153), UCS2: (70, 67)}
+# Twilio rejects bodies longer than 1600 characters
+MAX_BODY_CHARS = 1600
+
+# The emoji force UCS-2, fitting 67 instead of 153 characters per segment
+HEADER = "🚀 Positive Volume Changes Detected 🚀:\n"
+BULLET = "🚀"
+GSM7_HEADER = "Positive Volume Changes Detected:\n"
+GSM7_BULLET = "-"
+
+class Alert(NamedTuple):
+    """
+    One alert line for a coin, ranked by the size of its volume change.
+    """
+    coin_id: str
+    volume_change: float
+    line: str
+    coin_name: str = "" # Stored on the dedupe tracker document when a held alert is released
+
+def encoding_of(text: str) -> str:
+    """
+    Returns GSM-7 if every character is in the GSM alphabet, otherwise UCS-2.
+    """
+    return GSM7 if all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in text) else UCS2
+
+def message_units(text: str) -> Tuple[str, int]:
+    """
+    Returns the encoding of a message and its length in that encoding's units.
+
+    Extension characters take two GSM-7 septets; characters outside the Basic
+    Multilingual Plane (emoji) take two UTF-16 code units.
+    """
+    encoding = encoding_of(text)
+    if encoding == GSM7:
+        return encoding, len(text) + sum(1 for char in text if char in GSM7_EXTENDED)
+    return encoding, len(text.encode("utf-16-le")) // 2
+
+def segments(text: str) -> int:
+    """
+    Returns the number of SMS segments Twilio bills for a message.
+    """
+    encoding, units = message_units(text)
+    single, multi = SEGMENT_UNITS[encoding]
+    return 1 if units <= single else math.ceil(units / multi)
+
+class MessagePacker:
+    """
+    Packs alert lines into as few SMS segments as possible without dropping any.
+
+    Alerts are ranked by volume change so the largest movers come first, then filled
+    greedily into messages of at most `max_segments` segments each. Alerts that don't
+    fit start another message instead of being truncated. The header is only put on
+    the first message; lines are joined with newlines.
+
+    With gsm7, the header and bullets avoid emoji so messages stay in the GSM-7
+    alphabet unless a coin name needs UCS-2.
+    """
+    def __init__(self, max_segments: int = 10, gsm7: bool = False):
+        self.max_segments = max(1, max_segments)
+        self.header = GSM7_HEADER if gsm7 else HEADER
+        self.bullet = GSM7_BULLET if gsm7 else BULLET
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def size(text: str) -> Tuple[bool, int, int, int]:
+        """
+        Returns whether text is GSM-7, its length in GSM-7 septets and in UCS-2 code units, and in characters.
+        """
+        gsm = encoding_of(text) == GSM7
+        gsm_units = len(text) + sum(1 for char in text if char in GSM7_EXTENDED) if gsm else 0
+        return gsm, gsm_units, len(text.encode("utf-16-le")) // 2, len(text)
+
+    @staticmethod
+    def joined(first: Tuple[bool, int, int, int], second: Tuple[bool, int, int, int]) -> Tuple[bool, int, int, int]:
+        """
+        Returns the size of two texts joined by a newline, which is one unit in either encoding.
+        """
+        return first[0] and second[0], first[1] + 1 + second[1], first[2] + 1 + second[2], first[3] + 1 + second[3]
+
+    def fits(self, size: Tuple[bool, int, int, int]) -> bool:
+        gsm, gsm_units, ucs_units, chars = size
+        if chars > MAX_BODY_CHARS:
+            return False
+        encoding, units = (GSM7, gsm_units) if gsm else (UCS2, ucs_units)
+        single, multi = SEGMENT_UNITS[encoding]
+        return units <= single or math.ceil(units / multi) <= self.max_segments
+
+    def pack(self, alerts: Iterable[Alert]) -> List[str]:
+        """
+        Args:
+            alerts (Iterable[Alert]): Alerts of one recipient, in any order.
+
+        Returns:
+            List[str]: Message bodies, every alert in exactly one of them.
+        """
+        ranked = sorted(alerts, key=lambda alert: alert.volume_change, reverse=True)
+        if not ranked:
+            return []
+
+        messages = []
+        # Lines of the message being filled, its size and how many alerts it holds
+        lines, size, count = [self.header], self.size(self.header), 0
+        for alert in ranked:
+            line_size = self.size(alert.line)
+            candidate = self.joined(size, line_size)
+            if count and not self.fits(candidate):
+                messages.append("\n".join(lines))
+                lines, size, count = [alert.line], line_size, 1
+            else:
+                lines.append(alert.line)
+                size, count = candidate, count + 1
+        messages.append("\n".join(lines))
+        return messages
+
+class DigestBuffer:
+    """
+    Holds alerts per phone for a window so consecutive runs go out as one digest.
+
+    A phone's window starts with its first held alert. Alerts for the same coin are
+    merged, keeping the latest. Windows are only checked when a run calls due(), so
+    a window that is a multiple of the run interval sends with the run that closes it.
+
+    Held alerts are in memory only: callers dedupe them when they are released, and
+    drain() the buffer at shutdown.
+    """
+    def __init__(self, window_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._pending: Dict[str, Tuple[float, Dict[str, Alert]]] = {}
+
+    def add(self, phone: str, alerts: Iterable[Alert]):
+        started, held = self._pending.get(phone) or (self.clock(), {})
+        for alert in alerts:
+            held[alert.coin_id] = alert
+        if held:
+            self._pending[phone] = (started, held)
+
+    def due(self) -> List[Tuple[str, List[Alert]]]:
+        """
+        Removes and returns the alerts of every phone whose window has elapsed.
+        """
+        now = self.clock()
+        ready = [phone for phone, (started, _) in self._pending.items() if now - started >= self.window_seconds]
+        return [(phone, list(self._pending.pop(phone)[1].values())) for phone in ready]
+
+    def drain(self) -> List[Tuple[str, List[Alert]]]:
+        """
+        Removes and returns every held alert, due or not.
+        """
+        pending, self._pending = self._pending, {}
+        return [(phone, list(held.values())) for phone, (_, held) in pending.items()]
+
+    def pending(self) -> int:
+        return sum(len(held) for _, held in self._pending.values())
@@ -1,26 +1,57 @@
 from utils.custom_logger import log
+from utils.metrics import metrics
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 class Notification:
     """
     Handles sending notifications via SMS.
     """
-    def __init__(self, twilio_sid: str, twilio_auth_token: str, twilio_phone: str):
-        self.twilio_client = Client(twilio_sid, twilio_auth_token)
+    def __init__(self, twilio_sid: str, twilio_auth_token: str, twilio_phone: str, pool_size: int = 10,
+                 timeout: float = 10.0):
+        # Pooled HTTP client so concurrent sends reuse Twilio connections; the timeout
+        # keeps a stalled request from holding a dispatcher worker indefinitely
+        http_client = TwilioHttpClient(pool_connections=True, timeout=timeout)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        http_client.session.mount("https://", adapter)
+        http_client.session.mount("http://", adapter)
+        self.twilio_client = Client(twilio_sid, twilio_auth_token, http_client=http_client)
         self.twilio_phone = twilio_phone
 
-    def send_bulk_sms(self, message: str, phone: str):
+    def set_credentials(self, twilio_sid: str, twilio_auth_token: str, twilio_phone: str):
         """
-        Sends a bulk SMS notification to all recipients.
+        Switches to rotated Twilio credentials, keeping the pooled HTTP client.
+        """
+        self.twilio_client = Client(twilio_sid, twilio_auth_token, http_client=self.twilio_client.http_client)
+        self.twilio_phone = twilio_phone
+
+    def send_sms(self, message: str, phone: str) -> str:
+        """
+        Sends an SMS, raising on failure so callers can retry.
         Args:
             message (str): The message to send via SMS.
+            phone (str): The recipient phone number.
+
+        Returns:
+            str: The Twilio message SID.
         """
-        try:
+        with metrics.external_call("twilio", "messages_create"):
             sms = self.twilio_client.messages.create(
                 body=message,
                 from_=self.twilio_phone,
                 to=phone
             )
-            log.info(f"SMS sent successfully to {phone}: SID {sms.sid}")
+        log.info("SMS sent successfully to %s: SID %s", phone, sms.sid)
+        return sms.sid
+
+    def send_bulk_sms(self, message: str, phone: str):
+        """
+        Sends a bulk SMS notification to all recipients.
+        Args:
+            message (str): The message to send via SMS.
+        """
+        try:
+            self.send_sms(message, phone)
         except Exception as e:
             log.error(f"Failed to send SMS to {phone}: {e}")
@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from google.cloud import firestore
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class PreferenceCache:
+    """
+    In-process cache of the notification_preferences collection.
+
+    The collection is streamed once to warm the cache and then kept current by
+    write-through from NotificationRegistry and, optionally, a Firestore snapshot
+    listener. Entries older than the TTL trigger a full refresh on the next read.
+    """
+    def __init__(self, firestore_client: firestore.Client, collection_name: str = "notification_preferences",
+                 ttl_seconds: float = 3600):
+        self.firestore_client = firestore_client
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+
+        self._preferences: Dict[str, Dict] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._watch = None
+        # Phones written through while a refresh streams, re-applied over its result (None = deleted)
+        self._refresh_writes: List[Dict[str, Optional[Dict]]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def is_fresh(self) -> bool:
+        return self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.ttl_seconds
+
+    def refresh(self):
+        """
+        Reloads the whole collection from Firestore.
+
+        The stream runs outside the lock, so writes made meanwhile are recorded and
+        re-applied over the streamed documents, which may predate them.
+        """
+        writes: Dict[str, Optional[Dict]] = {}
+        with self._lock:
+            self._refresh_writes.append(writes)
+        try:
+            with metrics.external_call("firestore", "preferences_stream"):
+                preferences = {doc.id: doc.to_dict() for doc in self.firestore_client.collection(self.collection_name).stream()}
+        except BaseException:
+            with self._lock:
+                self._refresh_writes.remove(writes)
+            raise
+        with self._lock:
+            self._refresh_writes.remove(writes)
+            for phone, preferences_data in writes.items():
+                if preferences_data is None:
+                    preferences.pop(phone, None)
+                else:
+                    preferences[phone] = preferences_data
+            self._preferences = preferences
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+        log.info(f"Refreshed notification preference cache with {len(preferences)} phones")
+
+    def items(self) -> List[Tuple[str, Dict]]:
+        """
+        Returns (phone, preferences document) pairs, refreshing first if the cache is cold or expired.
+        """
+        if self.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.refresh()
+        with self._lock:
+            return list(self._preferences.items())
+
+    def put(self, phone: str, preferences_data: Dict):
+        """
+        Write-through for a created or updated preferences document.
+        """
+        with self._lock:
+            self._write(phone, preferences_data)
+
+    def delete(self, phone: str):
+        """
+        Write-through for a deleted preferences document.
+        """
+        with self._lock:
+            self._write(phone, None)
+
+    def _write(self, phone: str, preferences_data: Optional[Dict]):
+        # Caller holds the lock
+        if preferences_data is None:
+            self._preferences.pop(phone, None)
+        else:
+            self._preferences[phone] = preferences_data
+        for writes in self._refresh_writes:
+            writes[phone] = preferences_data
+
+    def invalidate(self):
+        """
+        Forces a full refresh on the next read.
+        """
+        with self._lock:
+            self._refreshed_at = None
+
+    def start_listener(self):
+        """
+        Keeps the cache in sync with changes made outside this process using a Firestore snapshot listener.
+        """
+        if self._watch is None:
+            self._watch = self.firestore_client.collection(self.collection_name).on_snapshot(self._on_snapshot)
+            log.info("Started notification preference snapshot listener")
+
+    def stop_listener(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        with self._lock:
+            for change in changes:
+                if change.type.name == "REMOVED":
+                    self._write(change.document.id, None)
+                else:
+                    self._write(change.document.id, change.document.to_dict())
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes, "phones": len(self._preferences)}
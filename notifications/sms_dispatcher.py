@@ -0,0 +1,176 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Dict, Iterable, NamedTuple, Optional
+import requests
+from urllib3.exceptions import NewConnectionError
+from twilio.base.exceptions import TwilioRestException
+from notifications.notification_service import Notification
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class SmsResult(NamedTuple):
+    """
+    Outcome of one dispatched SMS.
+    """
+    phone: str
+    sid: Optional[str]
+    attempts: int
+    latency: float # seconds from submit() to the final attempt
+    error: Optional[str]
+
+class RateLimiter:
+    """
+    Token bucket shared by the dispatcher workers.
+    """
+    def __init__(self, rate_per_second: float):
+        self.rate_per_second = rate_per_second
+        self._tokens = rate_per_second
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate_per_second:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate_per_second, self._tokens + (now - self._updated) * self.rate_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+
+class SmsDispatcher:
+    """
+    Sends SMS from a bounded pool of worker threads fed by a queue.
+
+    Matching submits messages and moves on instead of blocking on each Twilio call.
+    Sends share the Notification's pooled Twilio connections, respect a per-second rate
+    limit, and failures where Twilio can't have accepted the message (429, or the
+    connection never opened) are retried with exponential backoff. messages.create
+    isn't idempotent, so 5xx responses and connections lost after the request was sent
+    are final: Twilio may have queued the message, and a retry could send it twice.
+    """
+    def __init__(self, notification: Notification, max_workers: int = 8, rate_per_second: float = 10,
+                 max_retries: int = 3, backoff_seconds: float = 0.5):
+        self.notification = notification
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.rate_limiter = RateLimiter(rate_per_second)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def submit(self, message: str, phone: str) -> "Future[SmsResult]":
+        """
+        Queues an SMS and returns a future resolving to its SmsResult.
+        """
+        self._start_workers()
+        future: "Future[SmsResult]" = Future()
+        self._queue.put((future, message, phone, time.perf_counter()))
+        return future
+
+    def _start_workers(self):
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"sms-dispatcher-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        """
+        Returns whether the send certainly didn't reach Twilio, so retrying can't duplicate it.
+        """
+        if isinstance(error, TwilioRestException):
+            return error.status == 429
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+            # Failed while connecting (DNS, refused, unreachable), before anything was sent
+            reason = getattr(error.args[0], "reason", error.args[0])
+            return isinstance(reason, NewConnectionError)
+        return False
+
+    @staticmethod
+    def is_delivery_unknown(error: Exception) -> bool:
+        """
+        Returns whether Twilio may have accepted the message despite the error.
+        """
+        if isinstance(error, TwilioRestException):
+            return error.status >= 500
+        return isinstance(error, requests.exceptions.RequestException)
+
+    def _work(self):
+        while True:
+            future, message, phone, submitted_at = self._queue.get()
+            try:
+                result = self._send(message, phone, submitted_at)
+                metrics.observe("sms_send_latency_seconds", result.latency)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, message: str, phone: str, submitted_at: float) -> SmsResult:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            try:
+                sid = self.notification.send_sms(message, phone)
+                metrics.inc("sms_sent_total")
+                return SmsResult(phone, sid, attempt, time.perf_counter() - submitted_at, None)
+            except Exception as e:
+                if attempt > self.max_retries or not self.is_transient(e):
+                    if not self.is_transient(e) and self.is_delivery_unknown(e):
+                        # Not retried: the message may already be queued at Twilio
+                        log.error("Delivery unknown for SMS to %s after %d attempts: %s", phone, attempt, e)
+                        error = f"delivery unknown: {e}"
+                    else:
+                        log.error("Failed to send SMS to %s after %d attempts: %s", phone, attempt, e)
+                        error = str(e)
+                    metrics.inc("sms_failed_total")
+                    return SmsResult(phone, None, attempt, time.perf_counter() - submitted_at, error)
+                delay = self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                log.warning("Transient SMS failure for %s, retrying in %.2fs: %s", phone, delay, e)
+                metrics.inc("sms_retries_total")
+                time.sleep(delay)
+
+    @staticmethod
+    def wait(futures: Iterable["Future[SmsResult]"], timeout: Optional[float] = None) -> Dict:
+        """
+        Waits for dispatched messages and summarizes them.
+
+        Args:
+            futures (Iterable[Future[SmsResult]]): Futures returned by submit().
+            timeout (Optional[float]): Max seconds to wait.
+
+        Returns:
+            Dict: Sent/failed/pending counts, retries and latency percentiles in ms.
+        """
+        done, not_done = wait(list(futures), timeout=timeout)
+        results = [future.result() for future in done if future.exception() is None]
+        latencies = sorted(result.latency for result in results)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {
+            "sent": sum(1 for result in results if result.error is None),
+            "failed": sum(1 for result in results if result.error is not None) + len(done) - len(results),
+            "pending": len(not_done),
+            "retries": sum(result.attempts - 1 for result in results),
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": percentile(1.0),
+        }
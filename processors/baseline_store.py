@@ -0,0 +1,80 @@
+from typing import Dict, Iterable
+from google.cloud import firestore
+from processors.coin_frame import BaselineSnapshot
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class BaselineStore:
+    """
+    Run-scoped cache of the volume_by_timeline baseline documents.
+
+    Every distinct volume_time document is read once at the start of a run with a
+    single get_all call, and buckets changed during the run are written back once at
+    the end with a batched write. reads/writes count Firestore round trips so a run
+    can be checked to stay O(distinct timeframes).
+    """
+    MAX_BATCH_SIZE = 500 # Firestore limit of operations per batch
+
+    def __init__(self, firestore_client: firestore.Client, collection_name: str = "volume_by_timeline"):
+        self.firestore_client = firestore_client
+        self.collection_ref = self.firestore_client.collection(collection_name)
+        self.baselines: Dict[str, BaselineSnapshot] = {}
+        self.dirty = set()
+        self.reads = 0
+        self.writes = 0
+
+    def load(self, volume_times: Iterable[str]):
+        """
+        Loads the baseline documents of the given buckets in one round trip.
+
+        Args:
+            volume_times (Iterable[str]): The volume_time buckets used by this run.
+        """
+        missing = [volume_time for volume_time in dict.fromkeys(volume_times) if volume_time not in self.baselines]
+        if not missing:
+            return
+
+        refs = [self.collection_ref.document(volume_time) for volume_time in missing]
+        for volume_time in missing:
+            self.baselines[volume_time] = BaselineSnapshot.empty()
+        with metrics.external_call("firestore", "baseline_get_all"):
+            for doc in self.firestore_client.get_all(refs):
+                if doc.exists:
+                    self.baselines[doc.id] = BaselineSnapshot.from_document(doc.to_dict())
+        self.reads += 1
+        log.info(f"Loaded {len(missing)} baseline documents: {missing}")
+
+    def get(self, volume_time: str) -> BaselineSnapshot:
+        """
+        Returns the in-memory baseline of a bucket, empty if it was never stored.
+        """
+        return self.baselines.setdefault(volume_time, BaselineSnapshot.empty())
+
+    def update(self, volume_time: str, snapshot: BaselineSnapshot):
+        """
+        Merges coin baselines into a bucket and marks it for the end-of-run flush.
+        """
+        self.baselines[volume_time] = self.get(volume_time).merge(snapshot)
+        self.dirty.add(volume_time)
+
+    def flush(self):
+        """
+        Writes every changed bucket back with batched writes.
+        """
+        dirty = sorted(self.dirty)
+        for i in range(0, len(dirty), self.MAX_BATCH_SIZE):
+            batch = self.firestore_client.batch()
+            for volume_time in dirty[i:i + self.MAX_BATCH_SIZE]:
+                batch.set(self.collection_ref.document(volume_time), self.baselines[volume_time].to_document())
+            with metrics.external_call("firestore", "baseline_commit"):
+                batch.commit()
+            self.writes += 1
+        if dirty:
+            log.info(f"Flushed {len(dirty)} baseline documents: {dirty}")
+        self.dirty.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the Firestore round trips made by the store.
+        """
+        return {"baseline_reads": self.reads, "baseline_writes": self.writes, "baseline_buckets": len(self.baselines)}
@@ -0,0 +1,288 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+_NAN = float('nan')
+
+class CoinFrame:
+    """
+    Columnar snapshot of a CoinMarketCap listing, one row per coin in rank order.
+
+    The listing is held as arrays (struct-of-arrays keyed by CMC id) so filters and volume
+    changes are computed for every coin in a single vectorized pass, and a coin costs a
+    few array slots instead of a nested dict.
+    """
+    __slots__ = ("ids", "names", "symbols", "volume", "price", "market_cap", "_id_strs")
+
+    def __init__(self, ids: np.ndarray, names: List[str], symbols: List[str],
+                 volume: np.ndarray, price: np.ndarray, market_cap: np.ndarray):
+        self.ids = ids
+        self.names = names
+        self.symbols = symbols
+        self.volume = volume
+        self.price = price
+        self.market_cap = market_cap
+        self._id_strs = None
+
+    @classmethod
+    def from_listing(cls, coins: List[Dict]) -> "CoinFrame":
+        """
+        Builds a frame from the fetch_top_cryptos output.
+
+        Args:
+            coins (List[Dict]): Latest cryptocurrency data, in rank order.
+
+        Returns:
+            CoinFrame: The listing as columns, row i being coin i of the listing.
+        """
+        count = len(coins)
+        quotes = [coin['quote']['USD'] for coin in coins]
+        ids = np.fromiter((coin['id'] for coin in coins), dtype=np.int64, count=count)
+        # None (missing quote fields) becomes NaN and never passes the filters
+        volume = np.array([usd['volume_24h'] for usd in quotes], dtype=np.float64)
+        price = np.array([usd['price'] for usd in quotes], dtype=np.float64)
+        market_cap = np.array([usd['market_cap'] for usd in quotes], dtype=np.float64)
+        names = [coin['name'] for coin in coins]
+        symbols = [coin['symbol'] for coin in coins]
+
+        return cls(ids, names, symbols, volume, price, market_cap)
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "CoinFrame":
+        """
+        Builds a frame from compact records, e.g. the FetchData.stream_top_cryptos generator.
+
+        Records are consumed one at a time into typed buffers, so the stream is never
+        materialized as a list.
+
+        Args:
+            records (Iterable[CoinRecord]): Coins in rank order.
+
+        Returns:
+            CoinFrame: The records as columns.
+        """
+        builder = CoinFrameBuilder()
+        for record in records:
+            builder.append(record.id, record.name, record.symbol, record.volume_24h, record.market_cap, record.price)
+        return builder.build()
+
+    @classmethod
+    def concat(cls, frames: List["CoinFrame"]) -> "CoinFrame":
+        """
+        Joins page frames in order into a single frame.
+        """
+        if not frames:
+            return CoinFrameBuilder().build()
+        if len(frames) == 1:
+            return frames[0]
+        return cls(
+            np.concatenate([frame.ids for frame in frames]),
+            [name for frame in frames for name in frame.names],
+            [symbol for frame in frames for symbol in frame.symbols],
+            np.concatenate([frame.volume for frame in frames]),
+            np.concatenate([frame.price for frame in frames]),
+            np.concatenate([frame.market_cap for frame in frames])
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def head(self, count: int) -> "CoinFrame":
+        """
+        Returns the first count rows as a frame sharing this frame's arrays.
+        """
+        return CoinFrame(self.ids[:count], self.names[:count], self.symbols[:count],
+                         self.volume[:count], self.price[:count], self.market_cap[:count])
+
+    @property
+    def id_strs(self) -> List[str]:
+        """
+        Coin ids as strings, the key format of the volume_by_timeline documents.
+        """
+        if self._id_strs is None:
+            self._id_strs = [str(coin_id) for coin_id in self.ids.tolist()]
+        return self._id_strs
+
+    def eligible_mask(self, market_cap_min_usd: float, twentyfourhr_volume_min_usd: float) -> np.ndarray:
+        """
+        Returns the coins passing the min market cap and min 24h volume filter.
+        """
+        return (self.market_cap >= market_cap_min_usd) & (self.volume >= twentyfourhr_volume_min_usd)
+
+    def volume_changes(self, prev_volume: np.ndarray, prev_price: np.ndarray,
+                       eligible: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes volume change and the price-up mask for all coins at once.
+
+        Args:
+            prev_volume (np.ndarray): Baseline volume per row, NaN if missing.
+            prev_price (np.ndarray): Baseline price per row, NaN if missing.
+            eligible (np.ndarray): Rows passing the market cap/volume filter.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Volume change per row (0 when the baseline
+            volume is not positive) and the mask of candidate rows, i.e. eligible
+            coins with a baseline whose price went up.
+        """
+        has_volume = prev_volume > 0
+        volume_change = np.zeros(len(self))
+        np.divide(self.volume - prev_volume, prev_volume, out=volume_change, where=has_volume)
+        candidates = eligible & ~np.isnan(prev_volume) & (self.price > prev_price)
+        return volume_change, candidates
+
+class CoinFrameBuilder:
+    """
+    Accumulates coins into typed buffers and turns them into a CoinFrame.
+    """
+    __slots__ = ("ids", "names", "symbols", "volume", "price", "market_cap")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.volume = array('d')
+        self.price = array('d')
+        self.market_cap = array('d')
+        self.names: List[str] = []
+        self.symbols: List[str] = []
+
+    def append(self, coin_id: int, name: str, symbol: str, volume_24h: Optional[float],
+               market_cap: Optional[float], price: Optional[float]):
+        # None (missing quote fields) becomes NaN and never passes the filters
+        self.ids.append(coin_id)
+        self.volume.append(_NAN if volume_24h is None else volume_24h)
+        self.price.append(_NAN if price is None else price)
+        self.market_cap.append(_NAN if market_cap is None else market_cap)
+        self.names.append(name)
+        self.symbols.append(symbol)
+
+    def append_entry(self, coin: Dict):
+        """
+        Appends a raw listings/latest entry, keeping only the fields the pipeline uses.
+        """
+        usd = coin['quote']['USD']
+        self.append(coin['id'], coin['name'], coin['symbol'], usd['volume_24h'], usd['market_cap'], usd['price'])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self) -> CoinFrame:
+        return CoinFrame(
+            np.frombuffer(self.ids, dtype=np.int64), self.names, self.symbols,
+            np.frombuffer(self.volume), np.frombuffer(self.price), np.frombuffer(self.market_cap)
+        )
+
+class BaselineSnapshot:
+    """
+    Baseline volume and price of a volume_by_timeline bucket as arrays sorted by CMC id.
+
+    Replaces the nested {coin_id: {'initial_24hr_volume', 'price'}} dicts: aligning a
+    baseline with a CoinFrame is a vectorized searchsorted instead of a dict lookup per
+    coin, and the Firestore document is stored as three parallel arrays.
+    """
+    __slots__ = ("ids", "volume", "price")
+
+    def __init__(self, ids: np.ndarray, volume: np.ndarray, price: np.ndarray):
+        self.ids = ids
+        self.volume = volume
+        self.price = price
+
+    @classmethod
+    def empty(cls) -> "BaselineSnapshot":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_columns(cls, ids, volume, price) -> "BaselineSnapshot":
+        """
+        Builds a snapshot from unsorted columns; for duplicate ids the last row wins.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        volume = np.asarray(volume, dtype=np.float64)
+        price = np.asarray(price, dtype=np.float64)
+        # Keep the last occurrence of each id, then sort by id
+        reversed_ids = ids[::-1]
+        unique_ids, first = np.unique(reversed_ids, return_index=True)
+        rows = len(ids) - 1 - first
+        volume, price = volume[rows], price[rows]
+
+        # Both fields are needed for a usable baseline
+        incomplete = np.isnan(volume) | np.isnan(price)
+        volume[incomplete] = np.nan
+        price[incomplete] = np.nan
+        return cls(unique_ids, volume, price)
+
+    @classmethod
+    def from_frame(cls, frame: CoinFrame) -> "BaselineSnapshot":
+        """
+        Uses the current volume and price of every coin as the baseline.
+        """
+        return cls.from_columns(frame.ids, frame.volume.copy(), frame.price.copy())
+
+    @classmethod
+    def from_document(cls, document: Optional[Dict]) -> "BaselineSnapshot":
+        """
+        Deserializes a volume_by_timeline document.
+
+        Both the columnar format written by to_document() and the legacy per-coin map
+        are accepted, so existing documents are migrated on their next write.
+        """
+        if not document:
+            return cls.empty()
+        if isinstance(document.get('ids'), list):
+            return cls.from_columns(
+                document['ids'],
+                [_NAN if value is None else value for value in document['initial_24hr_volume']],
+                [_NAN if value is None else value for value in document['price']]
+            )
+
+        coins = [(int(coin_id), data) for coin_id, data in document.items() if isinstance(data, dict)]
+        return cls.from_columns(
+            [coin_id for coin_id, _ in coins],
+            [_float_or_nan(data.get('initial_24hr_volume')) for _, data in coins],
+            [_float_or_nan(data.get('price')) for _, data in coins]
+        )
+
+    def to_document(self) -> Dict[str, List]:
+        """
+        Serializes the snapshot as parallel arrays for Firestore.
+        """
+        return {
+            'ids': self.ids.tolist(),
+            'initial_24hr_volume': [None if value != value else value for value in self.volume.tolist()],
+            'price': [None if value != value else value for value in self.price.tolist()],
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def merge(self, other: "BaselineSnapshot") -> "BaselineSnapshot":
+        """
+        Returns a snapshot with the coins of both, other taking precedence.
+        """
+        return BaselineSnapshot.from_columns(
+            np.concatenate([self.ids, other.ids]),
+            np.concatenate([self.volume, other.volume]),
+            np.concatenate([self.price, other.price])
+        )
+
+    def align(self, frame: CoinFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aligns the baseline with the frame rows.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Previous volume and price per frame row, NaN
+            where the coin has no baseline.
+        """
+        prev_volume = np.full(len(frame), np.nan)
+        prev_price = np.full(len(frame), np.nan)
+        if len(self):
+            positions = np.searchsorted(self.ids, frame.ids)
+            positions[positions == len(self.ids)] = 0
+            found = self.ids[positions] == frame.ids
+            prev_volume[found] = self.volume[positions[found]]
+            prev_price[found] = self.price[positions[found]]
+        return prev_volume, prev_price
+
+def _float_or_nan(value) -> float:
+    try:
+        return _NAN if value is None else float(value)
+    except (TypeError, ValueError):
+        return _NAN
@@ -1,17 +1,46 @@
 import requests
+import math
 import os
-from typing import List, Dict
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from utils.custom_logger import log
+from utils.json_stream import iter_json_array
+from utils.metrics import metrics
+from processors.coin_frame import CoinFrame, CoinFrameBuilder
+from processors.listing_cache import FETCHED, ListingCache
 
 # Load environment variables from a .env file
 load_dotenv()
 
+# CoinMarketCap bills one credit per this many coins returned, rounded up per call
+LISTING_COINS_PER_CREDIT = 200
+QUOTES_PER_CREDIT = 100
+
+class CoinRecord(NamedTuple):
+    """
+    The fields of a listing entry the pipeline uses, without the rest of the payload.
+    """
+    id: int
+    name: str
+    symbol: str
+    volume_24h: Optional[float]
+    market_cap: Optional[float]
+    price: Optional[float]
+
+    @classmethod
+    def from_listing_entry(cls, coin: Dict) -> "CoinRecord":
+        usd = coin['quote']['USD']
+        return cls(coin['id'], coin['name'], coin['symbol'], usd['volume_24h'], usd['market_cap'], usd['price'])
+
 class FetchData:
     """
     Handles fetching cryptocurrency data from CoinMarketCap API.
     """
-    def __init__(self):
+    def __init__(self, parallelism: int = 4, listing_cache_ttl: float = 60.0):
         self.api_key = os.getenv("COINMARKET_API_KEY")
         if not self.api_key:
             log.error("API Key is missing")
@@ -19,59 +48,306 @@ class FetchData:
         self.base_url = "https://pro-api.coinmarketcap.com/v1"
         self.market_cap_min_usd = 10000000 # $10 million USD
         self.twentyfourhr_volume_min_usd = 300000 # $300k USD
+        self.chunk_size = 1000  # API allows a max of 1000 coins per request
+        self.request_timeout = 30 # seconds
+        self.parallelism = max(1, parallelism) # Max page requests in flight
+        self.stream_chunk_size = 64 * 1024 # bytes read at a time when streaming pages
+        self.quotes_chunk_size = 500 # ids per quotes request, kept well under URL length limits
+
+        # CoinMarketCap credits spent, as billed, and not spent thanks to the listing cache
+        self.credits_used = 0
+        self.credits_saved = 0
+        self._credits_lock = threading.Lock()
+        # Listing pages shared across runs for about CoinMarketCap's refresh interval
+        self.listing_cache = ListingCache(listing_cache_ttl) if listing_cache_ttl > 0 else None
+
+        # Persistent session so page requests reuse pooled TLS connections
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accepts": "application/json",
+            "X-CMC_PRO_API_KEY": self.api_key,
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.parallelism)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def set_api_key(self, api_key: str):
+        """
+        Switches to a rotated CoinMarketCap API key for subsequent requests.
+        """
+        self.api_key = api_key
+        self.session.headers["X-CMC_PRO_API_KEY"] = api_key
+
+    def _count_credits(self, endpoint: str, coins: int, coins_per_credit: int):
+        credits = max(1, math.ceil(coins / coins_per_credit))
+        with self._credits_lock:
+            self.credits_used += credits
+        metrics.inc("cmc_credits_total", credits, endpoint=endpoint)
+
+    def _count_saved(self, coins: int):
+        credits = max(1, math.ceil(coins / LISTING_COINS_PER_CREDIT))
+        with self._credits_lock:
+            self.credits_saved += credits
+        metrics.inc("cmc_credits_saved_total", credits)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Returns the listing cache counters and the credits they saved.
+        """
+        stats = self.listing_cache.stats() if self.listing_cache is not None else {}
+        return {**stats, "credits_saved": self.credits_saved}
+
+    def _page_params(self, start: int, limit: int) -> Dict:
+        return {
+            "start": start,
+            "limit": limit,
+            "convert": "USD",
+            "market_cap_min": self.market_cap_min_usd,
+            "volume_24h_min": self.twentyfourhr_volume_min_usd,
+        }
+
+    def _fetch_page(self, url: str, start: int, limit: int) -> List[Dict]:
+        """
+        Fetches a single listing page.
+
+        Args:
+            url (str): The listings endpoint.
+            start (int): Rank of the first coin of the page.
+            limit (int): Number of coins in the page.
+
+        Returns:
+            List[Dict]: The coins of the page.
+        """
+        log.info(f"Fetching data with start={start} and limit={limit}...")
+        with metrics.external_call("coinmarketcap", "listings_latest"):
+            response = self.session.get(url, params=self._page_params(start, limit), timeout=self.request_timeout)
+            response.raise_for_status()
+            data = response.json()
+
+        if "data" not in data:
+            log.error("Unexpected API response structure")
+            raise ValueError("Unexpected API response structure: Missing 'data' key.")
+        self._count_credits("listings_latest", len(data["data"]), LISTING_COINS_PER_CREDIT)
+        return data["data"]
+
+    def _fetch_page_records(self, url: str, start: int, limit: int) -> List[CoinRecord]:
+        """
+        Fetches a single listing page, parsing the body incrementally into compact records.
+
+        Args:
+            url (str): The listings endpoint.
+            start (int): Rank of the first coin of the page.
+            limit (int): Number of coins in the page.
+
+        Returns:
+            List[CoinRecord]: The coins of the page.
+        """
+        log.info(f"Streaming data with start={start} and limit={limit}...")
+        with metrics.external_call("coinmarketcap", "listings_latest"), \
+                self.session.get(url, params=self._page_params(start, limit), timeout=self.request_timeout, stream=True) as response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=self.stream_chunk_size)
+            records = [CoinRecord.from_listing_entry(coin) for coin in iter_json_array(chunks, "data")]
+        self._count_credits("listings_latest", len(records), LISTING_COINS_PER_CREDIT)
+        return records
+
+    def _fetch_page_frame(self, url: str, start: int, limit: int) -> CoinFrame:
+        """
+        Fetches a single listing page, parsing the body incrementally straight into columns.
+
+        Args:
+            url (str): The listings endpoint.
+            start (int): Rank of the first coin of the page.
+            limit (int): Number of coins in the page.
+
+        Returns:
+            CoinFrame: The coins of the page.
+        """
+        log.info(f"Streaming data with start={start} and limit={limit}...")
+        builder = CoinFrameBuilder()
+        with metrics.external_call("coinmarketcap", "listings_latest"), \
+                self.session.get(url, params=self._page_params(start, limit), timeout=self.request_timeout, stream=True) as response:
+            response.raise_for_status()
+            for coin in iter_json_array(response.iter_content(chunk_size=self.stream_chunk_size), "data"):
+                builder.append_entry(coin)
+        self._count_credits("listings_latest", len(builder), LISTING_COINS_PER_CREDIT)
+        return builder.build()
+
+    def _cached_page(self, fetch_page: Callable[[str, int, int], List], url: str, start: int, limit: int) -> List:
+        """
+        Serves a page from the listing cache or a request in flight, fetching it otherwise.
+        """
+        if self.listing_cache is None:
+            return fetch_page(url, start, limit)
+        filters = tuple(sorted((key, value) for key, value in self._page_params(start, limit).items()
+                               if key not in ("start", "limit")))
+        page, source = self.listing_cache.get((fetch_page.__name__, url, start, filters), limit,
+                                              lambda: fetch_page(url, start, limit))
+        if source != FETCHED:
+            log.info(f"Reused {source} page start={start} limit={limit}")
+            self._count_saved(len(page))
+        return page
+
+    def _fetch_pages(self, limit: int, fetch_page: Callable[[str, int, int], List]) -> Iterator[List]:
+        """
+        Yields listing pages in rank order while keeping up to self.parallelism requests in flight.
+
+        No further pages are requested once a short page shows the data has run out.
+        """
+        url = f"{self.base_url}/cryptocurrency/listings/latest"
+        starts = deque(range(1, limit + 1, self.chunk_size))
+        fetched = 0
+
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            in_flight = deque()
+
+            def submit_next():
+                start = starts.popleft()
+                in_flight.append(executor.submit(self._cached_page, fetch_page, url, start, min(self.chunk_size, limit - start + 1)))
+
+            while starts and len(in_flight) < self.parallelism:
+                submit_next()
+
+            try:
+                while in_flight:
+                    # Pages are consumed in rank order, whatever order they complete in
+                    page = in_flight.popleft().result()
+                    fetched += len(page)
+                    log.info(f"Fetched {len(page)} coins. Total so far: {fetched}")
+                    yield page
+
+                    # Stop if we've retrieved all available data
+                    if len(page) < self.chunk_size:
+                        log.info("Reached the end of available data from API.")
+                        break
+
+                    if starts:
+                        submit_next()
+            finally:
+                for future in in_flight:
+                    future.cancel()
 
     def fetch_top_cryptos(self, limit: int = 5000) -> List[Dict]:
         """
         Fetches the top cryptocurrencies by market capitalization from CoinMarketCap.
+
+        Pages are requested concurrently, up to self.parallelism at a time, and stitched
+        back together in rank order.
+
         Args:
             limit (int): Number of cryptocurrencies to fetch (max 10,000).
 
         Returns:
             List[Dict]: A list of cryptocurrency data.
         """
-        url = f"{self.base_url}/cryptocurrency/listings/latest"
-        headers = {
-            "Accepts": "application/json",
-            "X-CMC_PRO_API_KEY": self.api_key,
-        }
-        start = 1
-        chunk_size = 1000  # API allows a max of 1000 coins per request
         all_data = []
 
         try:
-            while start <= limit:
-                params = {
-                    "start": start,
-                    "limit": min(chunk_size, limit - len(all_data)),
-                    "convert": "USD",
-                    "market_cap_min": self.market_cap_min_usd,
-                    "volume_24h_min": self.twentyfourhr_volume_min_usd,
-                }
-                log.info(f"Fetching data with start={start} and limit={params['limit']}...")
-                response = requests.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if "data" in data:
-                    all_data.extend(data["data"])
-                    log.info(f"Fetched {len(data['data'])} coins. Total so far: {len(all_data)}")
-                else:
-                    log.error("Unexpected API response structure")
-                    raise ValueError("Unexpected API response structure: Missing 'data' key.")
+            for page in self._fetch_pages(limit, self._fetch_page):
+                all_data.extend(page)
+
+        except requests.exceptions.HTTPError as http_err:
+            self._log_http_error(http_err)
+        except requests.exceptions.RequestException as req_err:
+            log.error(f"Request Error: {req_err}")
+
+        return all_data
+
+    def stream_top_cryptos(self, limit: int = 5000) -> Iterator[CoinRecord]:
+        """
+        Streams the top cryptocurrencies as compact records.
+
+        Each page body is parsed incrementally and only the fields the pipeline uses are
+        kept, so the full listing payload is never held in memory.
+
+        Args:
+            limit (int): Number of cryptocurrencies to fetch (max 10,000).
+
+        Yields:
+            CoinRecord: Coins in rank order.
+        """
+        try:
+            for page in self._fetch_pages(limit, self._fetch_page_records):
+                yield from page
+
+        except requests.exceptions.HTTPError as http_err:
+            self._log_http_error(http_err)
+        except requests.exceptions.RequestException as req_err:
+            log.error(f"Request Error: {req_err}")
+
+    def fetch_snapshot(self, limit: int = 5000) -> CoinFrame:
+        """
+        Fetches the top cryptocurrencies as a single columnar snapshot.
+
+        This is the most compact form of the listing: no per-coin dict or record is kept,
+        only the columns ProcessData consumes.
 
-                # Increment the start for the next batch
-                start += chunk_size
+        Args:
+            limit (int): Number of cryptocurrencies to fetch (max 10,000).
+
+        Returns:
+            CoinFrame: Coins in rank order.
+        """
+        frames = []
 
-                # Break the loop if we've retrieved all available data
-                if len(data["data"]) < chunk_size:
-                    log.info("Reached the end of available data from API.")
-                    break
+        try:
+            for frame in self._fetch_pages(limit, self._fetch_page_frame):
+                frames.append(frame)
 
         except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 400:
-                log.error("Bad Request: Check API parameters or account limits.")
-            log.error(f"HTTP Error: {http_err}")
+            self._log_http_error(http_err)
         except requests.exceptions.RequestException as req_err:
             log.error(f"Request Error: {req_err}")
 
-        return all_data
\ No newline at end of file
+        return CoinFrame.concat(frames)
+
+    def fetch_quotes(self, coin_ids: List[int]) -> CoinFrame:
+        """
+        Fetches the latest quotes of specific coins, e.g. the hot set between full sweeps.
+
+        Costs one credit per 100 coins instead of one per 200 listed, so it only pays off
+        for a small subset of the listing.
+
+        Args:
+            coin_ids (List[int]): CoinMarketCap ids, in the order the frame should have.
+
+        Returns:
+            CoinFrame: The coins CoinMarketCap returned, in the requested order.
+        """
+        url = f"{self.base_url}/cryptocurrency/quotes/latest"
+        builder = CoinFrameBuilder()
+
+        try:
+            for i in range(0, len(coin_ids), self.quotes_chunk_size):
+                chunk = coin_ids[i:i + self.quotes_chunk_size]
+                with metrics.external_call("coinmarketcap", "quotes_latest"):
+                    response = self.session.get(url, params={"id": ",".join(map(str, chunk)), "convert": "USD"},
+                                                timeout=self.request_timeout)
+                    response.raise_for_status()
+                    data = response.json()
+
+                if "data" not in data:
+                    log.error("Unexpected API response structure")
+                    raise ValueError("Unexpected API response structure: Missing 'data' key.")
+                self._count_credits("quotes_latest", len(data["data"]), QUOTES_PER_CREDIT)
+                for coin_id in chunk:
+                    coin = data["data"].get(str(coin_id))
+                    # Lookups by id return one entry per id, but tolerate the list form of symbol lookups
+                    if isinstance(coin, list):
+                        coin = coin[0] if coin else None
+                    if coin is not None:
+                        builder.append_entry(coin)
+
+        except requests.exceptions.HTTPError as http_err:
+            self._log_http_error(http_err)
+        except requests.exceptions.RequestException as req_err:
+            log.error(f"Request Error: {req_err}")
+
+        log.info(f"Fetched quotes of {len(builder)} of {len(coin_ids)} coins")
+        return builder.build()
+
+    @staticmethod
+    def _log_http_error(http_err: requests.exceptions.HTTPError):
+        if http_err.response is not None and http_err.response.status_code == 400:
+            log.error("Bad Request: Check API parameters or account limits.")
+        log.error(f"HTTP Error: {http_err}")
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Callable, Iterable, Optional
+import numpy as np
+from processors.coin_frame import CoinFrame
+from processors.fetch_data import QUOTES_PER_CREDIT
+from processors.trigger_levels import TriggerLevels
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class HotSet:
+    """
+    Coins close to firing their first subscriber, to be re-checked between full sweeps.
+
+    A coin is hot when, in any volume_time bucket, its volume has covered at least
+    `near_ratio` of the way from its baseline to the trigger level of the lowest
+    threshold (0.5 with a 20% threshold: up 10% or more) without reaching it. Coins
+    already past the trigger were alerted by the sweep that saw them, so they aren't
+    polled. The set is rebuilt by every full sweep, closest first, capped at `max_coins`.
+    """
+    def __init__(self, near_ratio: float = 0.5, max_coins: int = 500):
+        self.near_ratio = near_ratio
+        self.max_coins = max_coins
+        self.ids = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def update(self, frame: CoinFrame, eligible: np.ndarray, levels: Iterable[TriggerLevels]):
+        """
+        Rebuilds the set from a full sweep.
+
+        Args:
+            frame (CoinFrame): The full listing of the sweep.
+            eligible (np.ndarray): Rows passing the market cap/volume filter.
+            levels (Iterable[TriggerLevels]): Trigger levels of every bucket the sweep compared against.
+        """
+        closeness = np.zeros(len(frame))
+        for bucket_levels in levels:
+            if not len(bucket_levels.ids):
+                continue
+            positions, trigger, _ = bucket_levels.align(frame)
+            prev_volume = np.where(positions >= 0, bucket_levels.volume[positions], np.nan)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                progress = (frame.volume - prev_volume) / (trigger - prev_volume)
+                # NaN (no baseline) and inf triggers (no positive baseline volume) never qualify
+                near = (trigger > prev_volume) & (progress >= self.near_ratio) & (progress < 1)
+            np.maximum(closeness, np.where(near, progress, 0), out=closeness)
+
+        rows = np.flatnonzero(eligible & (closeness > 0))
+        rows = rows[np.argsort(-closeness[rows], kind="stable")][:self.max_coins]
+        with self._lock:
+            self.ids = frame.ids[rows]
+        metrics.set("hot_set_coins", len(rows))
+
+    def discard(self, coin_ids: Iterable[str]):
+        """
+        Stops polling coins a poll already alerted on, until the next sweep.
+        """
+        discarded = np.fromiter((int(coin_id) for coin_id in coin_ids), dtype=np.int64)
+        if not len(discarded):
+            return
+        with self._lock:
+            self.ids = self.ids[~np.isin(self.ids, discarded)]
+        metrics.set("hot_set_coins", len(self.ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class CreditBudget:
+    """
+    Token bucket of CoinMarketCap credits, refilled at `credits_per_day`.
+
+    Every credit FetchData spends is debited, full sweeps included, and hot polls
+    only spend what is left. Sweeps are triggered externally and always run, so the
+    balance can go negative; polls then pause until it has refilled. The bucket
+    holds at most `burst_seconds` worth of credits, so an idle stretch doesn't save
+    up for a burst of polls.
+    """
+    def __init__(self, credits_per_day: float, burst_seconds: float = 900, clock: Callable[[], float] = time.monotonic):
+        self.rate = credits_per_day / 86400
+        self.capacity = self.rate * burst_seconds
+        self.clock = clock
+        self.balance = self.capacity
+        self._updated = clock()
+
+    def available(self) -> float:
+        now = self.clock()
+        self.balance = min(self.capacity, self.balance + (now - self._updated) * self.rate)
+        self._updated = now
+        return self.balance
+
+    def spend(self, credits: float):
+        self.available()
+        self.balance -= credits
+
+class HotPollScheduler:
+    """
+    Polls the hot set through quotes/latest every `interval_seconds` between full sweeps.
+
+    A coin crossing its threshold right after a sweep is otherwise only seen by the
+    next one, up to 15 minutes later. Each poll fetches as many of the hottest coins
+    as the credit budget allows and runs them through ProcessData as a partial run.
+    Polls are skipped while a sweep holds the run lock.
+
+    Note: like the tracking job worker, on Cloud Run the thread only gets CPU between
+    requests if the service has CPU always allocated.
+    """
+    def __init__(self, fetch_data, process, budget: CreditBudget, interval_seconds: float = 60):
+        self.fetch_data = fetch_data
+        self.process = process
+        self.budget = budget
+        self.interval_seconds = interval_seconds
+        self._credits_seen = fetch_data.credits_used
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.interval_seconds)
+                try:
+                    self.tick()
+                except Exception as e:
+                    log.error(f"Hot poll failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="hot-poll", daemon=True)
+        self._thread.start()
+        log.info(f"Started hot polling every {self.interval_seconds}s")
+
+    def _debit_spent(self):
+        # Debits everything FetchData spent since the last check, sweeps included
+        spent = self.fetch_data.credits_used - self._credits_seen
+        self._credits_seen += spent
+        if spent:
+            self.budget.spend(spent)
+
+    def tick(self) -> str:
+        """
+        Runs one poll if there is anything to poll and the budget allows it.
+
+        Returns:
+            str: The outcome: polled, empty, budget or busy.
+        """
+        self._debit_spent()
+        hot_set = self.process.hot_set
+        ids = hot_set.ids if hot_set is not None else ()
+        affordable = max(0, int(self.budget.available())) * QUOTES_PER_CREDIT
+        if not len(ids):
+            outcome = "empty"
+        elif not affordable:
+            outcome = "budget"
+        elif not self.process.run_lock.acquire(blocking=False):
+            outcome = "busy"
+        else:
+            try:
+                frame = self.fetch_data.fetch_quotes(ids[:affordable].tolist())
+                self._debit_spent()
+                if len(frame):
+                    self.process.process_volume_change(frame, partial=True)
+            finally:
+                self.process.run_lock.release()
+            outcome = "polled"
+        metrics.inc("hot_polls_total", outcome=outcome)
+        return outcome
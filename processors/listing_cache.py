@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, NamedTuple, Tuple, TypeVar
+from utils.metrics import metrics
+
+Page = TypeVar("Page")
+
+HIT = "hit"
+COALESCED = "coalesced"
+FETCHED = "fetched"
+
+class CachedPage(NamedTuple):
+    limit: int
+    fetched_at: float
+    page: object
+
+class ListingCache:
+    """
+    TTL cache of listings/latest pages shared by every run, with request coalescing.
+
+    CoinMarketCap refreshes listings about once a minute, so a page fetched within
+    `ttl_seconds` is served from memory. Pages are keyed by (kind, start, filters) and
+    remember the limit they were requested with: a request is covered by a cached page
+    with the same start and at least its limit, or by a short page (the data ran out),
+    and gets its first `limit` coins. A limit=2000 run after a limit=5000 run therefore
+    costs nothing, and only the last page of a larger limit is fetched.
+
+    Concurrent requests for a page already in flight with a large enough limit wait for
+    that request instead of sending their own. Cached pages are shared, so callers must
+    not modify them.
+    """
+    def __init__(self, ttl_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._pages: Dict[Hashable, CachedPage] = {}
+        self._in_flight: Dict[Hashable, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def head(page, limit: int):
+        """
+        Returns the first `limit` coins of a page, a list or a CoinFrame.
+        """
+        if len(page) <= limit:
+            return page
+        return page.head(limit) if hasattr(page, "head") else page[:limit]
+
+    def _fresh(self, key: Hashable, limit: int, now: float):
+        cached = self._pages.get(key)
+        if cached is None or now - cached.fetched_at >= self.ttl_seconds:
+            return None
+        if cached.limit >= limit or len(cached.page) < cached.limit:
+            return cached.page
+        return None
+
+    def get(self, key: Hashable, limit: int, fetch: Callable[[], Page]) -> Tuple[Page, str]:
+        """
+        Returns a page from the cache, from a request in flight, or by calling fetch.
+
+        Args:
+            key (Hashable): The page's kind, start and filter parameters.
+            limit (int): Number of coins requested from start.
+            fetch (Callable[[], Page]): Fetches the page with this limit.
+
+        Returns:
+            Tuple[Page, str]: The page and where it came from: hit, coalesced or fetched.
+        """
+        with self._lock:
+            page = self._fresh(key, limit, self.clock())
+            if page is not None:
+                self.hits += 1
+                metrics.inc("listing_cache_requests_total", result=HIT)
+                return self.head(page, limit), HIT
+
+            flight = self._in_flight.get(key)
+            if flight is not None and flight[0] >= limit:
+                self.coalesced += 1
+                future = flight[1]
+            else:
+                self.misses += 1
+                future = None
+                own = Future()
+                self._in_flight[key] = (limit, own)
+
+        if future is not None:
+            metrics.inc("listing_cache_requests_total", result=COALESCED)
+            return self.head(future.result(), limit), COALESCED
+
+        metrics.inc("listing_cache_requests_total", result="miss")
+        try:
+            page = fetch()
+        except BaseException as e:
+            own.set_exception(e)
+            raise
+        else:
+            own.set_result(page)
+            with self._lock:
+                now = self.clock()
+                # Keep whichever fresh page covers more
+                if self._fresh(key, limit, now) is None or len(page) >= len(self._pages[key].page):
+                    self._pages[key] = CachedPage(limit, now, page)
+                for stale in [k for k, cached in self._pages.items() if now - cached.fetched_at >= self.ttl_seconds]:
+                    del self._pages[stale]
+        finally:
+            with self._lock:
+                if self._in_flight.get(key, (None, None))[1] is own:
+                    del self._in_flight[key]
+        return page, FETCHED
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "coalesced": self.coalesced, "misses": self.misses, "pages": len(self._pages)}
@@ -0,0 +1,207 @@
+import gc
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from processors.threshold_matcher import Match, ThresholdMatcher, VolumeChange
+from utils.custom_logger import log
+
+# (shared memory name, [(column, dtype, offset, length)])
+Descriptor = Tuple[str, List[Tuple[str, str, int, int]]]
+# (volume_time, first, stop) over the candidate coins or the subscriber index of the bucket
+Shard = Tuple[str, int, int]
+
+SHARD_BY = ("subscribers", "coins")
+
+class SharedColumns:
+    """
+    Numeric columns packed into one shared memory block.
+
+    Workers attach by name and read the columns in place, so a run's data is written
+    once instead of being pickled into every task.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        layout = []
+        offset = 0
+        for name, column in columns.items():
+            layout.append((name, column.dtype.str, offset, len(column)))
+            offset += column.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, offset, length), column in zip(layout, columns.values()):
+            np.ndarray(length, dtype=dtype, buffer=self.shm.buf, offset=offset)[:] = column
+        self.descriptor: Descriptor = (self.shm.name, layout)
+
+    @staticmethod
+    def attach(descriptor: Descriptor) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        name, layout = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        columns = {
+            column: np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)
+            for column, dtype, offset, length in layout
+        }
+        return shm, columns
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def _match_shard(descriptor: Descriptor, shard_by: str, shard: Shard) -> Tuple[str, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Worker side of ParallelMatcher.match for one shard.
+
+    Returns:
+        Tuple: The volume_time and, per match, the candidate's position in the bucket,
+        the subscriber's phone position and preference index.
+    """
+    shm, columns = SharedColumns.attach(descriptor)
+    try:
+        return _match_columns(columns, shard_by, shard)
+    finally:
+        # Views into the block have to be released before it can be closed
+        columns.clear()
+        shm.close()
+
+def _match_columns(columns: Dict[str, np.ndarray], shard_by: str, shard: Shard) -> Tuple[str, np.ndarray, np.ndarray, np.ndarray]:
+    volume_time, first, stop = shard
+    changes = columns[f"{volume_time}/changes"]
+    thresholds = columns[f"{volume_time}/thresholds"]
+    if shard_by == "coins":
+        candidates = np.arange(first, stop)
+        subscriber_offset = 0
+    else:
+        candidates = np.arange(len(changes))
+        thresholds = thresholds[first:stop]
+        subscriber_offset = first
+
+    # Subscribers with threshold < volume_change form a prefix of the (sliced) sorted index
+    fired = np.searchsorted(thresholds, changes[candidates], side="left")
+    candidate = np.repeat(candidates, fired)
+    starts = np.cumsum(fired) - fired
+    subscriber = np.arange(int(fired.sum())) - np.repeat(starts, fired) + subscriber_offset
+    # Fancy indexing copies, so nothing returned refers to the shared block
+    return volume_time, candidate, columns[f"{volume_time}/phones"][subscriber], columns[f"{volume_time}/prefs"][subscriber]
+
+class ParallelMatcher:
+    """
+    Runs ThresholdMatcher.match on a pool of worker processes.
+
+    Each bucket's candidate coins and threshold-sorted subscriber index are written to
+    shared memory, then split into shards either by subscriber range or by coin range.
+    Workers return matches as integer arrays; the parent turns them back into Match
+    lists per phone in the order ThresholdMatcher.match produces, so the per-phone dedupe
+    and SMS aggregation after it are unchanged.
+
+    The pool is created on first use and kept for the lifetime of the instance.
+    """
+    def __init__(self, workers: int, shard_by: str = "subscribers", start_method: Optional[str] = None,
+                 min_subscriptions: int = 10000):
+        if shard_by not in SHARD_BY:
+            raise ValueError(f"shard_by must be one of {SHARD_BY}, got {shard_by!r}")
+        self.workers = max(1, workers)
+        self.shard_by = shard_by
+        # Forked children would inherit the logging and gRPC threads' locks
+        self.start_method = start_method or ("forkserver" if sys.platform.startswith("linux") else "spawn")
+        # Below this many subscriptions the serial matcher is faster than a pool round trip
+        self.min_subscriptions = min_subscriptions
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(self.start_method))
+            log.info("Started %d matching worker processes (%s, sharded by %s)", self.workers, self.start_method, self.shard_by)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def shards(self, sizes: Dict[str, int]) -> List[Shard]:
+        """
+        Splits every bucket into about `workers` contiguous ranges, weighted by size.
+        """
+        total = sum(sizes.values())
+        shards = []
+        for volume_time, size in sizes.items():
+            if not size:
+                continue
+            count = min(size, max(1, round(self.workers * size / total)))
+            bounds = np.linspace(0, size, count + 1).astype(int)
+            shards.extend((volume_time, int(first), int(stop)) for first, stop in zip(bounds[:-1], bounds[1:]))
+        return shards
+
+    def match(self, matcher: ThresholdMatcher, changes_by_time: Dict[str, List[VolumeChange]]) -> Dict[str, List[Match]]:
+        """
+        Same result as matcher.match(changes_by_time), computed across the worker pool.
+
+        Falls back to the serial matcher for small runs.
+        """
+        matcher.build_index()
+        changes_by_time = {volume_time: changes for volume_time, changes in changes_by_time.items()
+                           if changes and matcher.subscriptions(volume_time)}
+        subscriptions = sum(matcher.subscriptions(volume_time) for volume_time in changes_by_time)
+        if subscriptions < self.min_subscriptions:
+            return matcher.match(changes_by_time)
+
+        phone_index = {phone: i for i, phone in enumerate(matcher.phones)}
+        columns = {}
+        for volume_time, changes in changes_by_time.items():
+            thresholds, phones, prefs = matcher.index_arrays(volume_time, phone_index)
+            columns[f"{volume_time}/changes"] = np.fromiter((change.volume_change for change in changes), dtype=np.float64, count=len(changes))
+            columns[f"{volume_time}/thresholds"] = thresholds
+            columns[f"{volume_time}/phones"] = phones
+            columns[f"{volume_time}/prefs"] = prefs
+
+        if self.shard_by == "coins":
+            sizes = {volume_time: len(changes) for volume_time, changes in changes_by_time.items()}
+        else:
+            sizes = {volume_time: matcher.subscriptions(volume_time) for volume_time in changes_by_time}
+
+        shared = SharedColumns(columns)
+        try:
+            futures = [self.pool().submit(_match_shard, shared.descriptor, self.shard_by, shard) for shard in self.shards(sizes)]
+            results = [future.result() for future in futures]
+        finally:
+            shared.close()
+
+        return self.merge(matcher, changes_by_time, results)
+
+    @staticmethod
+    def merge(matcher: ThresholdMatcher, changes_by_time: Dict[str, List[VolumeChange]],
+              results: List[Tuple[str, np.ndarray, np.ndarray, np.ndarray]]) -> Dict[str, List[Match]]:
+        """
+        Groups the workers' match arrays per phone, ordered by preference then coin rank.
+        """
+        volume_times = list(changes_by_time)
+        bucket_of = {volume_time: i for i, volume_time in enumerate(volume_times)}
+        # All candidates in one list, a bucket's candidates starting at its offset
+        all_changes = [change for changes in changes_by_time.values() for change in changes]
+        offsets = np.cumsum([0] + [len(changes) for changes in changes_by_time.values()])
+        ranks = np.fromiter((change.rank for change in all_changes), dtype=np.int64, count=len(all_changes))
+
+        results = [result for result in results if len(result[1])]
+        if not results:
+            return {}
+        bucket = np.concatenate([np.full(len(candidate), bucket_of[volume_time]) for volume_time, candidate, _, _ in results])
+        position = np.concatenate([candidate for _, candidate, _, _ in results]) + offsets[bucket]
+        phones = np.concatenate([phones for _, _, phones, _ in results])
+        prefs = np.concatenate([prefs for _, _, _, prefs in results])
+
+        order = np.lexsort((ranks[position], prefs, phones))
+        bucket, position, phones, prefs = bucket[order], position[order], phones[order], prefs[order]
+        # Millions of new tuples would otherwise trigger a collection every few hundred
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            flat = list(map(Match, prefs.tolist(), map(volume_times.__getitem__, bucket.tolist()),
+                            map(all_changes.__getitem__, position.tolist())))
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        bounds = np.flatnonzero(np.diff(phones)) + 1
+        starts = [0] + bounds.tolist()
+        stops = bounds.tolist() + [len(flat)]
+        return {matcher.phones[phone]: flat[start:stop] for phone, start, stop in zip(phones[starts].tolist(), starts, stops)}
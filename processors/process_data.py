@@ -1,61 +1,257 @@
+import atexit
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from typing import Callable, Iterable, List, Dict, Optional, Tuple, Union
 from utils.custom_filter import CustomFilter
+from notifications.alert_broker import AlertBroker
+from notifications.message_packer import Alert, DigestBuffer, MessagePacker, segments
 from notifications.notification_service import Notification
+from notifications.preference_cache import PreferenceCache
+from notifications.sms_dispatcher import SmsDispatcher
+from processors.baseline_store import BaselineStore
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.fetch_data import CoinRecord
+from processors.hot_polling import HotSet
+from processors.parallel_matcher import ParallelMatcher
+from processors.redis_baseline_store import RedisBaselineStore
+from processors.threshold_matcher import ThresholdMatcher, VolumeChange
+from processors.trigger_levels import TriggerLevelCache
+from processors.volume_history import VolumeHistory
 from google.cloud import firestore
-from utils.custom_logger import log
+from utils.custom_logger import LogSampler, log
+from utils.firestore_client import get_firestore_client
+from utils.metrics import metrics
+from utils.notification_ledger import NotificationLedger
+from utils.write_behind import FirestoreWriteBehind
 
 class ProcessData:
     """
     Handles processing of cryptocurrency volume data, now integrated with Redis and notifications.
     """
-    def __init__(self, notification: Notification):
+    def __init__(self, notification: Notification, preference_cache: Optional[PreferenceCache] = None,
+                 sms_dispatcher: Optional[SmsDispatcher] = None, firestore_client: Optional[firestore.Client] = None,
+                 use_volume_history: bool = True, use_trigger_levels: bool = True,
+                 parallel_matcher: Optional[ParallelMatcher] = None, message_packer: Optional[MessagePacker] = None,
+                 digest: Optional[DigestBuffer] = None, redis_client=None, write_behind_seconds: float = 5.0,
+                 alert_broker: Optional[AlertBroker] = None, hot_set: Optional[HotSet] = None,
+                 sms_wait_seconds: float = 120.0, tracker_cleanup: bool = False):
         self.notification = notification
-        self.firestore_client = firestore.Client(project='crypto-volume-change-tracker', database='crypto-backend-db')
-        self.custom_filter = CustomFilter(self.firestore_client)
+        self.sms_dispatcher = sms_dispatcher or SmsDispatcher(notification)
+        # Use the shared Firestore client unless one is injected
+        self.firestore_client = firestore_client or get_firestore_client()
+        # Optional Redis hot state for baselines and dedupe counters, Firestore written behind
+        self.redis_client = redis_client
+        self.write_behind = FirestoreWriteBehind(self.firestore_client, write_behind_seconds) if redis_client is not None else None
+        self.custom_filter = CustomFilter(self.firestore_client, redis_client, self.write_behind,
+                                          cleanup_on_reset=tracker_cleanup)
+        # Prefer the cache shared with NotificationRegistry so steady-state runs don't read preferences
+        self.preference_cache = preference_cache or PreferenceCache(self.firestore_client)
+        # Rolling 15-minute samples answering each volume_time; kept across runs
+        self.volume_history = VolumeHistory(self.firestore_client) if use_volume_history else None
+        # Per-coin trigger levels of the previous run's baselines; kept across runs
+        self.trigger_levels = TriggerLevelCache() if use_trigger_levels else None
+        # Optional process pool for the match stage, serial when None
+        self.parallel_matcher = parallel_matcher
+        self.message_packer = message_packer or MessagePacker()
+        # Optional per-phone digest merging alerts across runs, sent right away when None
+        self.digest = digest
+        if digest is not None:
+            # Held alerts live in memory, send them rather than lose them on shutdown
+            atexit.register(self.flush_digest)
+        # Optional /alerts/stream fan-out, fed as soon as each bucket's changes are known
+        self.alert_broker = alert_broker
+        # Optional coins near a trigger level, rebuilt by each full sweep for the hot poller
+        self.hot_set = hot_set
+        # Held by a run so hot polls never overlap a sweep
+        self.run_lock = threading.Lock()
+        # Upper bound on waiting for a run's SMS, so a stalled send can't hold run_lock
+        self.sms_wait_seconds = sms_wait_seconds
 
         self.market_cap_min_usd = 10000000 # $10 million USD
         self.twentyfourhr_volume_min_usd = 300000 # $300k USD
 
-    def process_volume_change(self, new_data: List[Dict]):
+    @staticmethod
+    def in_reset_window(utc_now: datetime) -> bool:
         """
-        Processes the volume data and checks for significant positive changes.
+        Checks if we're within the baseline reset time range (00:00 to 00:20 UTC).
+        """
+        reset_time_start = datetime(utc_now.year, utc_now.month, utc_now.day, 0, 0, 0, tzinfo=timezone.utc)
+        reset_time_end = reset_time_start + timedelta(minutes=20)
+        return reset_time_start <= utc_now <= reset_time_end
+
+    @staticmethod
+    def to_frame(new_data: Union[List[Dict], Iterable[CoinRecord], CoinFrame]) -> CoinFrame:
+        """
+        Converts any supported listing representation into a CoinFrame.
+        """
+        if isinstance(new_data, CoinFrame):
+            return new_data
+        if isinstance(new_data, list) and new_data and isinstance(new_data[0], dict):
+            return CoinFrame.from_listing(new_data)
+        return CoinFrame.from_records(new_data)
+
+    @staticmethod
+    def record_firestore_metrics(round_trips: Dict[str, Tuple[int, int]]):
+        """
+        Records the Firestore (reads, writes) round trips of one run per component.
+        """
+        if not metrics.enabled:
+            return
+        for component, (reads, writes) in round_trips.items():
+            metrics.inc("firestore_reads_total", reads, component=component)
+            metrics.inc("firestore_writes_total", writes, component=component)
+        for op, total in (("read", sum(r for r, _ in round_trips.values())), ("write", sum(w for _, w in round_trips.values()))):
+            metrics.observe("firestore_round_trips_per_run", total, op=op)
+            metrics.set("firestore_round_trips_last_run", total, op=op)
+
+    def create_baseline_store(self) -> BaselineStore:
+        if self.redis_client is not None:
+            return RedisBaselineStore(self.firestore_client, self.redis_client, self.write_behind)
+        return BaselineStore(self.firestore_client)
+
+    def compute_changes(self, matcher: ThresholdMatcher, volume_time: str, frame: CoinFrame,
+                        baseline: BaselineSnapshot, eligible, run_log: LogSampler) -> List[VolumeChange]:
+        """
+        Computes the candidate coins of a bucket, only touching coins past their trigger level.
+
+        Counts the coins evaluated and skipped for the run's skip ratio.
+        """
+        levels = None
+        if self.trigger_levels is not None:
+            levels = self.trigger_levels.get(volume_time, baseline, matcher.min_threshold(volume_time))
+        changes = matcher.compute_changes(frame, baseline, eligible, levels)
+        run_log.count("coin_evaluations", len(changes))
+        run_log.count("coin_evaluations_skipped", len(frame) - len(changes))
+        if self.alert_broker is not None and self.alert_broker.client_count():
+            self.publish_alerts(matcher, volume_time, changes)
+        return changes
+
+    def publish_alerts(self, matcher: ThresholdMatcher, volume_time: str, changes: List[VolumeChange]):
+        """
+        Streams the changes of a bucket that fire at least one subscription, before dedupe and SMS.
+        """
+        events = []
+        for change in changes:
+            subscribers = matcher.fired_count(volume_time, change.volume_change)
+            if subscribers:
+                events.append({
+                    "coin_id": change.coin_id,
+                    "name": change.coin_name,
+                    "symbol": change.symbol,
+                    "volume_time": volume_time,
+                    "volume_change": round(change.volume_change * 100, 2),
+                    "price": change.current_price,
+                    "subscribers": subscribers,
+                })
+        self.alert_broker.publish(events)
+
+    def make_alert(self, volume_time: str, change: VolumeChange) -> Alert:
+        return Alert(
+            change.coin_id, change.volume_change,
+            f"{self.message_packer.bullet} {change.coin_name} ({change.symbol}): {round(change.volume_change * 100, 2)}% increase over {volume_time}. Curr Price: {round(change.current_price, 8)}",
+            change.coin_name
+        )
+
+    @staticmethod
+    def reserve_alerts(ledger: NotificationLedger, pending: Dict[str, List], coin: Callable) -> Dict[str, List]:
+        """
+        Reserves a dedupe slot for each pending item and commits the counters in one go.
 
         Args:
-            new_data (List[Dict]): Latest cryptocurrency data.
+            ledger (NotificationLedger): The run's ledger; confirm() tells which reservations were granted.
+            pending (Dict[str, List]): Items to send per phone.
+            coin (Callable): Returns the (coin_id, coin_name) of an item.
+
+        Returns:
+            Dict[str, List]: The items that got a reservation, per phone.
         """
-        # First, check and reset tracker if needed
-        self.custom_filter.check_and_reset_tracker()
+        reserved = {}
+        try:
+            ledger.prefetch((phone, coin(item)[0]) for phone, items in pending.items() for item in items)
+            reserved = {
+                phone: [item for item in items if ledger.reserve(phone, *coin(item))]
+                for phone, items in pending.items()
+            }
+            ledger.commit()
+        except Exception as e:
+            # Keep the reservations: confirm() still sends whatever was committed before the error
+            log.error(f"Error updating notification tracker: {e}")
+        log.info("Notification ledger round trips: %s", ledger.stats())
+        metrics.inc("notifications_capped_total", ledger.capped)
+        return reserved
 
-        notifications = []
+    def send_digests(self, ledger: NotificationLedger, released: List[Tuple[str, List[Alert]]], run_log: LogSampler) -> List:
+        """
+        Dedupes the alerts of released digests against the per-day cap and queues what is left.
 
-        sent_notifications = set()
+        Returns:
+            List[Future[SmsResult]]: One future per queued message.
+        """
+        if not released:
+            return []
+        reserved = self.reserve_alerts(ledger, dict(released), lambda alert: (alert.coin_id, alert.coin_name))
+        futures = []
+        for phone, alerts in reserved.items():
+            alerts = [alert for alert in alerts if ledger.confirm(phone, alert.coin_id)]
+            if alerts:
+                run_log.count("digests_sent")
+                futures.extend(self.send_alerts(phone, alerts, run_log))
+        return futures
 
-        # Retrieve notification registry info
-        preferences_ref = self.firestore_client.collection('notification_preferences')
+    def flush_digest(self):
+        """
+        Sends every held digest now, e.g. at shutdown.
+        """
+        if self.digest is None or not self.digest.pending():
+            return
+        # Don't interleave with a run still in flight, but don't hang shutdown on it either
+        locked = self.run_lock.acquire(timeout=self.sms_wait_seconds)
+        try:
+            run_log = LogSampler(log)
+            futures = self.send_digests(self.custom_filter.create_ledger(), self.digest.drain(), run_log)
+            if futures:
+                log.info("Flushed digests, SMS dispatch report: %s",
+                         self.sms_dispatcher.wait(futures, timeout=self.sms_wait_seconds))
+        finally:
+            if locked:
+                self.run_lock.release()
 
-        # Get the current UTC time
-        utc_now = datetime.now(timezone.utc)
-        log.info(f"Current UTC time: {utc_now}")
+    def send_alerts(self, phone: str, alerts: List[Alert], run_log: LogSampler) -> List:
+        """
+        Packs a phone's alerts into as few SMS segments as possible and queues every message.
 
-        # Check if we're within the reset time range (00:00 to 00:20 UTC)
-        reset_time_start = datetime(utc_now.year, utc_now.month, utc_now.day, 0, 0, 0, tzinfo=timezone.utc)
-        reset_time_end = reset_time_start + timedelta(minutes=20)
+        Returns:
+            List[Future[SmsResult]]: One future per queued message.
+        """
+        futures = []
+        for message in self.message_packer.pack(alerts):
+            message_segments = segments(message)
+            run_log.event("sms_queued", "Sending bulk SMS Notification to %s: %d characters, %d segments",
+                          phone, len(message), message_segments)
+            run_log.count("sms_messages")
+            run_log.count("sms_segments", message_segments)
+            metrics.inc("sms_segments_total", message_segments)
+            futures.append(self.sms_dispatcher.submit(message, phone=phone))
+        return futures
 
-        # If current time is after 00:20, calculate the time remaining to the next reset (00:00 UTC the next day)
-        if utc_now > reset_time_end:
-            # The next reset time is the next day at 00:00 UTC
-            reset_time_start = datetime(utc_now.year + (1 if utc_now.month == 12 and utc_now.day == 31 else 0),
-                                 utc_now.month, utc_now.day + (1 if utc_now.hour >= 20 else 0), 0, 0, 0, tzinfo=timezone.utc)
-            reset_time_end = reset_time_start + timedelta(minutes=20)
-        # time_until_reset = reset_time_start - utc_now
+    def load_subscribers(self, run_log: Optional[LogSampler] = None) -> ThresholdMatcher:
+        """
+        Loads notification preferences from the cache into a threshold-indexed matcher.
 
-        for doc in preferences_ref.stream():
-            phone = doc.id
+        Args:
+            run_log (Optional[LogSampler]): Run counters; preference documents are only sampled.
+
+        Returns:
+            ThresholdMatcher: Matcher holding every valid preference.
+        """
+        run_log = run_log or LogSampler(log)
+        matcher = ThresholdMatcher(self.market_cap_min_usd, self.twentyfourhr_volume_min_usd)
+
+        for phone, preferences_data in self.preference_cache.items():
+            matcher.add_phone(phone)
             try:
                 # Get preferences for the current phone number
-                preferences_data = doc.to_dict()
-                log.info(preferences_data)
+                run_log.event("preference_docs", "Preferences for %s: %s", phone, preferences_data)
                 preferences = preferences_data.get("preferences", [])
 
                 # Ensure preferences is a list
@@ -63,9 +259,9 @@ class ProcessData:
                     log.error(f"Invalid preferences format for phone {phone}: {preferences_data}")
                     continue
 
-                for pref in preferences:
-                    volume_time = pref['volume_time']
-                    volume_percentage = pref['volume_percentage'] / 100
+                for pref_index, pref in enumerate(preferences):
+                    volume_time = pref.get('volume_time')
+                    volume_percentage = pref.get('volume_percentage')
 
                     if not volume_time or not isinstance(volume_time, str):
                         log.error(f"Missing or invalid volume_time for phone {phone}: {pref}")
@@ -74,72 +270,195 @@ class ProcessData:
                     if volume_percentage is None or not isinstance(volume_percentage, (int, float)):
                         log.error(f"Missing or invalid volume_percentage for phone {phone}: {pref}")
                         continue
-                    
-                    volume_doc = self.firestore_client.collection("volume_by_timeline").document(volume_time).get()
-                    volume_data = volume_doc.to_dict() if volume_doc.exists else {}
-
-                    for coin in new_data:
-                        coin_id = str(coin['id'])
-                        coin_name = coin['name']
-                        symbol = coin['symbol']
-                        current_volume = coin['quote']['USD']['volume_24h']
-                        market_cap = coin['quote']['USD']['market_cap']
-                        current_price = coin['quote']['USD']['price']
-
-                        # Reset initial 24-hour volume if within the reset time
-                        if reset_time_start <= utc_now <= reset_time_end:
-                            volume_data[coin_id] = {'initial_24hr_volume': current_volume, 'price': current_price}
-                            log.info(f"Reset initial volume for {coin_name} ({symbol}) to {current_volume} at time: {utc_now}")
-                            continue
-                        # else:
-                        #     # Log the time remaining until the next reset (00:00 to 00:20 UTC)
-                        #     hours, remainder = divmod(time_until_reset.seconds, 3600)
-                        #     minutes, _ = divmod(remainder, 60)
-
-                        if float(market_cap) < self.market_cap_min_usd or float(current_volume) < self.twentyfourhr_volume_min_usd:
-                            log.info(f"Skipping {coin_name} ({symbol}) due to low market cap or volume")
-                            continue
-
-                        # Retrieve initial 24-hour volume from DB
-                        prev_data = volume_data.get(coin_id)
-                        if prev_data and 'initial_24hr_volume' in prev_data and 'price' in prev_data:
-                            prev_volume, prev_price = float(prev_data['initial_24hr_volume']), float(prev_data['price'])
-
-                            volume_change = (current_volume - prev_volume) / prev_volume if prev_volume > 0 else 0
-                            
-                            # Check for positive volume change > specified percentage
-                            if volume_change > volume_percentage and current_price > prev_price:
-                                if self.custom_filter.should_send_notification(phone, coin_id, coin_name=coin_name):
-                                    if coin_id not in sent_notifications:
-                                        sent_notifications.add(coin_id)
-                                        notifications.append(
-                                            f"🚀 {coin_name} ({symbol}): {round(volume_change * 100, 2)}% increase over {volume_time}. Curr Price: {round(current_price, 8)}"
-                                        )
-
-                # Update Firestore with the new volume
-                try:
-                    self.firestore_client.collection("volume_by_timeline").document(volume_time).set(volume_data)
-                except Exception as e:
-                    log.error(f"Error updating Firestore for volume_time {volume_time}: {str(e)}")
+
+                    matcher.add_subscriber(phone, pref_index, volume_time, volume_percentage / 100)
+                    run_log.count("subscriptions")
 
             except Exception as e:
                 log.error(f"Error processing preferences for phone {phone}: {e}")
 
-            # Send bulk SMS if there are notifications
-            if notifications:
-                bulk_message = (
-                    "🚀 Positive Volume Changes Detected 🚀:\n\n"
-                    + "\n".join(notifications)
-                )
-                log.info(f"Sending bulk SMS Notification: {bulk_message} {len(bulk_message)}")
-
-                encoded_message = bulk_message.encode('utf-8')
-                if len(encoded_message) > 1600:
-                    log.info("Truncating the bulked SMS message since it is greater than the threshold")
-                    truncated_message = encoded_message[:1599].decode('utf-8', errors='ignore') # Truncate to 1600
-                    bulk_message = truncated_message
-                    log.info(f"Truncated message length: {len(bulk_message.encode('utf-8'))}")
-
-                self.notification.send_bulk_sms(bulk_message, phone=phone)
-            else:
-                log.info("No positive volume detected for given threshold")
+        log.info("Preference cache stats: %s", self.preference_cache.stats())
+        return matcher
+
+    def process_volume_change(self, new_data: Union[List[Dict], Iterable[CoinRecord], CoinFrame],
+                              progress: Optional[Callable[[str], None]] = None, partial: bool = False):
+        """
+        Processes the volume data and checks for significant positive changes.
+
+        Args:
+            new_data (Union[List[Dict], Iterable[CoinRecord], CoinFrame]): Latest cryptocurrency
+                data, as raw listing entries, a stream of compact records or an already built frame.
+            progress (Optional[Callable[[str], None]]): Called with the name of each stage as it starts.
+            partial (bool): The data is a subset of the listing, e.g. a hot set poll. Baselines and
+                volume history are compared against but never reset or recorded from it.
+        """
+        progress = progress or (lambda stage: None)
+        run_log = LogSampler(log)
+        # Round-trip counters of the long-lived components, to compute this run's share
+        filter_reads, filter_writes = self.custom_filter.reads, self.custom_filter.writes
+        preference_refreshes = self.preference_cache.refreshes
+        history_reads = self.volume_history.reads if self.volume_history else 0
+        history_writes = self.volume_history.writes if self.volume_history else 0
+
+        # First, check and reset tracker if needed
+        progress("load_subscribers")
+        self.custom_filter.check_and_reset_tracker()
+
+        notifications = []
+
+        sent_notifications = set()
+
+        # Get the current UTC time
+        utc_now = datetime.now(timezone.utc)
+        log.info("Current UTC time: %s", utc_now)
+        reset_baseline = self.in_reset_window(utc_now)
+
+        # Retrieve notification registry info
+        matcher = self.load_subscribers(run_log)
+
+        # Convert the listing into columns once per run
+        frame = self.to_frame(new_data)
+        eligible = frame.eligible_mask(self.market_cap_min_usd, self.twentyfourhr_volume_min_usd)
+        eligible_count = int(eligible.sum())
+        run_log.count("coins", len(frame))
+        run_log.count("coins_below_thresholds", len(frame) - eligible_count)
+        metrics.inc("coins_processed_total", len(frame))
+        metrics.inc("coins_eligible_total", eligible_count)
+
+        # Load every baseline bucket used by this run in one round trip
+        progress("compute_changes")
+        changes_by_time = {}
+        baselines = {}
+        daily_times = matcher.volume_times()
+        if self.volume_history is not None:
+            slot = self.volume_history.slot_of(utc_now)
+            history_times = [volume_time for volume_time in daily_times if self.volume_history.supports(volume_time)]
+            self.volume_history.load(slot - self.volume_history.lookback(volume_time) for volume_time in history_times)
+
+            # Compare against the sample volume_time ago; until the ring reaches that far
+            # back (or for values it can't parse) the daily baseline below is used instead
+            for volume_time in history_times:
+                if self.volume_history.has_sample(slot - self.volume_history.lookback(volume_time)):
+                    baselines[volume_time] = self.volume_history.baseline(volume_time, slot)
+                    changes_by_time[volume_time] = self.compute_changes(
+                        matcher, volume_time, frame, baselines[volume_time], eligible, run_log)
+            daily_times = [volume_time for volume_time in daily_times if volume_time not in changes_by_time]
+
+            if not partial:
+                self.volume_history.record(frame, slot)
+                try:
+                    self.volume_history.flush()
+                except Exception as e:
+                    log.error(f"Error updating Firestore volume history: {str(e)}")
+            log.info("Volume history: %s", self.volume_history.stats())
+
+        if reset_baseline and partial:
+            # Daily baselines are only reset from full sweeps, polls skip them meanwhile
+            daily_times = []
+
+        # Load every daily baseline bucket still used by this run in one round trip
+        baseline_store = self.create_baseline_store()
+        baseline_store.load(daily_times)
+
+        # Compute each coin's change once per volume_time bucket
+        if reset_baseline:
+            # Reset initial 24-hour volume if within the reset time
+            reset_snapshot = BaselineSnapshot.from_frame(frame)
+            for volume_time in daily_times:
+                baseline_store.update(volume_time, reset_snapshot)
+                log.info("Reset initial volume of %d coins for %s at time: %s", len(reset_snapshot), volume_time, utc_now)
+        else:
+            for volume_time in daily_times:
+                baselines[volume_time] = baseline_store.get(volume_time)
+                changes_by_time[volume_time] = self.compute_changes(
+                    matcher, volume_time, frame, baselines[volume_time], eligible, run_log)
+
+        # Update Firestore with the new volumes
+        try:
+            baseline_store.flush()
+        except Exception as e:
+            log.error(f"Error updating Firestore baselines: {str(e)}")
+        log.info("Baseline store round trips: %s", baseline_store.stats())
+
+        # Share of coin x bucket evaluations skipped because the coin didn't reach its trigger level
+        evaluated, skipped = run_log.counts["coin_evaluations"], run_log.counts["coin_evaluations_skipped"]
+        if evaluated + skipped:
+            skip_ratio = skipped / (evaluated + skipped)
+            log.info("Skipped %d of %d coin evaluations (skip ratio %.4f)", skipped, evaluated + skipped, skip_ratio)
+            metrics.inc("coin_evaluations_skipped_total", skipped)
+            metrics.set("coin_skip_ratio_last_run", skip_ratio)
+        if self.hot_set is not None and not partial:
+            levels = self.trigger_levels or TriggerLevelCache()
+            self.hot_set.update(frame, eligible, [
+                levels.get(volume_time, baseline, matcher.min_threshold(volume_time))
+                for volume_time, baseline in baselines.items()
+            ])
+            log.info("Hot set: %d coins near a trigger level", len(self.hot_set))
+        if self.trigger_levels is not None:
+            self.trigger_levels.retain(matcher.volume_times())
+
+        progress("match")
+        if self.parallel_matcher is not None:
+            matches = self.parallel_matcher.match(matcher, changes_by_time)
+        else:
+            matches = matcher.match(changes_by_time)
+        match_count = sum(len(phone_matches) for phone_matches in matches.values())
+        run_log.count("matches", match_count)
+        metrics.inc("matches_total", match_count)
+        if self.hot_set is not None and partial:
+            # Polled coins that fired are left to the sweeps from here on
+            self.hot_set.discard({match.change.coin_id for phone_matches in matches.values() for match in phone_matches})
+
+        ledger = self.custom_filter.create_ledger()
+        sms_futures = []
+        if self.digest is None:
+            # Decide every send in memory, then commit all dedupe counters at once
+            progress("dedupe")
+            reserved = self.reserve_alerts(ledger, matches, lambda match: (match.change.coin_id, match.change.coin_name))
+
+            progress("send_sms")
+            for phone in matcher.phones:
+                for _, volume_time, change in reserved.get(phone, []):
+                    if ledger.confirm(phone, change.coin_id):
+                        if change.coin_id not in sent_notifications:
+                            sent_notifications.add(change.coin_id)
+                            notifications.append(self.make_alert(volume_time, change))
+
+                if not notifications:
+                    run_log.count("phones_without_alerts")
+                else:
+                    sms_futures.extend(self.send_alerts(phone, notifications, run_log))
+        else:
+            # Hold each phone's alerts, merged per coin, and only count what a digest releases
+            for phone in matcher.phones:
+                alerts = [self.make_alert(volume_time, change) for _, volume_time, change in matches.get(phone, [])]
+                if not alerts:
+                    run_log.count("phones_without_alerts")
+                else:
+                    self.digest.add(phone, alerts)
+
+            progress("dedupe")
+            released = self.digest.due()
+            progress("send_sms")
+            sms_futures.extend(self.send_digests(ledger, released, run_log))
+            run_log.count("digest_alerts_pending", self.digest.pending())
+
+        metrics.observe("sms_segments_per_run", run_log.counts["sms_segments"])
+        if sms_futures:
+            report = self.sms_dispatcher.wait(sms_futures, timeout=self.sms_wait_seconds)
+            log.info("SMS dispatch report: %s", report)
+            if report["pending"]:
+                # Still sending on the dispatcher pool; they finish without blocking the next run
+                log.warning(f"{report['pending']} SMS still pending after {self.sms_wait_seconds}s")
+
+        self.record_firestore_metrics({
+            "custom_filter": (self.custom_filter.reads - filter_reads, self.custom_filter.writes - filter_writes),
+            "preference_cache": (self.preference_cache.refreshes - preference_refreshes, 0),
+            "baseline_store": (baseline_store.reads, baseline_store.writes),
+            "volume_history": (
+                (self.volume_history.reads - history_reads, self.volume_history.writes - history_writes)
+                if self.volume_history else (0, 0)
+            ),
+            "notification_ledger": (ledger.reads, ledger.writes),
+        })
+        run_log.log_summary("Volume change run summary")
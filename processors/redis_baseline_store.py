@@ -0,0 +1,94 @@
+from typing import Dict, Iterable
+import numpy as np
+from google.cloud import firestore
+from processors.baseline_store import BaselineStore
+from processors.coin_frame import BaselineSnapshot
+from utils.custom_logger import log
+from utils.metrics import metrics
+from utils.write_behind import FirestoreWriteBehind
+
+class RedisBaselineStore(BaselineStore):
+    """
+    BaselineStore keeping the volume_by_timeline buckets in Redis, shared by every instance.
+
+    Each bucket is a hash `baseline:<volume_time>` holding the id, volume and price
+    columns as raw little-endian arrays, and all buckets of a run are read with one
+    pipelined round trip. Buckets Redis doesn't have yet are read from Firestore and
+    copied over on flush. Changed buckets are written to Redis at the end of the run
+    and queued on the write-behind for Firestore, which stays the durable copy.
+    """
+    KEY_PREFIX = "baseline:"
+
+    def __init__(self, firestore_client: firestore.Client, redis_client, write_behind: FirestoreWriteBehind,
+                 collection_name: str = "volume_by_timeline"):
+        super().__init__(firestore_client, collection_name)
+        self.collection_name = collection_name
+        self.redis = redis_client
+        self.write_behind = write_behind
+        # Buckets read from Firestore that Redis should get on flush
+        self.backfill = set()
+        self.redis_reads = 0
+        self.redis_writes = 0
+
+    def load(self, volume_times: Iterable[str]):
+        missing = [volume_time for volume_time in dict.fromkeys(volume_times) if volume_time not in self.baselines]
+        if not missing:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for volume_time in missing:
+            pipe.hgetall(self.KEY_PREFIX + volume_time)
+        with metrics.external_call("redis", "baseline_hgetall"):
+            hashes = pipe.execute()
+        self.redis_reads += 1
+
+        cold = []
+        for volume_time, fields in zip(missing, hashes):
+            if fields:
+                self.baselines[volume_time] = self.from_hash(fields)
+            else:
+                cold.append(volume_time)
+        if cold:
+            super().load(cold)
+            self.backfill.update(cold)
+        log.info("Loaded %d baselines from Redis, %d from Firestore", len(missing) - len(cold), len(cold))
+
+    @staticmethod
+    def to_hash(snapshot: BaselineSnapshot) -> Dict[str, bytes]:
+        return {
+            "ids": snapshot.ids.astype("<i8").tobytes(),
+            "volume": snapshot.volume.astype("<f8").tobytes(),
+            "price": snapshot.price.astype("<f8").tobytes(),
+        }
+
+    @staticmethod
+    def from_hash(fields: Dict[bytes, bytes]) -> BaselineSnapshot:
+        return BaselineSnapshot(
+            np.frombuffer(fields[b"ids"], dtype="<i8").astype(np.int64),
+            np.frombuffer(fields[b"volume"], dtype="<f8").astype(np.float64),
+            np.frombuffer(fields[b"price"], dtype="<f8").astype(np.float64),
+        )
+
+    def flush(self):
+        """
+        Writes changed and backfilled buckets to Redis and queues changed ones for Firestore.
+        """
+        buckets = sorted(self.dirty | self.backfill)
+        if buckets:
+            pipe = self.redis.pipeline(transaction=False)
+            for volume_time in buckets:
+                pipe.hset(self.KEY_PREFIX + volume_time, mapping=self.to_hash(self.baselines[volume_time]))
+            with metrics.external_call("redis", "baseline_hset"):
+                pipe.execute()
+            self.redis_writes += 1
+        for volume_time in sorted(self.dirty):
+            self.write_behind.put(self.collection_name, volume_time, self.baselines[volume_time].to_document())
+        if self.dirty:
+            log.info("Flushed %d baselines to Redis, queued for Firestore: %s", len(self.dirty), sorted(self.dirty))
+        self.dirty.clear()
+        self.backfill.clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats.update({"redis_reads": self.redis_reads, "redis_writes": self.redis_writes})
+        return stats
@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from processors.trigger_levels import TriggerLevels
+
+class VolumeChange(NamedTuple):
+    """
+    A coin whose volume moved above its baseline while its price went up.
+    """
+    rank: int
+    coin_id: str
+    coin_name: str
+    symbol: str
+    volume_change: float
+    current_price: float
+
+class Match(NamedTuple):
+    """
+    A subscriber preference that fired for a coin.
+    """
+    pref_index: int
+    volume_time: str
+    change: VolumeChange
+
+class ThresholdMatcher:
+    """
+    Matches coin volume changes against subscriber thresholds.
+
+    Volume changes are computed once per volume_time bucket and subscribers are kept in
+    a threshold-sorted index per bucket, so a run costs coins + subscribers + matches
+    instead of phones x preferences x coins.
+    """
+    def __init__(self, market_cap_min_usd: float, twentyfourhr_volume_min_usd: float):
+        self.market_cap_min_usd = market_cap_min_usd
+        self.twentyfourhr_volume_min_usd = twentyfourhr_volume_min_usd
+
+        self.phones: List[str] = []
+        # volume_time -> [(threshold, phone, pref_index)], sorted on build_index()
+        self._subscribers: Dict[str, List[Tuple[float, str, int]]] = defaultdict(list)
+        self._thresholds: Dict[str, List[float]] = {}
+
+    def add_phone(self, phone: str):
+        """
+        Registers a phone in stream order, even if it has no valid preferences.
+        """
+        self.phones.append(phone)
+
+    def add_subscriber(self, phone: str, pref_index: int, volume_time: str, volume_percentage: float):
+        """
+        Adds a single preference of a phone to the index.
+
+        Args:
+            phone (str): The subscriber's phone number.
+            pref_index (int): Position of the preference in the phone's preference list.
+            volume_time (str): The baseline bucket the preference compares against.
+            volume_percentage (float): Threshold as a fraction (0.2 for 20%).
+        """
+        self._subscribers[volume_time].append((volume_percentage, phone, pref_index))
+        self._thresholds.pop(volume_time, None)
+
+    def volume_times(self) -> List[str]:
+        """
+        Returns the distinct volume_time buckets with at least one subscriber.
+        """
+        return list(self._subscribers.keys())
+
+    def build_index(self):
+        """
+        Sorts subscribers of every bucket by threshold.
+        """
+        for volume_time, subscribers in self._subscribers.items():
+            if volume_time not in self._thresholds:
+                subscribers.sort(key=lambda subscriber: subscriber[0])
+                self._thresholds[volume_time] = [subscriber[0] for subscriber in subscribers]
+
+    def subscriptions(self, volume_time: str) -> int:
+        return len(self._subscribers.get(volume_time, ()))
+
+    def index_arrays(self, volume_time: str, phone_index: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the sorted index of a bucket as threshold, phone position and preference index arrays.
+        """
+        self.build_index()
+        subscribers = self._subscribers.get(volume_time, [])
+        count = len(subscribers)
+        return (
+            np.array(self._thresholds.get(volume_time, []), dtype=np.float64),
+            np.fromiter((phone_index[phone] for _, phone, _ in subscribers), dtype=np.int64, count=count),
+            np.fromiter((pref_index for _, _, pref_index in subscribers), dtype=np.int64, count=count),
+        )
+
+    def min_threshold(self, volume_time: str) -> float:
+        """
+        Returns the lowest threshold of a bucket, inf if it has no subscribers.
+        """
+        self.build_index()
+        thresholds = self._thresholds.get(volume_time)
+        return thresholds[0] if thresholds else float('inf')
+
+    def fired_count(self, volume_time: str, volume_change: float) -> int:
+        """
+        Returns how many subscriptions of a bucket have a threshold below volume_change.
+        """
+        self.build_index()
+        return bisect_left(self._thresholds.get(volume_time, []), volume_change)
+
+    def compute_changes(self, frame: CoinFrame, baseline: BaselineSnapshot, eligible: Optional[np.ndarray] = None,
+                        levels: Optional[TriggerLevels] = None) -> List[VolumeChange]:
+        """
+        Computes the volume change of every coin against a bucket baseline.
+
+        Only coins that pass the market cap/volume filter, have a baseline, and whose
+        price went up are returned, since no subscriber can fire on the others. With
+        trigger levels, coins that didn't cross the lowest threshold are skipped too.
+
+        Args:
+            frame (CoinFrame): Latest cryptocurrency data as columns, in rank order.
+            baseline (BaselineSnapshot): The volume_by_timeline baseline of the bucket.
+            eligible (Optional[np.ndarray]): Precomputed market cap/volume filter of the frame.
+            levels (Optional[TriggerLevels]): Precomputed trigger levels of the baseline.
+
+        Returns:
+            List[VolumeChange]: Candidate coins in rank order.
+        """
+        if eligible is None:
+            eligible = frame.eligible_mask(self.market_cap_min_usd, self.twentyfourhr_volume_min_usd)
+
+        if levels is not None:
+            rows, volume_change = levels.candidates(frame, eligible)
+            changes = volume_change.tolist()
+        else:
+            prev_volume, prev_price = baseline.align(frame)
+            volume_change, candidates = frame.volume_changes(prev_volume, prev_price, eligible)
+            rows = np.flatnonzero(candidates)
+            changes = volume_change[rows].tolist()
+
+        id_strs = frame.id_strs
+        return [
+            VolumeChange(rank, id_strs[rank], frame.names[rank], frame.symbols[rank], change, price)
+            for rank, change, price in zip(rows.tolist(), changes, frame.price[rows].tolist())
+        ]
+
+    def match(self, changes_by_time: Dict[str, List[VolumeChange]]) -> Dict[str, List[Match]]:
+        """
+        Finds every (subscriber, coin) pair whose volume change exceeds the threshold.
+
+        Args:
+            changes_by_time (Dict[str, List[VolumeChange]]): Candidate coins per bucket.
+
+        Returns:
+            Dict[str, List[Match]]: Matches per phone, ordered by preference then coin rank
+            which is the order the per-phone loop used to produce them in.
+        """
+        self.build_index()
+        matches: Dict[str, List[Match]] = defaultdict(list)
+
+        for volume_time, changes in changes_by_time.items():
+            subscribers = self._subscribers.get(volume_time)
+            if not subscribers:
+                continue
+            thresholds = self._thresholds[volume_time]
+
+            for change in changes:
+                # Subscribers with threshold < volume_change form a prefix of the index
+                fired = bisect_left(thresholds, change.volume_change)
+                for _, phone, pref_index in subscribers[:fired]:
+                    matches[phone].append(Match(pref_index, volume_time, change))
+
+        for phone_matches in matches.values():
+            phone_matches.sort(key=lambda m: (m.pref_index, m.change.rank))
+        return matches
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+from utils.custom_logger import log
+
+class TrackingJob:
+    """
+    State of a single queued /track_volume run.
+    """
+    def __init__(self, window: str, limit: int):
+        self.job_id = uuid.uuid4().hex
+        self.window = window
+        self.limit = limit
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._stage_started = 0.0
+
+    def enter_stage(self, name: str):
+        """
+        Records the duration of the current stage and starts the next one.
+        """
+        now = time.perf_counter()
+        if self.stage is not None:
+            self.stages[self.stage] = round(now - self._stage_started, 3)
+        self.stage = name
+        self._stage_started = now
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "window": self.window,
+            "limit": self.limit,
+            "status": self.status,
+            "stage": self.stage,
+            "stage_seconds": dict(self.stages),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class TrackingJobQueue:
+    """
+    Runs the tracking pipeline on an in-process worker thread instead of inside the HTTP request.
+
+    Triggers for the same (limit, scheduler window) share one job, so overlapping
+    Cloud Scheduler calls or retries don't start a second run. Failed jobs don't
+    coalesce, so a retry after a failure runs again.
+
+    Note: on Cloud Run the worker only gets CPU after the response is sent if the service
+    has CPU always allocated.
+    """
+    def __init__(self, run: Callable[[int, Callable[[str], None]], Dict], window_minutes: int = 15,
+                 history_size: int = 100):
+        self.run = run
+        self.window_minutes = window_minutes
+        self.history_size = history_size
+
+        self._jobs: "OrderedDict[str, TrackingJob]" = OrderedDict()
+        self._by_window: Dict[str, TrackingJob] = {}
+        self._queue: "queue.Queue[TrackingJob]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def window_key(self, limit: int, now: Optional[datetime] = None) -> str:
+        now = now or datetime.now(timezone.utc)
+        window_start = now.replace(minute=now.minute - now.minute % self.window_minutes, second=0, microsecond=0)
+        return f"{window_start.isoformat()}/{limit}"
+
+    def submit(self, limit: int) -> Tuple[TrackingJob, bool]:
+        """
+        Enqueues a run unless one for the same window is already queued, running or done.
+
+        Args:
+            limit (int): Number of cryptocurrencies to track.
+
+        Returns:
+            Tuple[TrackingJob, bool]: The job and whether it was coalesced into an existing one.
+        """
+        window = self.window_key(limit)
+        with self._lock:
+            existing = self._by_window.get(window)
+            if existing is not None and existing.status != "failed":
+                log.info(f"Coalesced tracking trigger into job {existing.job_id} for window {window}")
+                return existing, True
+
+            job = TrackingJob(window, limit)
+            self._jobs[job.job_id] = job
+            self._by_window[window] = job
+            while len(self._jobs) > self.history_size:
+                _, evicted = self._jobs.popitem(last=False)
+                if self._by_window.get(evicted.window) is evicted:
+                    del self._by_window[evicted.window]
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="tracking-jobs", daemon=True)
+                self._worker.start()
+
+        self._queue.put(job)
+        log.info(f"Queued tracking job {job.job_id} for window {window}")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[TrackingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+            try:
+                job.result = self.run(job.limit, job.enter_stage)
+                job.status = "succeeded"
+            except Exception as e:
+                log.error(f"Tracking job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.enter_stage("done")
+                job.finished_at = datetime.now(timezone.utc)
+                self._queue.task_done()
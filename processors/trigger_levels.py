@@ -0,0 +1,115 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+
+# Relative slack of the trigger comparison, so rounding of prev_volume * (1 + threshold)
+# can only let borderline coins through to the exact check, never drop them
+_TRIGGER_SLACK = 1e-9
+
+class TriggerLevels:
+    """
+    Per-coin "next trigger level" of one volume_time bucket.
+
+    The lowest subscriber threshold of a bucket fires when
+    (volume - prev_volume) / prev_volume > threshold, i.e. once volume exceeds
+    prev_volume * (1 + threshold). That level is precomputed per coin from the baseline,
+    so a run compares the listing against it in one pass and computes the exact change
+    only for the coins that crossed it; every other coin is skipped for all subscribers.
+
+    The levels stay valid while the baseline and the lowest threshold don't change,
+    which for the daily buckets is the whole day. The frame alignment is kept as well
+    and reused while the listing has the same coins in the same order.
+    """
+    __slots__ = ("key", "min_change", "ids", "volume", "price", "trigger", "_frame_ids", "_aligned")
+
+    def __init__(self, baseline: BaselineSnapshot, min_change: float, key: Tuple):
+        self.key = key
+        self.min_change = min_change
+        # Copies, since history baselines are views of the mutable ring
+        self.ids = baseline.ids.copy()
+        self.volume = baseline.volume.copy()
+        self.price = baseline.price.copy()
+
+        # A non-positive baseline volume counts as a change of 0, firing only below-zero thresholds
+        trigger = np.full(len(self.ids), -np.inf if min_change < 0 else np.inf)
+        has_volume = self.volume > 0
+        trigger[has_volume] = self.volume[has_volume] * (1 + min_change)
+        trigger[np.isnan(self.volume)] = np.nan
+        with np.errstate(invalid="ignore"):
+            self.trigger = np.where(np.isfinite(trigger), trigger - np.abs(trigger) * _TRIGGER_SLACK, trigger)
+
+        self._frame_ids: Optional[np.ndarray] = None
+        self._aligned: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def key_of(baseline: BaselineSnapshot, min_change: float) -> Tuple:
+        return (min_change, len(baseline), hash(baseline.ids.tobytes()),
+                hash(baseline.volume.tobytes()), hash(baseline.price.tobytes()))
+
+    def align(self, frame: CoinFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns baseline positions, trigger level and baseline price per frame row (-1/NaN if missing).
+        """
+        if self._frame_ids is not None and np.array_equal(self._frame_ids, frame.ids):
+            return self._aligned
+        positions = np.full(len(frame), -1, dtype=np.int64)
+        trigger = np.full(len(frame), np.nan)
+        prev_price = np.full(len(frame), np.nan)
+        if len(self.ids):
+            found_at = np.searchsorted(self.ids, frame.ids)
+            found_at[found_at == len(self.ids)] = 0
+            found = self.ids[found_at] == frame.ids
+            positions[found] = found_at[found]
+            trigger[found] = self.trigger[found_at[found]]
+            prev_price[found] = self.price[found_at[found]]
+        self._frame_ids = frame.ids.copy()
+        self._aligned = (positions, trigger, prev_price)
+        return self._aligned
+
+    def candidates(self, frame: CoinFrame, eligible: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the coins that fire at least the lowest threshold of the bucket.
+
+        Args:
+            frame (CoinFrame): Latest cryptocurrency data as columns, in rank order.
+            eligible (np.ndarray): Rows passing the market cap/volume filter.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Candidate rows in rank order and their volume change.
+        """
+        positions, trigger, prev_price = self.align(frame)
+        rows = np.flatnonzero(eligible & (frame.volume > trigger) & (frame.price > prev_price))
+
+        # Exact change of the few coins past their trigger level, as ThresholdMatcher computes it
+        prev_volume = self.volume[positions[rows]]
+        volume_change = np.zeros(len(rows))
+        np.divide(frame.volume[rows] - prev_volume, prev_volume, out=volume_change, where=prev_volume > 0)
+        fired = volume_change > self.min_change
+        return rows[fired], volume_change[fired]
+
+class TriggerLevelCache:
+    """
+    TriggerLevels of every bucket, kept across runs by a long-lived ProcessData.
+    """
+    def __init__(self):
+        self._levels: Dict[str, TriggerLevels] = {}
+        self.builds = 0
+
+    def get(self, volume_time: str, baseline: BaselineSnapshot, min_change: float) -> TriggerLevels:
+        """
+        Returns the levels of a bucket, rebuilding them if its baseline or lowest threshold changed.
+        """
+        key = TriggerLevels.key_of(baseline, min_change)
+        levels = self._levels.get(volume_time)
+        if levels is None or levels.key != key:
+            levels = self._levels[volume_time] = TriggerLevels(baseline, min_change, key)
+            self.builds += 1
+        return levels
+
+    def retain(self, volume_times):
+        """
+        Drops the levels of buckets no subscriber uses anymore.
+        """
+        keep = set(volume_times)
+        for volume_time in [volume_time for volume_time in self._levels if volume_time not in keep]:
+            del self._levels[volume_time]
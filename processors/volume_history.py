@@ -0,0 +1,205 @@
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import numpy as np
+from google.cloud import firestore
+from processors.coin_frame import BaselineSnapshot, CoinFrame
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+SLOT_MINUTES = 15
+
+_VOLUME_TIME = re.compile(r"^\s*(\d+)\s*(m|min|mins|minute|minutes|h|hr|hrs|hour|hours|d|day|days)\s*$", re.IGNORECASE)
+_UNIT_MINUTES = {"m": 1, "h": 60, "d": 24 * 60}
+
+def parse_volume_time(volume_time: str) -> Optional[int]:
+    """
+    Converts a volume_time like "15min", "1hr", "4hr" or "24hr" into a number of 15-minute slots.
+
+    Returns:
+        Optional[int]: The lookback in slots, None if the value isn't a positive multiple of 15 minutes.
+    """
+    match = _VOLUME_TIME.match(volume_time or "")
+    if not match:
+        return None
+    minutes = int(match.group(1)) * _UNIT_MINUTES[match.group(2)[0].lower()]
+    if minutes <= 0 or minutes % SLOT_MINUTES:
+        return None
+    return minutes // SLOT_MINUTES
+
+class VolumeHistory:
+    """
+    Rolling 15-minute volume/price samples per coin, kept in fixed-size ring buffers.
+
+    Each run records one sample per coin in the slot of its start time. A volume_time is
+    answered by the column `lookback` slots back, so "15min", "1hr" and "4hr" compare
+    against the market at that time instead of against midnight.
+
+    The ring holds `capacity` slots (the longest supported lookback plus the current slot)
+    as two coins x capacity float64 arrays. Memory and writes don't depend on how many
+    timeframes subscribers pick: every run writes only its own slot. A slot is persisted
+    as raw little-endian arrays in documents keyed by ring position, split into chunks
+    of MAX_CHUNK_COINS coins to stay under the Firestore document size limit.
+    """
+    MAX_CHUNK_COINS = 20000 # 24 bytes per coin, well under the 1 MiB document limit
+    MAX_BATCH_SIZE = 500 # Firestore limit of operations per batch
+
+    def __init__(self, firestore_client: firestore.Client, collection_name: str = "volume_history",
+                 max_lookback: str = "24hr"):
+        self.firestore_client = firestore_client
+        self.collection_ref = self.firestore_client.collection(collection_name)
+        self.capacity = parse_volume_time(max_lookback) + 1
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.volume = np.empty((0, self.capacity))
+        self.price = np.empty((0, self.capacity))
+        # Absolute slot held by each ring position, -1 when empty
+        self.slots = np.full(self.capacity, -1, dtype=np.int64)
+        self.dirty = set()
+        self.reads = 0
+        self.writes = 0
+
+    @staticmethod
+    def slot_of(utc_now: datetime) -> int:
+        return int(utc_now.timestamp() // (SLOT_MINUTES * 60))
+
+    def lookback(self, volume_time: str) -> Optional[int]:
+        """
+        Returns the lookback of a volume_time in slots, None if the ring can't answer it.
+        """
+        slots = parse_volume_time(volume_time)
+        return slots if slots is not None and slots < self.capacity else None
+
+    def supports(self, volume_time: str) -> bool:
+        return self.lookback(volume_time) is not None
+
+    def has_sample(self, slot: int) -> bool:
+        return slot >= 0 and self.slots[slot % self.capacity] == slot
+
+    def load(self, slots: Iterable[int]):
+        """
+        Reads the given slots from Firestore unless they are already in memory.
+
+        A long-lived instance only reads after a gap; a fresh one reads the few slots its
+        subscribers' timeframes look back to, in a single round trip.
+        """
+        missing = sorted({slot for slot in slots if slot >= 0 and not self.has_sample(slot)})
+        if not missing:
+            return
+
+        refs = [self.collection_ref.document(self.doc_id(slot % self.capacity, 0)) for slot in missing]
+        more_refs = []
+        with metrics.external_call("firestore", "volume_history_get_all"):
+            for slot, doc in zip(missing, self.firestore_client.get_all(refs)):
+                if self._load_chunk(slot, doc):
+                    more_refs.extend(
+                        self.collection_ref.document(self.doc_id(slot % self.capacity, chunk))
+                        for chunk in range(1, doc.to_dict().get('chunks', 1))
+                    )
+            self.reads += 1
+            if more_refs:
+                by_pos = {slot % self.capacity: slot for slot in missing}
+                for doc in self.firestore_client.get_all(more_refs):
+                    self._load_chunk(by_pos[int(doc.id.split("_")[0])], doc)
+                self.reads += 1
+        log.info("Loaded %d volume history slots", sum(1 for slot in missing if self.has_sample(slot)))
+
+    def _load_chunk(self, slot: int, doc) -> bool:
+        if not doc.exists:
+            return False
+        data = doc.to_dict()
+        # Ring positions are reused, so the stored slot tells whether the sample is still current
+        if data.get('slot') != slot:
+            return False
+        ids = np.frombuffer(data['ids'], dtype='<i8').astype(np.int64)
+        self._write_column(slot, ids, np.frombuffer(data['volume'], dtype='<f8'),
+                           np.frombuffer(data['price'], dtype='<f8'), clear=data.get('chunk', 0) == 0)
+        return True
+
+    def baseline(self, volume_time: str, slot: int) -> BaselineSnapshot:
+        """
+        Returns the sample `volume_time` before the given slot as a baseline, empty if it wasn't recorded.
+        """
+        target = slot - self.lookback(volume_time)
+        if not self.has_sample(target):
+            return BaselineSnapshot.empty()
+        position = target % self.capacity
+        return BaselineSnapshot(self.ids, self.volume[:, position], self.price[:, position])
+
+    def record(self, frame: CoinFrame, slot: int):
+        """
+        Stores the frame's volume and price as the sample of the given slot.
+
+        A second run in the same slot replaces the sample.
+        """
+        self._write_column(slot, frame.ids, frame.volume, frame.price, clear=True)
+        self.dirty.add(slot)
+
+        # Drop coins that have no sample left in the ring
+        keep = ~np.all(np.isnan(self.volume), axis=1)
+        if not keep.all():
+            self.ids, self.volume, self.price = self.ids[keep], self.volume[keep], self.price[keep]
+
+    def _write_column(self, slot: int, ids: np.ndarray, volume: np.ndarray, price: np.ndarray, clear: bool):
+        self._ensure_rows(ids)
+        position = slot % self.capacity
+        if clear or self.slots[position] != slot:
+            self.volume[:, position] = np.nan
+            self.price[:, position] = np.nan
+        rows = np.searchsorted(self.ids, ids)
+        self.volume[rows, position] = volume
+        self.price[rows, position] = price
+        self.slots[position] = slot
+
+    def _ensure_rows(self, ids: np.ndarray):
+        all_ids = np.union1d(self.ids, ids)
+        if len(all_ids) == len(self.ids):
+            return
+        volume = np.full((len(all_ids), self.capacity), np.nan)
+        price = np.full((len(all_ids), self.capacity), np.nan)
+        rows = np.searchsorted(all_ids, self.ids)
+        volume[rows] = self.volume
+        price[rows] = self.price
+        self.ids, self.volume, self.price = all_ids, volume, price
+
+    @staticmethod
+    def doc_id(position: int, chunk: int) -> str:
+        return f"{position:03d}_{chunk}"
+
+    def flush(self):
+        """
+        Writes the slots recorded since the last flush, one document per chunk of coins.
+        """
+        writes = []
+        for slot in sorted(self.dirty):
+            position = slot % self.capacity
+            present = ~np.isnan(self.volume[:, position]) | ~np.isnan(self.price[:, position])
+            ids = self.ids[present]
+            volume, price = self.volume[present, position], self.price[present, position]
+            chunks = max(1, -(-len(ids) // self.MAX_CHUNK_COINS))
+            for chunk in range(chunks):
+                part = slice(chunk * self.MAX_CHUNK_COINS, (chunk + 1) * self.MAX_CHUNK_COINS)
+                writes.append((self.doc_id(position, chunk), {
+                    'slot': slot, 'chunk': chunk, 'chunks': chunks,
+                    'ids': ids[part].astype('<i8').tobytes(),
+                    'volume': volume[part].astype('<f8').tobytes(),
+                    'price': price[part].astype('<f8').tobytes(),
+                }))
+
+        for i in range(0, len(writes), self.MAX_BATCH_SIZE):
+            batch = self.firestore_client.batch()
+            for doc_id, document in writes[i:i + self.MAX_BATCH_SIZE]:
+                batch.set(self.collection_ref.document(doc_id), document)
+            with metrics.external_call("firestore", "volume_history_commit"):
+                batch.commit()
+            self.writes += 1
+        self.dirty.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "history_reads": self.reads,
+            "history_writes": self.writes,
+            "history_coins": len(self.ids),
+            "history_slots": int((self.slots >= 0).sum()),
+            "history_bytes": self.volume.nbytes + self.price.nbytes + self.ids.nbytes,
+        }
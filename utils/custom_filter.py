@@ -1,23 +1,44 @@
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from google.cloud import firestore
 from utils.custom_logger import log
+from utils.metrics import metrics
+from utils.notification_ledger import NotificationLedger
+from utils.redis_notification_ledger import RedisNotificationLedger
+from utils.write_behind import FirestoreWriteBehind
 
 class CustomFilter:
     """
     This class handles tracking notifications and filtering out duplicate notifications
     based on a counter for each coin per phone.
     """
-    def __init__(self, firestore_client: firestore.Client):
+    def __init__(self, firestore_client: firestore.Client, redis_client=None,
+                 write_behind: Optional[FirestoreWriteBehind] = None, cleanup_on_reset: bool = False):
         self.firestore_client = firestore_client
+        # With Redis, run ledgers keep the counters there and write Firestore behind
+        self.redis_client = redis_client
+        self.write_behind = write_behind
         self.reset_tracker_ref = self.firestore_client.collection("reset_tracker").document("tracker")
         self.notification_tracker_ref = self.firestore_client.collection("notification_tracker")
+        self.max_notifications = 3 # Per phone and coin until the next reset
+        # Tracker documents from an older generation count as reset, see reset_notification_tracker()
+        self.generation = 0
+        self.cleanup_batch_size = 500 # Firestore limit of operations per batch
+        # Delete the previous generation's tracker documents after each daily reset
+        self.cleanup_on_reset = cleanup_on_reset
+        # Firestore round trips, read by ProcessData for per-run metrics
+        self.reads = 0
+        self.writes = 0
 
     def check_and_reset_tracker(self):
         """
         Checks if 24 hours have passed since the last reset, and if so, resets the notification_tracker table.
         """
-        reset_data = self.reset_tracker_ref.get()
+        with metrics.external_call("firestore", "reset_tracker_get"):
+            reset_data = self.reset_tracker_ref.get()
+        self.reads += 1
         if reset_data.exists:
+            self.generation = reset_data.to_dict().get("generation", 0)
             last_reset = reset_data.to_dict().get("last_reset")
             if last_reset:
                 time_diff = datetime.now(timezone.utc) - last_reset
@@ -27,6 +48,12 @@ class CustomFilter:
                     log.info("24 hours have passed since last reset. Resetting notification_tracker table.")
                     self.reset_notification_tracker()
                     self.update_last_reset_time()
+                    if self.cleanup_on_reset:
+                        try:
+                            self.cleanup_notification_tracker()
+                        except Exception as e:
+                            # Stale documents already read as 0; the next reset retries
+                            log.error(f"Error cleaning up notification tracker: {e}")
             else:
                 log.warning("No last reset time found, setting it now.")
                 self.update_last_reset_time()
@@ -36,20 +63,70 @@ class CustomFilter:
 
     def update_last_reset_time(self):
         """
-        Updates the last reset time in the reset_tracker document.
+        Updates the last reset time and current generation in the reset_tracker document.
         """
-        self.reset_tracker_ref.set({
-            "last_reset": datetime.now(timezone.utc)
-        })
+        with metrics.external_call("firestore", "reset_tracker_set"):
+            self.reset_tracker_ref.set({
+                "last_reset": datetime.now(timezone.utc),
+                "generation": self.generation
+            })
+        self.writes += 1
 
     def reset_notification_tracker(self):
         """
-        Resets the notification tracker table (notification_tracker) by clearing the counters.
+        Resets the notification tracker table (notification_tracker) by starting a new generation.
+
+        No tracker document is written: counters stamped with an older generation are read
+        as 0, and the new generation is persisted by update_last_reset_time().
+        """
+        self.generation += 1
+        log.info(f"Notification tracker reset successfully. Generation: {self.generation}")
+
+    def cleanup_notification_tracker(self) -> int:
+        """
+        Physically deletes tracker documents from older generations using batched writes.
+
+        Returns:
+            int: Number of deleted documents.
+        """
+        deleted = 0
+        batch = self.firestore_client.batch()
+        pending = 0
+        self.reads += 1
+        for doc in self.notification_tracker_ref.stream():
+            if doc.to_dict().get("generation", 0) == self.generation:
+                continue
+            batch.delete(doc.reference)
+            pending += 1
+            if pending == self.cleanup_batch_size:
+                batch.commit()
+                self.writes += 1
+                deleted += pending
+                batch = self.firestore_client.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+            self.writes += 1
+            deleted += pending
+        log.info(f"Deleted {deleted} stale notification tracker documents.")
+        return deleted
+
+    def current_counter(self, tracker_data: dict) -> int:
+        """
+        Returns the counter of a tracker document, 0 if it belongs to an older generation.
+        """
+        if tracker_data.get("generation", 0) != self.generation:
+            return 0
+        return tracker_data.get("counter", 0)
+
+    def create_ledger(self) -> NotificationLedger:
         """
-        docs = self.notification_tracker_ref.stream()
-        for doc in docs:
-            self.notification_tracker_ref.document(doc.id).update({"counter": 0})
-        log.info("Notification tracker reset successfully.")
+        Creates a ledger that batches the should_send_notification checks of a whole run.
+        """
+        if self.redis_client is not None:
+            return RedisNotificationLedger(self.firestore_client, self.redis_client, self.write_behind,
+                                           self.max_notifications, self.generation)
+        return NotificationLedger(self.firestore_client, self.max_notifications, self.generation)
 
     def should_send_notification(self, phone: str, coin_id: str, coin_name: str) -> bool:
         """
@@ -64,21 +141,29 @@ class CustomFilter:
             bool: True if the notification should be sent, False otherwise.
         """
         tracker_ref = self.firestore_client.collection("notification_tracker")
-        tracker_doc = tracker_ref.document(f"{phone}_{coin_id}").get()
+        with metrics.external_call("firestore", "tracker_get"):
+            tracker_doc = tracker_ref.document(f"{phone}_{coin_id}").get()
+        self.reads += 1
 
         if tracker_doc.exists:
             tracker_data = tracker_doc.to_dict()
-            counter = tracker_data.get('counter', 0)
-            if counter >= 3:
-                log.info(f"Skipping notification for coinid: {coin_id} coin: {coin_name} as it has been sent 3 times already.")
+            counter = self.current_counter(tracker_data)
+            if counter >= self.max_notifications:
+                log.info("Skipping notification for coinid: %s coin: %s as it has been sent %d times already.",
+                         coin_id, coin_name, self.max_notifications)
                 return False  # Don't send the notification
-            else:
+            elif counter > 0:
                 # Increment counter
-                tracker_ref.document(f"{phone}_{coin_id}").update({"counter": firestore.Increment(1)})
+                with metrics.external_call("firestore", "tracker_update"):
+                    tracker_ref.document(f"{phone}_{coin_id}").update({"counter": firestore.Increment(1)})
+                self.writes += 1
                 return True  # Send the notification
-        else:
-            # If no previous entry, initialize counter
+
+        # If no entry for the current generation, initialize counter
+        with metrics.external_call("firestore", "tracker_set"):
             tracker_ref.document(f"{phone}_{coin_id}").set({
-                "counter": 1, "phone_number": phone, "coin_id": coin_id, "coin_name": coin_name
+                "counter": 1, "phone_number": phone, "coin_id": coin_id, "coin_name": coin_name,
+                "generation": self.generation
             })
-            return True  # Send the notification
+        self.writes += 1
+        return True  # Send the notification
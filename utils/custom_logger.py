@@ -1,19 +1,49 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+from collections import Counter
+from typing import Dict, Optional
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s]: %(message)s"
 
 class Logger:
     """
     Configures and provides a reusable logger instance.
+
+    By default (LOG_ASYNC=true) callers only enqueue records; a QueueListener thread
+    formats them and does the console/file I/O, so logging never blocks the pipeline.
     """
-    def __init__(self, log_file: str = "app.log"):
-        # Set up logging configuration
-        logging.basicConfig(
-            level=logging.INFO,  # Default log level
-            format="%(asctime)s [%(levelname)s]: %(message)s",
-            handlers=[
-                logging.StreamHandler(),      # Log to console
-                logging.FileHandler(log_file, encoding='utf-8')  # Log to file
-            ]
-        )
+    def __init__(self, log_file: str = "app.log", asynchronous: Optional[bool] = None):
+        if asynchronous is None:
+            asynchronous = os.getenv("LOG_ASYNC", "true").lower() == "true"
+        level = os.getenv("LOG_LEVEL", "INFO").upper()
+
+        handlers = [
+            logging.StreamHandler(),      # Log to console
+            logging.FileHandler(log_file, encoding='utf-8', delay=True)  # Log to file, opened on first write
+        ]
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+        if asynchronous:
+            formatter = logging.Formatter(LOG_FORMAT)
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+            self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+            # Drain the queue on interpreter exit so the last records aren't lost
+            atexit.register(self.listener.stop)
+
+            root = logging.getLogger()
+            if not root.handlers:
+                root.setLevel(level)
+                root.addHandler(logging.handlers.QueueHandler(log_queue))
+        else:
+            # Set up logging configuration
+            logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+
         # Get the logger instance
         self.logger = logging.getLogger("CryptoVolumeTracker")
 
@@ -25,10 +55,42 @@ class Logger:
 
         logging.getLogger("google").setLevel(logging.ERROR)
         logging.getLogger("google.cloud").setLevel(logging.ERROR)
-        
+
 
     def get_logger(self):
         return self.logger
 
+class LogSampler:
+    """
+    Per-run counters for hot-path events that only logs the first few occurrences of each.
+
+    Replaces a log line per coin or per phone with a handful of samples and one summary
+    line at the end of the run.
+    """
+    def __init__(self, logger: logging.Logger, sample_size: Optional[int] = None, level: int = logging.DEBUG):
+        self.logger = logger
+        self.sample_size = int(os.getenv("LOG_SAMPLE_SIZE", 5)) if sample_size is None else sample_size
+        self.level = level
+        self.counts: Counter = Counter()
+
+    def event(self, key: str, msg: str, *args):
+        """
+        Counts an event and logs it (lazily formatted) while under the sample size.
+        """
+        self.counts[key] += 1
+        if self.counts[key] <= self.sample_size:
+            self.logger.log(self.level, msg, *args)
+
+    def count(self, key: str, n: int = 1):
+        self.counts[key] += n
+
+    def summary(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+    def log_summary(self, title: str) -> Dict[str, int]:
+        summary = self.summary()
+        self.logger.info("%s: %s", title, summary)
+        return summary
+
 # Initialize a global logger instance
 log = Logger().get_logger()
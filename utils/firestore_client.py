@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Optional
+from google.cloud import firestore
+from utils.custom_logger import log
+
+GCP_PROJECT_ID = 'crypto-volume-change-tracker'
+FIRESTORE_DATABASE = 'crypto-backend-db'
+
+_client: Optional[firestore.Client] = None
+_client_lock = threading.Lock()
+
+def get_firestore_client() -> firestore.Client:
+    """
+    Returns the process-wide Firestore client, creating it on first use.
+
+    The client owns the gRPC channel pool, so sharing it avoids channel setup and auth
+    on every scheduled run.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = firestore.Client(project=GCP_PROJECT_ID, database=FIRESTORE_DATABASE)
+    return _client
+
+def warmup_firestore(firestore_client: firestore.Client) -> float:
+    """
+    Opens the gRPC channel and fetches credentials with a single cheap read.
+
+    Returns:
+        float: Seconds the warmup took.
+    """
+    start = time.perf_counter()
+    try:
+        firestore_client.collection("reset_tracker").document("tracker").get()
+    except Exception as e:
+        log.warning(f"Firestore warmup failed: {e}")
+    elapsed = time.perf_counter() - start
+    log.info(f"Firestore warmup took {elapsed:.3f}s")
+    return elapsed
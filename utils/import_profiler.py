@@ -0,0 +1,102 @@
+import importlib.abc
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.custom_logger import log
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, profiler: "ImportProfiler", loader):
+        self.profiler = profiler
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profiler._enter()
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler._exit(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    In-process equivalent of `python -X importtime`.
+
+    Once installed, records the self and cumulative import time of every module imported
+    afterwards, so the app can log which imports its cold start pays for.
+    """
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float]] = {} # module -> (self seconds, cumulative seconds)
+        self._child_seconds: List[float] = []
+
+    def install(self) -> "ImportProfiler":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _enter(self):
+        self._child_seconds.append(0.0)
+
+    def _exit(self, name: str, cumulative: float):
+        children = self._child_seconds.pop()
+        self.timings[name] = (cumulative - children, cumulative)
+        if self._child_seconds:
+            self._child_seconds[-1] += cumulative
+
+    def report(self, top: int = 15) -> Dict:
+        """
+        Returns the total import time and the slowest top-level packages and modules, in ms.
+        """
+        packages: Dict[str, float] = {}
+        for name, (self_seconds, _) in self.timings.items():
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0.0) + self_seconds
+        slowest = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "modules": len(self.timings),
+            "total_ms": round(sum(self_seconds for self_seconds, _ in self.timings.values()) * 1000, 1),
+            "packages_ms": {
+                root: round(seconds * 1000, 1)
+                for root, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+            },
+            "slowest_ms": {name: [round(s * 1000, 1), round(c * 1000, 1)] for name, (s, c) in slowest},
+        }
+
+    def log_report(self, top: int = 15) -> Dict:
+        report = self.report(top)
+        log.info(f"Import timings (ms, self/cumulative): {report}")
+        return report
+
+_profiler: Optional[ImportProfiler] = None
+
+def start_import_profiler() -> ImportProfiler:
+    """
+    Installs the process-wide import profiler, once.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler().install()
+    return _profiler
+
+def get_import_profiler() -> Optional[ImportProfiler]:
+    return _profiler
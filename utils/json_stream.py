@@ -0,0 +1,105 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+class _ChunkBuffer:
+    """
+    Text window over a stream of byte chunks, refilled as the parser runs out of input.
+    """
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Drops consumed text and appends the next chunk. Returns False at end of stream.
+        """
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.text = self.text[self.pos:] + self._decoder.decode(b"", final=True)
+            self.eof = True
+        else:
+            self.text = self.text[self.pos:] + self._decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, '' at end of stream.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or not self.fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON stream: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """
+        Decodes the next complete JSON value, pulling more chunks until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.text) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Incrementally yields the items of a top-level array in a JSON object.
+
+    Only one item is decoded at a time, so a large response body never has to be held
+    as a whole, neither as text nor as nested dicts.
+
+    Args:
+        chunks (Iterable[bytes]): The response body, e.g. response.iter_content().
+        key (str): Top-level key holding the array, e.g. "data".
+
+    Yields:
+        Any: Each decoded array item, in order.
+    """
+    buffer = _ChunkBuffer(chunks)
+    buffer.expect("{")
+    while buffer.peek() != "}":
+        if buffer.peek() == ",":
+            buffer.pos += 1
+        name = buffer.decode_value()
+        buffer.expect(":")
+        if name != key:
+            buffer.decode_value()
+            continue
+
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            return
+        while True:
+            yield buffer.decode_value()
+            separator = buffer.peek()
+            buffer.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed JSON stream: expected ',' or ']', found {separator!r}")
+
+    raise ValueError(f"Unexpected API response structure: Missing '{key}' key.")
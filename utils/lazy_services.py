@@ -0,0 +1,47 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+class LazyServices:
+    """
+    Service container whose entries are built by their factory on first access.
+
+    Lets the app defer heavy SDK imports and client construction until a request
+    actually needs them. Factories may look up other services; construction is
+    serialized by a re-entrant lock so each service is built exactly once.
+    """
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._built: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.build_seconds: Dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._factories[name] = factory
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._built:
+            return self._built[name]
+        with self._lock:
+            if name not in self._built:
+                start = time.perf_counter()
+                self._built[name] = self._factories[name]()
+                # Includes the build time of services it depends on
+                self.build_seconds[name] = time.perf_counter() - start
+            return self._built[name]
+
+    def __setitem__(self, name: str, value: Any):
+        self._built[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._built or name in self._factories
+
+    def is_built(self, name: str) -> bool:
+        return name in self._built
+
+    def preload(self, names: Iterable[str] = None):
+        """
+        Builds the given services (all registered ones by default) now.
+        """
+        for name in list(names or self._factories):
+            self[name]
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, Optional, Tuple
+
+# Seconds; spans a fast Firestore read up to a slow full CMC fetch
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Round trips per run
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Shared no-op returned by the timing helpers while metrics are disabled
+_NULL_CONTEXT = nullcontext()
+
+class _Metric:
+    def __init__(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.buckets = buckets
+        self.values: Dict[Labels, object] = {}
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-style registry of counters, gauges and histograms.
+
+    Metrics are declared once below and updated by name with keyword labels. When
+    disabled every update returns immediately, so instrumented code pays one
+    attribute check per call.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def declare(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        if kind == "histogram" and buckets is None:
+            buckets = DEFAULT_BUCKETS
+        self._metrics[name] = _Metric(name, kind, help_text, buckets)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        metric = self._metrics[name]
+        with self._lock:
+            metric.values[key] = metric.values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._metrics[name].values[key] = value
+
+    def value(self, name: str, **labels) -> float:
+        """
+        Returns the current value of a counter or gauge, 0 if never updated.
+        """
+        return self._metrics[name].values.get(tuple(sorted(labels.items())), 0)
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        metric = self._metrics[name]
+        with self._lock:
+            counts, total = metric.values.get(key) or ([0] * (len(metric.buckets) + 1), 0.0)
+            for i, bound in enumerate(metric.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            metric.values[key] = (counts, total + value)
+
+    def time(self, name: str, **labels):
+        """
+        Context manager observing the duration of the block into a histogram.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name, labels)
+
+    def external_call(self, service: str, call: str):
+        """
+        Context manager timing a call to an external service and counting the ones that raise.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed_call(service, call)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def _timed_call(self, service: str, call: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("external_call_errors_total", service=service, call=call)
+            raise
+        finally:
+            self.observe("external_call_seconds", time.perf_counter() - start, service=service, call=call)
+
+    def stage_timer(self, name: str = "pipeline_stage_seconds") -> "StageTimer":
+        return StageTimer(self, name)
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for key, value in sorted(metric.values.items()):
+                    if metric.kind != "histogram":
+                        lines.append(f"{metric.name}{_format_labels(key)} {value}")
+                        continue
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{metric.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(key)} {total}")
+                    lines.append(f"{metric.name}_count{_format_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+class StageTimer:
+    """
+    Observes how long each named stage of a run takes; entering a stage ends the previous one.
+    """
+    def __init__(self, registry: MetricsRegistry, name: str):
+        self.registry = registry
+        self.name = name
+        self.stage: Optional[str] = None
+        self._started = 0.0
+
+    def enter(self, stage: Optional[str]):
+        now = time.perf_counter()
+        if self.stage is not None:
+            self.registry.observe(self.name, now - self._started, stage=self.stage)
+        self.stage = stage
+        self._started = now
+
+    def finish(self):
+        self.enter(None)
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    pairs = []
+    for name, value in key:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+metrics = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true")
+
+metrics.declare("tracking_run_seconds", "histogram", "Duration of a whole /track_volume run.")
+metrics.declare("pipeline_stage_seconds", "histogram", "Duration of each tracking pipeline stage.")
+metrics.declare("external_call_seconds", "histogram", "Latency of calls to CoinMarketCap, Firestore, Twilio and Secret Manager.")
+metrics.declare("external_call_errors_total", "counter", "External calls that raised.")
+metrics.declare("coins_processed_total", "counter", "Coins in processed listings.")
+metrics.declare("coins_eligible_total", "counter", "Coins above the market cap and volume thresholds.")
+metrics.declare("matches_total", "counter", "Threshold matches before dedupe.")
+metrics.declare("notifications_capped_total", "counter", "Matches dropped by the per-day notification cap.")
+metrics.declare("sms_sent_total", "counter", "SMS accepted by Twilio.")
+metrics.declare("sms_failed_total", "counter", "SMS given up on after retries.")
+metrics.declare("sms_segments_total", "counter", "SMS segments queued, as billed by Twilio.")
+metrics.declare("sms_segments_per_run", "histogram", "SMS segments queued per tracking run.", COUNT_BUCKETS)
+metrics.declare("sms_send_latency_seconds", "histogram", "Time from queueing an SMS to its final send attempt.")
+metrics.declare("sms_retries_total", "counter", "SMS send attempts retried after a transient error.")
+metrics.declare("firestore_reads_total", "counter", "Firestore read round trips by component.")
+metrics.declare("firestore_writes_total", "counter", "Firestore write round trips by component.")
+metrics.declare("firestore_round_trips_per_run", "histogram", "Firestore round trips per tracking run.", COUNT_BUCKETS)
+metrics.declare("firestore_round_trips_last_run", "gauge", "Firestore round trips of the latest tracking run.")
+metrics.declare("coin_evaluations_skipped_total", "counter", "Coin x volume_time evaluations skipped below the trigger level.")
+metrics.declare("coin_skip_ratio_last_run", "gauge", "Share of coin x volume_time evaluations skipped in the latest tracking run.")
+metrics.declare("alert_stream_clients", "gauge", "Connected /alerts/stream clients.")
+metrics.declare("alert_stream_events_total", "counter", "Alerts published to /alerts/stream.")
+metrics.declare("alert_stream_dropped_total", "counter", "/alerts/stream clients disconnected for falling behind.")
+metrics.declare("cmc_credits_total", "counter", "CoinMarketCap credits spent by endpoint.")
+metrics.declare("hot_set_coins", "gauge", "Coins near a trigger level polled between sweeps.")
+metrics.declare("hot_polls_total", "counter", "Hot set poll ticks by outcome.")
+metrics.declare("listing_cache_requests_total", "counter", "Listing page requests by result: hit, coalesced or miss.")
+metrics.declare("cmc_credits_saved_total", "counter", "CoinMarketCap credits not spent thanks to the listing cache.")
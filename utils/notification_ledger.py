@@ -0,0 +1,146 @@
+from collections import Counter
+from typing import Dict, Iterable, Tuple
+from google.cloud import firestore
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class NotificationLedger:
+    """
+    Run-scoped, batched replacement for per-hit CustomFilter.should_send_notification calls.
+
+    The notification_tracker counters of every (phone, coin) pair that matched in a run
+    are prefetched in one bulk read, send decisions are reserved in memory, and all
+    increments are committed together in a transaction that re-reads the counters, so
+    the per-day cap still holds when two runs overlap.
+    """
+    MAX_TRANSACTION_SIZE = 500 # Firestore limit of writes per transaction
+
+    def __init__(self, firestore_client: firestore.Client, max_notifications: int = 3, generation: int = 0,
+                 collection_name: str = "notification_tracker"):
+        self.firestore_client = firestore_client
+        self.max_notifications = max_notifications
+        # Counters stamped with another generation were reset by CustomFilter
+        self.generation = generation
+        self.tracker_ref = self.firestore_client.collection(collection_name)
+
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.coin_names: Dict[Tuple[str, str], str] = {}
+        self.reserved: Counter = Counter()
+        self.granted: Counter = Counter()
+        self.reads = 0
+        self.writes = 0
+        self.capped = 0
+
+    @staticmethod
+    def doc_id(phone: str, coin_id: str) -> str:
+        return f"{phone}_{coin_id}"
+
+    def prefetch(self, keys: Iterable[Tuple[str, str]]):
+        """
+        Loads the counters of the given (phone, coin_id) pairs in one bulk read.
+        """
+        missing = [key for key in dict.fromkeys(keys) if key not in self.counters]
+        if not missing:
+            return
+        with metrics.external_call("firestore", "tracker_get_all"):
+            counters = self._read_counters(missing)
+        self.counters.update(counters)
+        self.reads += 1
+
+    def _read_counters(self, keys, transaction=None) -> Dict[Tuple[str, str], int]:
+        refs = [self.tracker_ref.document(self.doc_id(*key)) for key in keys]
+        by_doc_id = {self.doc_id(*key): key for key in keys}
+        counters = {key: 0 for key in keys}
+        for doc in self.firestore_client.get_all(refs, transaction=transaction):
+            if doc.exists:
+                tracker_data = doc.to_dict()
+                if tracker_data.get('generation', 0) == self.generation:
+                    counters[by_doc_id[doc.id]] = tracker_data.get('counter', 0)
+        return counters
+
+    def reserve(self, phone: str, coin_id: str, coin_name: str) -> bool:
+        """
+        Decides in memory whether a notification may be sent for the given phone and coin.
+
+        Args:
+            phone (str): The phone number to check.
+            coin_id (str): The ID of the coin to check.
+            coin_name (str): Stored on the tracker document for readability.
+
+        Returns:
+            bool: True if the notification is tentatively allowed until commit().
+        """
+        key = (phone, coin_id)
+        if key not in self.counters:
+            self.prefetch([key])
+
+        if self.counters[key] + self.reserved[key] >= self.max_notifications:
+            self.capped += 1
+            log.debug("Skipping notification for coinid: %s coin: %s as it has been sent %d times already.",
+                      coin_id, coin_name, self.max_notifications)
+            return False
+        self.reserved[key] += 1
+        self.coin_names[key] = coin_name
+        return True
+
+    def commit(self):
+        """
+        Applies all reserved increments, capped against the counters as they are at commit time.
+
+        Chunks commit independently: a failed chunk grants nothing, and the chunks that
+        committed before or after it keep their grants so those alerts are still sent.
+        """
+        @firestore.transactional
+        def commit_chunk(transaction, chunk):
+            return self._commit_chunk(transaction, chunk)
+
+        keys = list(self.reserved)
+        failed = 0
+        for i in range(0, len(keys), self.MAX_TRANSACTION_SIZE):
+            chunk = keys[i:i + self.MAX_TRANSACTION_SIZE]
+            try:
+                with metrics.external_call("firestore", "tracker_transaction"):
+                    self.granted.update(commit_chunk(self.firestore_client.transaction(), chunk))
+            except Exception as e:
+                failed += sum(self.reserved[key] for key in chunk)
+                log.error(f"Error committing notification tracker, dropping {len(chunk)} pairs: {e}")
+            self.writes += 1
+
+        if failed:
+            log.error("Dropped %d notifications whose tracker counters failed to commit", failed)
+        denied = sum(self.reserved.values()) - sum(self.granted.values()) - failed
+        if denied:
+            log.info("Dropped %d notifications already sent by an overlapping run", denied)
+        self.reserved.clear()
+
+    def _commit_chunk(self, transaction, keys) -> Dict[Tuple[str, str], int]:
+        # Re-read inside the transaction so concurrent runs can't both spend the same slot
+        current = self._read_counters(keys, transaction=transaction)
+        granted = {}
+        for key in keys:
+            granted[key] = max(0, min(self.reserved[key], self.max_notifications - current[key]))
+            if not granted[key]:
+                continue
+            phone, coin_id = key
+            transaction.set(self.tracker_ref.document(self.doc_id(phone, coin_id)), {
+                "counter": current[key] + granted[key], "phone_number": phone,
+                "coin_id": coin_id, "coin_name": self.coin_names[key], "generation": self.generation
+            })
+            self.counters[key] = current[key] + granted[key]
+        return granted
+
+    def confirm(self, phone: str, coin_id: str) -> bool:
+        """
+        Consumes one committed notification slot for the phone and coin.
+
+        Returns:
+            bool: True if the notification survived commit() and should be sent.
+        """
+        key = (phone, coin_id)
+        if self.granted[key] > 0:
+            self.granted[key] -= 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracker_reads": self.reads, "tracker_writes": self.writes, "capped": self.capped}
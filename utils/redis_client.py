@@ -0,0 +1,24 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import redis
+
+_client: Optional["redis.Redis"] = None
+_client_lock = threading.Lock()
+
+def get_redis_client(url: Optional[str] = None) -> "redis.Redis":
+    """
+    Returns the process-wide Redis client, creating it on first use.
+
+    The client keeps a connection pool, so runs reuse connections instead of
+    reconnecting. The URL defaults to the REDIS_URL environment variable.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import redis
+                _client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _client
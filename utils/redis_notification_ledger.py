@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Tuple
+from google.cloud import firestore
+from utils.custom_logger import log
+from utils.metrics import metrics
+from utils.notification_ledger import NotificationLedger
+from utils.write_behind import FirestoreWriteBehind
+
+class RedisNotificationLedger(NotificationLedger):
+    """
+    NotificationLedger whose counters live in Redis, shared by every instance.
+
+    Counters are read with one MGET and spent with INCRBY + EXPIRE in a MULTI/EXEC
+    pipeline, so the cap holds across instances without Firestore transactions: a
+    pair that overshoots the cap is decremented back and only the slots under the cap
+    are granted. Keys carry the tracker generation and expire after `ttl_seconds`, so
+    a reset needs no cleanup. Pairs Redis doesn't know are seeded from the Firestore
+    tracker documents, which stay the durable copy through the write-behind.
+    """
+    KEY_PREFIX = "notification_tracker:"
+
+    def __init__(self, firestore_client: firestore.Client, redis_client, write_behind: FirestoreWriteBehind,
+                 max_notifications: int = 3, generation: int = 0, collection_name: str = "notification_tracker",
+                 ttl_seconds: int = 2 * 24 * 3600):
+        super().__init__(firestore_client, max_notifications, generation, collection_name)
+        self.collection_name = collection_name
+        self.redis = redis_client
+        self.write_behind = write_behind
+        self.ttl_seconds = ttl_seconds
+        self.redis_reads = 0
+        self.redis_writes = 0
+
+    def key(self, phone: str, coin_id: str) -> str:
+        return f"{self.KEY_PREFIX}{self.generation}:{phone}:{coin_id}"
+
+    def prefetch(self, keys: Iterable[Tuple[str, str]]):
+        missing = [key for key in dict.fromkeys(keys) if key not in self.counters]
+        if not missing:
+            return
+        with metrics.external_call("redis", "tracker_mget"):
+            values = self.redis.mget([self.key(*key) for key in missing])
+        self.redis_reads += 1
+
+        unknown = []
+        for key, value in zip(missing, values):
+            if value is None:
+                unknown.append(key)
+            else:
+                self.counters[key] = int(value)
+        if not unknown:
+            return
+
+        # Seed Redis with counters that only Firestore has, e.g. after a Redis restart
+        with metrics.external_call("firestore", "tracker_get_all"):
+            counters = self._read_counters(unknown)
+        self.reads += 1
+        self.counters.update(counters)
+        seeded = {key: counter for key, counter in counters.items() if counter}
+        if seeded:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, counter in seeded.items():
+                pipe.set(self.key(*key), counter, ex=self.ttl_seconds, nx=True)
+            with metrics.external_call("redis", "tracker_seed"):
+                pipe.execute()
+            self.redis_writes += 1
+
+    def commit(self):
+        """
+        Spends the reserved slots atomically in Redis, granting only what fits under the cap.
+        """
+        keys = list(self.reserved)
+        if not keys:
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        for key in keys:
+            pipe.incrby(self.key(*key), self.reserved[key])
+            pipe.expire(self.key(*key), self.ttl_seconds)
+        with metrics.external_call("redis", "tracker_incrby"):
+            totals = pipe.execute()[::2]
+        self.redis_writes += 1
+
+        # Give back what another run (or instance) had already spent
+        refunds: Dict[Tuple[str, str], int] = {}
+        for key, total in zip(keys, totals):
+            excess = min(self.reserved[key], max(0, total - self.max_notifications))
+            self.granted[key] += self.reserved[key] - excess
+            self.counters[key] = total - excess
+            if excess:
+                refunds[key] = excess
+        if refunds:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, excess in refunds.items():
+                pipe.decrby(self.key(*key), excess)
+            with metrics.external_call("redis", "tracker_decrby"):
+                pipe.execute()
+            self.redis_writes += 1
+            log.info("Dropped %d notifications already sent by an overlapping run", sum(refunds.values()))
+
+        for key in keys:
+            if self.granted[key]:
+                phone, coin_id = key
+                self.write_behind.put(self.collection_name, self.doc_id(phone, coin_id), {
+                    "counter": self.counters[key], "phone_number": phone, "coin_id": coin_id,
+                    "coin_name": self.coin_names[key], "generation": self.generation
+                })
+        self.reserved.clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats.update({"redis_reads": self.redis_reads, "redis_writes": self.redis_writes})
+        return stats
@@ -1,17 +1,33 @@
 import json
 import os
-from google.cloud import secretmanager
+import threading
+import time
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
 from utils.custom_logger import log
+from utils.metrics import metrics
 
 class SecretHandler:
-    def __init__(self):
+    def __init__(self, client_factory: Callable = None, ttl_seconds: float = 3600):
         self.gcp_project_id = 'crypto-volume-change-tracker'
         self.secret_name = 'crypto_secret_bucket'
-        
+
         # Load environment variables from .env if present
         load_dotenv()
 
+        # The bucket is fetched once and served from memory until the TTL expires
+        self.client_factory = client_factory
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+        self._secrets: Optional[Dict[str, str]] = None
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._prefetch_thread: Optional[threading.Thread] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._rotation_callbacks: List[Callable[[Dict[str, str]], None]] = []
+        self.fetches = 0
+        self.timings: Dict[str, float] = {}
+
     def set_secret(self, secret_name):
         """
         Retrieve secret with flexible environment and GCP Secret Manager support
@@ -36,40 +52,141 @@ class SecretHandler:
         else:
             log.error(f"Secret {secret_name} not found in local .env")
 
+    def _is_fresh(self) -> bool:
+        return self._secrets is not None and time.monotonic() - self._fetched_at < self.ttl_seconds
+
+    def _get_client(self):
+        if self._client is None:
+            start = time.perf_counter()
+            if self.client_factory is None:
+                # Imported on first use so LOCAL runs and cached lookups don't pay for the SDK
+                from google.cloud import secretmanager
+                self.client_factory = secretmanager.SecretManagerServiceClient
+            self._client = self.client_factory()
+            self.timings["secret_client"] = time.perf_counter() - start
+        return self._client
+
+    def _load_bucket(self, force: bool = False) -> Dict[str, str]:
+        """
+        Returns the parsed secret bucket, fetching it from GCP Secret Manager only if
+        the cached copy is missing, expired or a refresh is forced.
+        """
+        with self._lock:
+            if not force and self._is_fresh():
+                return self._secrets
+
+            try:
+                client = self._get_client()
+
+                # Use the single secret bucket name
+                secret_path = f"projects/{self.gcp_project_id}/secrets/{self.secret_name}/versions/latest"
+
+                # Retrieve the entire secret payload
+                start = time.perf_counter()
+                with metrics.external_call("secret_manager", "access_secret_version"):
+                    response = client.access_secret_version(request={"name": secret_path})
+                secret_payload = response.payload.data.decode("UTF-8")
+                self.timings["secret_fetch"] = time.perf_counter() - start
+                self.fetches += 1
+
+                try:
+                    # Parse the JSON payload
+                    self._secrets = json.loads(secret_payload)
+                    self._fetched_at = time.monotonic()
+                    return self._secrets
+
+                except json.JSONDecodeError as json_error:
+                    log.error(f"Failed to parse secret payload as JSON: {json_error}")
+                    raise ValueError(f"Invalid JSON format for secrets: {json_error}")
+
+            except Exception as e:
+                log.error(f"GCP Secret Manager retrieval failed: {str(e)}")
+                raise
+
     def _set_gcp_secret(self, secret_name):
         """
         Retrieve a specific secret from a single GCP Secret Manager secret bucket
         using JSON format
         """
-        try:
-            client = secretmanager.SecretManagerServiceClient()
-            
-            # Use the single secret bucket name
-            secret_path = f"projects/{self.gcp_project_id}/secrets/{self.secret_name}/versions/latest"
-            
-            # Retrieve the entire secret payload
-            response = client.access_secret_version(request={"name": secret_path})
-            secret_payload = response.payload.data.decode("UTF-8")
-            
+        self._wait_for_prefetch()
+        secrets_dict = self._load_bucket()
+
+        # Check and set the specific requested secret
+        if secret_name in secrets_dict:
+            os.environ[secret_name] = secrets_dict[secret_name]
+            log.info(f"Successfully retrieved {secret_name} from secret bucket")
+        else:
+            log.error(f"Secret {secret_name} not found in secret bucket")
+            raise ValueError(f"Secret {secret_name} not found in secret configuration")
+
+    def prefetch(self, secret_names: List[str]):
+        """
+        Starts fetching the secret bucket in the background so startup work that doesn't
+        need secrets can run meanwhile. Skipped when nothing needs to come from GCP.
+        """
+        if os.getenv("ENVIRONMENT") == "LOCAL" or all(os.getenv(name) for name in secret_names):
+            return
+
+        def run():
             try:
-                # Parse the JSON payload
-                secrets_dict = json.loads(secret_payload)
-                
-                # Check and set the specific requested secret
-                if secret_name in secrets_dict:
-                    os.environ[secret_name] = secrets_dict[secret_name]
-                    log.info(f"Successfully retrieved {secret_name} from secret bucket")
-                else:
-                    log.error(f"Secret {secret_name} not found in secret bucket")
-                    raise ValueError(f"Secret {secret_name} not found in secret configuration")
-            
-            except json.JSONDecodeError as json_error:
-                log.error(f"Failed to parse secret payload as JSON: {json_error}")
-                raise ValueError(f"Invalid JSON format for secrets: {json_error}")
-        
-        except Exception as e:
-            log.error(f"GCP Secret Manager retrieval failed: {str(e)}")
-            raise
+                self._load_bucket()
+            except Exception:
+                # set_secret() retries and surfaces the error
+                pass
+
+        self._prefetch_thread = threading.Thread(target=run, name="secret-prefetch", daemon=True)
+        self._prefetch_thread.start()
+
+    def _wait_for_prefetch(self):
+        if self._prefetch_thread is not None:
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+
+    def on_rotation(self, callback: Callable[[Dict[str, str]], None]):
+        """
+        Registers a callback receiving {name: new value} when a refresh finds rotated secrets.
+        """
+        self._rotation_callbacks.append(callback)
+
+    def refresh(self) -> Dict[str, str]:
+        """
+        Re-fetches the bucket and applies rotated values to secrets already in the environment.
+
+        Returns:
+            Dict[str, str]: The secrets whose value changed.
+        """
+        previous = dict(self._secrets or {})
+        secrets_dict = self._load_bucket(force=True)
+        rotated = {
+            name: value for name, value in secrets_dict.items()
+            if name in previous and previous[name] != value and os.getenv(name) == previous[name]
+        }
+        for name, value in rotated.items():
+            os.environ[name] = value
+        if rotated:
+            log.info(f"Picked up rotated secrets: {sorted(rotated)}")
+            for callback in self._rotation_callbacks:
+                callback(rotated)
+        return rotated
+
+    def start_background_refresh(self, interval_seconds: Optional[float] = None):
+        """
+        Refreshes the bucket periodically (every TTL by default) on a daemon thread.
+        """
+        if self._refresh_thread is not None or os.getenv("ENVIRONMENT") == "LOCAL":
+            return
+        interval = interval_seconds or self.ttl_seconds
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    log.error(f"Background secret refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=run, name="secret-refresh", daemon=True)
+        self._refresh_thread.start()
 
     # Optional: Add a method to retrieve all secrets if needed
     def get_all_secrets(self):
@@ -77,22 +194,15 @@ class SecretHandler:
         Retrieve all secrets from the secret bucket
         """
         try:
-            client = secretmanager.SecretManagerServiceClient()
-            
-            secret_path = f"projects/{self.gcp_project_id}/secrets/{self.secret_name}/versions/latest"
-            
-            response = client.access_secret_version(request={"name": secret_path})
-            secret_payload = response.payload.data.decode("UTF-8")
-            
-            secrets_dict = json.loads(secret_payload)
-            
+            secrets_dict = self._load_bucket()
+
             # Set all secrets in environment
             for key, value in secrets_dict.items():
                 os.environ[key] = value
-            
-            self.log.info("Successfully retrieved all secrets")
+
+            log.info("Successfully retrieved all secrets")
             return secrets_dict
-        
+
         except Exception as e:
-            self.log.error(f"Failed to retrieve all secrets: {str(e)}")
+            log.error(f"Failed to retrieve all secrets: {str(e)}")
             raise
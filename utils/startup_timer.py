@@ -0,0 +1,33 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+from utils.custom_logger import log
+
+class StartupTimer:
+    """
+    Records how long each step of app startup takes.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - start
+
+    def report(self) -> Dict[str, float]:
+        """
+        Returns the stage durations and the total, in milliseconds.
+        """
+        report = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        report["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return report
+
+    def log_report(self) -> Dict[str, float]:
+        report = self.report()
+        log.info(f"Startup timings (ms): {report}")
+        return report
@@ -0,0 +1,87 @@
+import atexit
+import threading
+from typing import Dict, Optional, Tuple
+from google.cloud import firestore
+from utils.custom_logger import log
+from utils.metrics import metrics
+
+class FirestoreWriteBehind:
+    """
+    Queues document writes and applies them to Firestore in the background.
+
+    Used when Redis holds the hot state: Firestore stays the durable copy without
+    putting its latency on the tracking path. Writes to the same document are
+    coalesced, the latest one winning, and flushed in batches every
+    `interval_seconds` and at exit.
+    """
+    MAX_BATCH_SIZE = 500 # Firestore limit of operations per batch
+
+    def __init__(self, firestore_client: firestore.Client, interval_seconds: float = 5.0):
+        self.firestore_client = firestore_client
+        self.interval_seconds = interval_seconds
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so a slow batch isn't overtaken by a newer one
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+        self.failures = 0
+
+    def put(self, collection: str, doc_id: str, document: Dict):
+        with self._lock:
+            self._pending[(collection, doc_id)] = document
+        self._start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="firestore-write-behind", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Firestore write-behind flush failed: %s", e)
+
+    def flush(self) -> int:
+        """
+        Writes every pending document now.
+
+        Documents of a failed batch are queued again unless a newer write replaced them.
+
+        Returns:
+            int: Number of documents written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            items = list(pending.items())
+            written = 0
+            for i in range(0, len(items), self.MAX_BATCH_SIZE):
+                chunk = items[i:i + self.MAX_BATCH_SIZE]
+                batch = self.firestore_client.batch()
+                for (collection, doc_id), document in chunk:
+                    batch.set(self.firestore_client.collection(collection).document(doc_id), document)
+                try:
+                    with metrics.external_call("firestore", "write_behind_commit"):
+                        batch.commit()
+                except Exception:
+                    self.failures += 1
+                    with self._lock:
+                        for key, document in items[i:]:
+                            self._pending.setdefault(key, document)
+                    raise
+                self.writes += 1
+                written += len(chunk)
+            return written